@@ -1,6 +1,20 @@
 import random
 import time
 
+from batch_eval import BatchEvaluator, evaluate_two_plies, numpy_available
+from bitboard import both_moves, valid_moves
+from board_ops import do_move, undo_move
+from endgame import ENDGAME_EMPTIES, solve_board
+from move_ordering import FASTEST_FIRST_DEPTH, MoveOrderer
+from opening_book import BOOK
+from parallel_search import new_search_id, parallel_root_search
+from probcut import MPC_CONFIDENCE, ProbCut, with_confidence
+from pvs import decide_with_pvs
+from search_control import Deadline, SearchTimeout, principal_variation, should_start_next_iteration
+from search_stats import SearchStats, finish_search
+from search_tables import SearchTables
+from transposition import EXACT, LOWER, TranspositionTable, bound_flag, child_key, search_key
+
 DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
               (0, -1),          (0, 1),
               (1, -1),  (1, 0), (1, 1)]
@@ -20,75 +34,262 @@ POSITION_WEIGHTS = [
 
 CORNERS = [(0, 0), (0, 7), (7, 0), (7, 7)]
 
-def decide_move2(board, my_symbol):
+# Mismos términos que evaluate_board, para evaluar las hojas por lotes (requiere numpy).
+# decide_move2 no lo usa por defecto: el nodo a profundidad 2 evalúa todos sus
+# nietos sin poda y cada lote cuesta lo que unas 7 evaluaciones sueltas; con
+# tabla y orden de jugadas la búsqueda alfa-beta evalúa ~8 veces menos hojas
+# y es 2 veces más rápida a profundidad 5-6 (ver decide_move2(batch=True))
+BATCH_EVALUATOR = BatchEvaluator(position_weights=POSITION_WEIGHTS, corner=3 * 25, mobility=2) if numpy_available() else None
+
+# Memoria máxima de la tabla de transposición (se conserva entre jugadas)
+TT_MEMORY_MB = 64
+
+def new_tables(tt_memory_mb=TT_MEMORY_MB):
+    # Tabla de transposición y killers/historia vacías (search_tables.py)
+    return SearchTables(tt=TranspositionTable(tt_memory_mb),
+                        ordering=MoveOrderer(fastest_first_depth=FASTEST_FIRST_DEPTH))
+
+# Tablas de las funciones de decisión que no reciben otras (se conservan entre jugadas)
+TABLES = new_tables()
+
+# Tiempo máximo de búsqueda por jugada (segundos)
+MOVE_TIME_LIMIT = 3.0
+
+# Cortes de Multi-ProbCut ajustados para evaluate_board (None si no hay archivo)
+PROBCUT = ProbCut.load('fabi')
+
+def decide_move2(board, my_symbol, time_limit=MOVE_TIME_LIMIT, endgame_empties=ENDGAME_EMPTIES, workers=0,
+                 stop=None, return_stats=False, tables=None, batch=False):
+    # workers > 1 reparte las jugadas de la raíz entre procesos (parallel_search.py)
+    # stop (threading.Event) cancela la búsqueda desde otro hilo (ponder.py)
+    # return_stats=True retorna (jugada, SearchStats) (search_stats.py)
+    # tables (SearchTables) reemplaza a TABLES (search_tables.py)
+    # batch=True evalúa los dos últimos niveles por lotes (BATCH_EVALUATOR; solo la búsqueda serial)
     start = time.time()
+    if tables is None:
+        tables = TABLES
+    tt, ordering = tables.tt, tables.ordering
+    stats = SearchStats('fabi')
 
-    count = sum(cell != 0 for row in board for cell in row)
-    depth = 3
-    if count >= 54:
-        depth = 5
-    elif count >= 36:
-        depth = 4
+    # Primero el libro de aperturas; si la posición no está, se busca
+    book_move = BOOK.lookup(board, my_symbol)
+    if book_move is not None:
+        return finish_search(book_move, stats, return_stats, 'book')
 
     if is_initial_board(board):
         valid_opening = [move for move in OPENING_MOVES if is_valid_move(board, move[0], move[1], my_symbol)]
         if valid_opening:
-            return random.choice(valid_opening)
+            return finish_search(random.choice(valid_opening), stats, return_stats, 'opening')
 
-    _, best_move = minimax(board, depth, True, my_symbol, float('-inf'), float('inf'))
+    # Con pocas casillas vacías se intenta resolver el final de forma exacta
+    # con la mitad del tiempo; si no alcanza, se busca con heurística
+    empties = sum(cell == 0 for row in board for cell in row)
+    if empties <= endgame_empties:
+        endgame_deadline = Deadline(time_limit / 2, stop_event=stop)
+        try:
+            score, move = solve_board(board, my_symbol, endgame_deadline)
+        except SearchTimeout:
+            move = None
+        stats.endgame_nodes = endgame_deadline.nodes
+        if move is not None:
+            stats.depth = empties
+            elapsed = time.time() - start
+            print(f"⏱️ Tiempo de decisión: {elapsed:.3f} segundos (final resuelto: {score:+d})")
+            return finish_search(move, stats, return_stats, 'endgame')
+
+    # Profundización iterativa: cada iteración deja su variante principal en
+    # la tabla de transposición y la siguiente prueba esas jugadas primero
+    deadline = Deadline(time_limit - (time.time() - start), stop_event=stop)
+    tt.new_search()
+    ordering.new_search()
+    stats.track_table(tt)
+    best_move = None
+    pv = []
+    search_id = new_search_id()
+    for depth in range(1, empties + 1):
+        iteration_start = time.time()
+        # La búsqueda juega sobre una copia propia (make/unmake in-place)
+        search_board = [row[:] for row in board]
+        ordering.start_iteration(depth)
+        moves = root_moves(board, my_symbol, depth, tt, ordering)
+        try:
+            if workers > 1:
+                _, move = parallel_root_search('fabi', board, my_symbol, depth, workers, deadline.remaining(),
+                                               search_id, moves, tt, stop)
+            else:
+                _, move = minimax(search_board, depth, True, my_symbol, float('-inf'), float('inf'),
+                                  tt=tt, deadline=deadline, batch=BATCH_EVALUATOR if batch else None, stats=stats,
+                                  ordering=ordering,
+                                  moves=moves)
+        except SearchTimeout:
+            break
+        if move is not None:
+            best_move = move
+        stats.completed_iteration(depth)
+        pv = principal_variation(tt, board, my_symbol, my_symbol, depth)
+        if not should_start_next_iteration(deadline, time.time() - iteration_start):
+            break
 
     if best_move is None:
         valid_moves = get_valid_moves(board, my_symbol)
         if valid_moves:
-            return valid_moves[0]
+            return finish_search(valid_moves[0], stats, return_stats)
         else:
-            return None
+            return finish_search(None, stats, return_stats)
 
+    stats.pv = pv
     elapsed = time.time() - start
-    print(f"⏱️ Tiempo de decisión: {elapsed:.3f} segundos")
-    return best_move
+    print(f"⏱️ Tiempo de decisión: {elapsed:.3f} segundos (profundidad {stats.depth}, PV {pv}, "
+          f"{stats.nodes} nodos)")
+    return finish_search(best_move, stats, return_stats)
+
+def decide_move_pvs(board, my_symbol, time_limit=MOVE_TIME_LIMIT, endgame_empties=ENDGAME_EMPTIES, stop=None,
+                    return_stats=False, confidence=MPC_CONFIDENCE, tables=None):
+    # Como decide_move2 pero con negamax PVS, ventanas de aspiración y pasos de turno (pvs.py)
+    # confidence: t de Multi-ProbCut (más bajo = más cortes); None lo desactiva (probcut.py)
+    if tables is None:
+        tables = TABLES
+    return decide_with_pvs('fabi_pvs', board, my_symbol, evaluate_board, time_limit=time_limit,
+                           endgame_empties=endgame_empties, tt=tables.tt, ordering=tables.ordering,
+                           move_key=lambda m: -POSITION_WEIGHTS[m[0]][m[1]],
+                           probcut=with_confidence(PROBCUT, confidence), stop=stop, return_stats=return_stats)
 
-def minimax(board, depth, maximizing_player, my_symbol, alpha, beta):
+def root_moves(board, my_symbol, depth, tt, ordering):
+    # Orden de la raíz, el mismo en la búsqueda serial y en la paralela (parallel_search.py)
+    moves = get_valid_moves(board, my_symbol)
+    moves.sort(key=lambda m: POSITION_WEIGHTS[m[0]][m[1]], reverse=True)
+    return ordering.order_root(moves, board, my_symbol, depth, tt, search_key(board, my_symbol, my_symbol))
+
+def minimax(board, depth, maximizing_player, my_symbol, alpha, beta, undo=None, tt=None, key=None, deadline=None,
+            batch=None, stats=None, ordering=None, moves=None):
+    # board se modifica durante la búsqueda y se restaura antes de retornar
+    # stats (SearchStats) cuenta nodos, cortes y tiempos si se pasa
+    # ordering (MoveOrderer) agrega killers, historia y fastest-first al orden
+    # moves: jugadas de la raíz ya ordenadas (root_moves)
     opponent = -my_symbol
+    if undo is None:
+        undo = []
+    if deadline is not None:
+        deadline.tick()
+    if stats is not None:
+        stats.nodes += 1
 
-    if depth == 0 or game_over(board):
+    if depth == 0:
+        if stats is not None:
+            return stats.evaluate(evaluate_board, board, my_symbol), None
         return evaluate_board(board, my_symbol), None
 
+    # Una sola generación de jugadas por nodo: las del que mueve sirven para
+    # saber si la partida sigue y para expandir; solo si no tiene jugadas se
+    # generan las del rival, y ambas listas van a la movilidad de la evaluación
     current_player = my_symbol if maximizing_player else opponent
-    valid_moves = get_valid_moves(board, current_player)
+    if stats is None:
+        valid_moves = get_valid_moves(board, current_player)
+    else:
+        valid_moves = stats.movegen(get_valid_moves, board, current_player)
     if not valid_moves:
-        return evaluate_board(board, my_symbol), None
+        if stats is None:
+            other_moves = get_valid_moves(board, -current_player)
+        else:
+            other_moves = stats.movegen(get_valid_moves, board, -current_player)
+        my_moves, opp_moves = (valid_moves, other_moves) if maximizing_player else (other_moves, valid_moves)
+        if stats is not None:
+            return stats.evaluate(evaluate_board, board, my_symbol, my_moves, opp_moves), None
+        return evaluate_board(board, my_symbol, my_moves, opp_moves), None
+
+    if moves is not None:
+        valid_moves = list(moves)
+    else:
+        # Los pesos valen igual para quien mueve: ambos lados prueban primero sus mejores casillas
+        valid_moves.sort(key=lambda m: POSITION_WEIGHTS[m[0]][m[1]], reverse=True)
+        if ordering is not None and not (depth == 2 and batch is not None):
+            ordering.order(valid_moves, board, current_player, depth)
 
-    valid_moves.sort(key=lambda m: POSITION_WEIGHTS[m[0]][m[1]], reverse=maximizing_player)
+    # Consultar la tabla de transposición: cortes y jugada hash
+    alpha_orig, beta_orig = alpha, beta
+    if tt is not None:
+        if key is None:
+            key = search_key(board, current_player, my_symbol)
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_flag, tt_score, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == EXACT:
+                    return tt_score, tt_move
+                if tt_flag == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if beta <= alpha:
+                    return tt_score, tt_move
+            if moves is None and tt_move in valid_moves:
+                valid_moves.remove(tt_move)
+                valid_moves.insert(0, tt_move)
 
     best_move = None
 
-    if maximizing_player:
-        max_eval = float('-inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, current_player)
-            eval, _ = minimax(new_board, depth - 1, False, my_symbol, alpha, beta)
-            if eval > max_eval:
-                max_eval = eval
+    if depth == 2 and batch is not None:
+        # Los nietos de este nodo son todos hojas: se evalúan en un solo lote
+        # (sin poda en el último nivel, pero sin costo por hoja en Python)
+        if deadline is not None:
+            for _ in valid_moves:
+                deadline.tick()
+        if stats is None:
+            scores = evaluate_two_plies(board, valid_moves, current_player, my_symbol, batch, undo)
+        else:
+            stats.nodes += len(valid_moves)
+            eval_start = time.perf_counter()
+            scores = evaluate_two_plies(board, valid_moves, current_player, my_symbol, batch, undo, stats)
+            stats.eval_seconds += time.perf_counter() - eval_start
+        best_eval = float('-inf') if maximizing_player else float('inf')
+        for move, eval in zip(valid_moves, scores):
+            if (eval > best_eval) if maximizing_player else (eval < best_eval):
+                best_eval = eval
+                best_move = move
+    elif maximizing_player:
+        best_eval = float('-inf')
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, current_player, undo)
+            new_key = child_key(key, move, current_player, flips, undo) if tt is not None else None
+            eval, _ = minimax(board, depth - 1, False, my_symbol, alpha, beta, undo, tt, new_key, deadline, batch,
+                              stats, ordering)
+            undo_move(board, move, current_player, flips, undo)
+            if eval > best_eval:
+                best_eval = eval
                 best_move = move
             alpha = max(alpha, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if ordering is not None:
+                    ordering.record_cutoff(move, current_player, depth)
                 break
-        return max_eval, best_move
     else:
-        min_eval = float('inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, current_player)
-            eval, _ = minimax(new_board, depth - 1, True, my_symbol, alpha, beta)
-            if eval < min_eval:
-                min_eval = eval
+        best_eval = float('inf')
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, current_player, undo)
+            new_key = child_key(key, move, current_player, flips, undo) if tt is not None else None
+            eval, _ = minimax(board, depth - 1, True, my_symbol, alpha, beta, undo, tt, new_key, deadline, batch,
+                              stats, ordering)
+            undo_move(board, move, current_player, flips, undo)
+            if eval < best_eval:
+                best_eval = eval
                 best_move = move
             beta = min(beta, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if ordering is not None:
+                    ordering.record_cutoff(move, current_player, depth)
                 break
-        return min_eval, best_move
 
-def evaluate_board(board, my_symbol):
+    if tt is not None:
+        tt.store(key, depth, bound_flag(best_eval, alpha_orig, beta_orig), best_eval, best_move)
+
+    return best_eval, best_move
+
+def evaluate_board(board, my_symbol, my_moves=None, opp_moves=None):
+    # my_moves/opp_moves: jugadas de cada lado si la búsqueda ya las generó
     opponent = -my_symbol
     position_score = 0
     corner_score = 0
@@ -107,14 +308,14 @@ def evaluate_board(board, my_symbol):
         elif board[r][c] == opponent:
             corner_score -= 25
 
-    my_moves = get_valid_moves(board, my_symbol)
-    opp_moves = get_valid_moves(board, opponent)
+    if my_moves is None:
+        my_moves, opp_moves = both_moves(board, my_symbol)
     mobility_score = len(my_moves) - len(opp_moves)
 
     return position_score + (3 * corner_score) + (2 * mobility_score)
 
 def get_valid_moves(board, symbol):
-    return [(r, c) for r in range(8) for c in range(8) if is_valid_move(board, r, c, symbol)]
+    return valid_moves(board, symbol)
 
 def is_valid_move(board, row, col, symbol):
     if board[row][col] != 0:
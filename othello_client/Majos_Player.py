@@ -1,5 +1,21 @@
-import copy
 import random
+import time
+
+from bitboard import board_to_bitboards, both_moves, valid_moves
+from board_ops import do_move, undo_move
+from endgame import ENDGAME_EMPTIES, solve_board
+from eval_cache import EVAL_CACHE_ENTRIES, EvalCache
+from move_ordering import FASTEST_FIRST_DEPTH, MoveOrderer
+from opening_book import BOOK
+from parallel_search import new_search_id, parallel_root_search
+from pattern_eval import PATTERN_EVALUATOR, WEIGHT_SCALE
+from probcut import MPC_CONFIDENCE, ProbCut, with_confidence
+from pvs import decide_with_pvs
+from search_control import Deadline, SearchTimeout, principal_variation, should_start_next_iteration
+from search_stats import SearchStats, finish_search
+from search_tables import SearchTables
+from stability import stability_score
+from transposition import EXACT, LOWER, SIDE_KEY, TranspositionTable, bound_flag, child_key, search_key
 
 
 DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
@@ -23,82 +39,294 @@ POSITION_WEIGHTS = [
 # Esquinas del tablero
 CORNERS = [(0, 0), (0, 7), (7, 0), (7, 7)]
 
-def decide_move_enhanced(board, my_symbol):
+# Memoria de la tabla de transposición de minimax_enhanced (y de la de patrones)
+TT_MEMORY_MB = 64
+
+# Tiempo máximo de búsqueda por jugada (segundos)
+MOVE_TIME_LIMIT = 3.0
+
+# Ventana de aspiración de PVS (la evaluación mejorada usa valores de cientos)
+PVS_ASPIRATION_WINDOW = 200
+
+# Búsqueda con el evaluador por patrones: ventana de aspiración de dos fichas
+PATTERN_ASPIRATION_WINDOW = 2 * WEIGHT_SCALE
+
+# Cortes de Multi-ProbCut ajustados para cada evaluación (None si no hay archivo)
+PROBCUT = ProbCut.load('majos')
+PATTERN_PROBCUT = ProbCut.load('majos_pattern')
+
+def new_tables(tt_memory_mb=TT_MEMORY_MB):
+    """
+    Tablas vacías (search_tables.py): transposición de minimax_enhanced,
+    killers/historia, evaluaciones ya calculadas (desalojo LRU) y la tabla
+    propia de la búsqueda por patrones (otra escala de valores).
     """
-    Función principal mejorada para decidir el siguiente movimiento
+    return SearchTables(tt=TranspositionTable(tt_memory_mb),
+                        ordering=MoveOrderer(fastest_first_depth=FASTEST_FIRST_DEPTH),
+                        eval_cache=EvalCache(EVAL_CACHE_ENTRIES),
+                        pattern_tt=TranspositionTable(tt_memory_mb))
+
+# Tablas de las funciones de decisión que no reciben otras (se conservan entre jugadas)
+TABLES = new_tables()
+
+def decide_move_enhanced(board, my_symbol, time_limit=MOVE_TIME_LIMIT, endgame_empties=ENDGAME_EMPTIES, workers=0,
+                         stop=None, return_stats=False, tables=None):
+    """
+    Función principal mejorada para decidir el siguiente movimiento.
+    Con endgame_empties casillas vacías o menos intenta resolver el final de
+    forma exacta. Si no, usa profundización iterativa hasta agotar
+    time_limit segundos y se queda con la jugada de la última iteración completa.
+    Con workers > 1 cada iteración reparte la raíz entre varios procesos.
+    stop (threading.Event) permite cancelar la búsqueda desde otro hilo.
+    Con return_stats=True retorna (jugada, SearchStats).
+    tables (SearchTables) reemplaza a TABLES.
     """
+    start = time.time()
+    if tables is None:
+        tables = TABLES
+    tt, ordering, eval_cache = tables.tt, tables.ordering, tables.eval_cache
+    stats = SearchStats('majos')
+    # Primero el libro de aperturas; si la posición no está, se busca
+    book_move = BOOK.lookup(board, my_symbol)
+    if book_move is not None:
+        return finish_search(book_move, stats, return_stats, 'book')
+    
     if is_initial_board(board):
         valid_opening = [move for move in OPENING_MOVES if is_valid_move(board, move[0], move[1], my_symbol)]
         if valid_opening:
-            return random.choice(valid_opening)
-    
-    # Usar profundidad adaptativa basada en la fase del juego
-    filled_squares = sum(1 for row in board for cell in row if cell != 0)
-    if filled_squares > 50:  # Endgame
-        depth = 6
-    elif filled_squares > 30:  # Midgame
-        depth = 4
-    else:  # Early game
-        depth = 3
-    
-    _, best_move = minimax_enhanced(board, depth=depth, maximizing_player=True, 
-                                  my_symbol=my_symbol, alpha=float('-inf'), beta=float('inf'))
+            return finish_search(random.choice(valid_opening), stats, return_stats, 'opening')
+    
+    empties = sum(1 for row in board for cell in row if cell == 0)
+    if empties <= endgame_empties:
+        endgame_deadline = Deadline(time_limit / 2, stop_event=stop)
+        try:
+            _, move = solve_board(board, my_symbol, endgame_deadline)
+        except SearchTimeout:
+            move = None
+        stats.endgame_nodes = endgame_deadline.nodes
+        if move is not None:
+            stats.depth = empties
+            return finish_search(move, stats, return_stats, 'endgame')
+
+    # La variante principal de cada iteración queda en la tabla de
+    # transposición y ordena las jugadas de la siguiente
+    deadline = Deadline(time_limit - (time.time() - start), stop_event=stop)
+    tt.new_search()
+    ordering.new_search()
+    stats.track_table(tt)
+    stats.track_cache(eval_cache)
+    best_move = None
+    pv = []
+    search_id = new_search_id()
+    for depth in range(1, empties + 1):
+        iteration_start = time.time()
+        search_board = [row[:] for row in board]
+        ordering.start_iteration(depth)
+        moves = root_moves(board, my_symbol, depth, tt, ordering)
+        try:
+            if workers > 1:
+                _, move = parallel_root_search('majos', board, my_symbol, depth, workers, deadline.remaining(),
+                                               search_id, moves, tt, stop)
+            else:
+                _, move = minimax_enhanced(search_board, depth=depth, maximizing_player=True, 
+                                           my_symbol=my_symbol, alpha=float('-inf'), beta=float('inf'),
+                                           tt=tt, deadline=deadline, stats=stats, ordering=ordering,
+                                           eval_cache=eval_cache, moves=moves)
+        except SearchTimeout:
+            break
+        if move is not None:
+            best_move = move
+        stats.completed_iteration(depth)
+        pv = principal_variation(tt, board, my_symbol, my_symbol, depth)
+        if not should_start_next_iteration(deadline, time.time() - iteration_start):
+            break
     
     if best_move is None:
         valid_moves = get_valid_moves(board, my_symbol)
         if valid_moves:
-            return valid_moves[0]  
+            return finish_search(valid_moves[0], stats, return_stats)
         else:
-            return None 
+            return finish_search(None, stats, return_stats)
     
-    return best_move
+    stats.pv = pv
+    return finish_search(best_move, stats, return_stats)
 
-def minimax_enhanced(board, depth, maximizing_player, my_symbol, alpha, beta):
+def decide_move_pvs(board, my_symbol, time_limit=MOVE_TIME_LIMIT, endgame_empties=ENDGAME_EMPTIES, stop=None,
+                    return_stats=False, confidence=MPC_CONFIDENCE, tables=None):
     """
-    Minimax mejorado con mejor función de evaluación
+    Igual que decide_move_enhanced pero con negamax PVS (pvs.py): ventana
+    mínima para las jugadas que no son la primera, ventanas de aspiración en
+    la raíz y pasos de turno en lugar de evaluar la posición.
+    confidence es el t de Multi-ProbCut (probcut.py); None lo desactiva.
     """
-    opponent = -my_symbol
-
-    if depth == 0 or game_over(board):
-        return evaluate_board_enhanced(board, my_symbol), None
+    if tables is None:
+        tables = TABLES
+    return decide_with_pvs('majos_pvs', board, my_symbol, compute_evaluation_enhanced, time_limit=time_limit,
+                           endgame_empties=endgame_empties, tt=tables.tt, ordering=tables.ordering,
+                           window=PVS_ASPIRATION_WINDOW, eval_cache=tables.eval_cache, probcut=with_confidence(PROBCUT, confidence), stop=stop,
+                           return_stats=return_stats)
+
+def decide_move_pattern(board, my_symbol, time_limit=MOVE_TIME_LIMIT, endgame_empties=ENDGAME_EMPTIES, stop=None,
+                        return_stats=False, confidence=MPC_CONFIDENCE, tables=None):
+    """
+    Igual que decide_move_pvs pero evaluando las hojas con las tablas de
+    patrones (evaluate_board_pattern).
+    """
+    if tables is None:
+        tables = TABLES
+    return decide_with_pvs('majos_pattern', board, my_symbol, evaluate_board_pattern, time_limit=time_limit,
+                           endgame_empties=endgame_empties, tt=tables.pattern_tt, ordering=tables.ordering,
+                           window=PATTERN_ASPIRATION_WINDOW, probcut=with_confidence(PATTERN_PROBCUT, confidence),
+                           stop=stop, return_stats=return_stats)
+
+def root_moves(board, my_symbol, depth, tt, ordering):
+    """
+    Jugadas de la raíz en el orden en que las prueba minimax_enhanced; la
+    búsqueda paralela (parallel_search.py) usa el mismo orden.
+    """
+    moves = get_valid_moves(board, my_symbol)
+    return ordering.order_root(moves, board, my_symbol, depth, tt, search_key(board, my_symbol, my_symbol))
 
-    valid_moves = get_valid_moves(board, my_symbol if maximizing_player else opponent)
+def minimax_enhanced(board, depth, maximizing_player, my_symbol, alpha, beta, undo=None, tt=None, key=None, deadline=None,
+                     stats=None, ordering=None, eval_cache=None, moves=None):
+    """
+    Minimax mejorado con mejor función de evaluación.
+    Juega los movimientos sobre board (make/unmake) y lo deja como estaba.
+    Si se pasa tt, usa la tabla de transposición para cortes y para
+    probar primero la jugada guardada; key es el hash Zobrist del nodo.
+    Si se pasa deadline, lanza SearchTimeout cuando se acaba el tiempo.
+    Si se pasa stats (SearchStats), cuenta nodos, cortes y tiempos.
+    Si se pasa ordering (MoveOrderer), ordena con killers, historia y fastest-first.
+    eval_cache (EvalCache) es la caché de las hojas; por defecto la de TABLES.
+    moves son las jugadas de la raíz ya ordenadas (root_moves).
+    """
+    opponent = -my_symbol
+    if undo is None:
+        undo = []
+    if deadline is not None:
+        deadline.tick()
+    if stats is not None:
+        stats.nodes += 1
+
+    current_player = my_symbol if maximizing_player else opponent
+    # Con la clave Zobrist del nodo la caché de evaluaciones no recalcula el hash
+    leaf_key = None
+    if key is not None:
+        leaf_key = key ^ SIDE_KEY if current_player == -1 else key
+
+    if depth == 0:
+        if stats is not None:
+            return stats.evaluate(evaluate_board_enhanced, board, my_symbol, leaf_key, None, None, eval_cache), None
+        return evaluate_board_enhanced(board, my_symbol, leaf_key, eval_cache=eval_cache), None
+
+    # Una sola generación de jugadas por nodo: las del que mueve sirven para
+    # saber si la partida sigue y para expandir; solo si no tiene jugadas se
+    # generan las del rival, y ambas listas van a la movilidad de la evaluación
+    if stats is None:
+        valid_moves = get_valid_moves(board, current_player)
+    else:
+        valid_moves = stats.movegen(get_valid_moves, board, current_player)
     if not valid_moves:
-        return evaluate_board_enhanced(board, my_symbol), None
+        if stats is None:
+            other_moves = get_valid_moves(board, -current_player)
+        else:
+            other_moves = stats.movegen(get_valid_moves, board, -current_player)
+        my_moves, opp_moves = (valid_moves, other_moves) if maximizing_player else (other_moves, valid_moves)
+        if stats is not None:
+            return stats.evaluate(evaluate_board_enhanced, board, my_symbol, leaf_key, my_moves, opp_moves,
+                                  eval_cache), None
+        return evaluate_board_enhanced(board, my_symbol, leaf_key, my_moves, opp_moves, eval_cache), None
+
+    if moves is not None:
+        valid_moves = list(moves)
+    elif ordering is not None:
+        ordering.order(valid_moves, board, current_player, depth)
+
+    alpha_orig, beta_orig = alpha, beta
+    if tt is not None:
+        if key is None:
+            key = search_key(board, current_player, my_symbol)
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_flag, tt_score, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == EXACT:
+                    return tt_score, tt_move
+                if tt_flag == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if beta <= alpha:
+                    return tt_score, tt_move
+            if moves is None and tt_move in valid_moves:
+                valid_moves.remove(tt_move)
+                valid_moves.insert(0, tt_move)
 
     best_move = None
 
     if maximizing_player:
-        max_eval = float('-inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, my_symbol)
-            eval, _ = minimax_enhanced(new_board, depth - 1, False, my_symbol, alpha, beta)
-            if eval > max_eval:
-                max_eval = eval
+        best_eval = float('-inf')
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, my_symbol, undo)
+            new_key = child_key(key, move, my_symbol, flips, undo) if tt is not None else None
+            eval, _ = minimax_enhanced(board, depth - 1, False, my_symbol, alpha, beta, undo, tt, new_key, deadline,
+                                       stats, ordering, eval_cache)
+            undo_move(board, move, my_symbol, flips, undo)
+            if eval > best_eval:
+                best_eval = eval
                 best_move = move
             alpha = max(alpha, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if ordering is not None:
+                    ordering.record_cutoff(move, current_player, depth)
                 break
-        return max_eval, best_move
     else:
-        min_eval = float('inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, opponent)
-            eval, _ = minimax_enhanced(new_board, depth - 1, True, my_symbol, alpha, beta)
-            if eval < min_eval:
-                min_eval = eval
+        best_eval = float('inf')
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, opponent, undo)
+            new_key = child_key(key, move, opponent, flips, undo) if tt is not None else None
+            eval, _ = minimax_enhanced(board, depth - 1, True, my_symbol, alpha, beta, undo, tt, new_key, deadline,
+                                       stats, ordering, eval_cache)
+            undo_move(board, move, opponent, flips, undo)
+            if eval < best_eval:
+                best_eval = eval
                 best_move = move
             beta = min(beta, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if ordering is not None:
+                    ordering.record_cutoff(move, current_player, depth)
                 break
-        return min_eval, best_move
 
-def evaluate_board_enhanced(board, my_symbol):
+    if tt is not None:
+        tt.store(key, depth, bound_flag(best_eval, alpha_orig, beta_orig), best_eval, best_move)
+
+    return best_eval, best_move
+
+def evaluate_board_enhanced(board, my_symbol, key=None, my_moves=None, opp_moves=None, eval_cache=None):
+    """
+    Función de evaluación mejorada (compute_evaluation_enhanced) pasando por
+    eval_cache (por defecto la caché de TABLES): una posición ya evaluada no
+    vuelve a calcular movilidad ni estabilidad. key es
+    eval_cache.position_key(board, my_symbol) si ya se conoce.
+    """
+    if eval_cache is None:
+        eval_cache = TABLES.eval_cache
+    return eval_cache.evaluate(compute_evaluation_enhanced, board, my_symbol, key, my_moves, opp_moves)
+
+def compute_evaluation_enhanced(board, my_symbol, my_moves=None, opp_moves=None):
     """
     Función de evaluación mejorada basada en el paper académico
     Incorpora: Stability, Corner Strategy, Mobility Avanzada, y Coin Parity
+    my_moves/opp_moves: jugadas de cada lado si la búsqueda ya las generó;
+    si no, se generan una vez y las usan las esquinas y la movilidad.
     """
     opponent = -my_symbol
+    if my_moves is None:
+        my_moves, opp_moves = both_moves(board, my_symbol)
     
     # Determinar fase del juego para pesos dinámicos
     filled_squares = sum(1 for row in board for cell in row if cell != 0)
@@ -106,8 +334,8 @@ def evaluate_board_enhanced(board, my_symbol):
     
     # Calcular cada heurística
     coin_parity_score = calculate_coin_parity(board, my_symbol, opponent)
-    corner_score = calculate_corner_strategy(board, my_symbol, opponent)
-    mobility_score = calculate_mobility_enhanced(board, my_symbol, opponent)
+    corner_score = calculate_corner_strategy(board, my_symbol, opponent, my_moves, opp_moves)
+    mobility_score = calculate_mobility_enhanced(board, my_symbol, opponent, my_moves, opp_moves)
     stability_score = calculate_stability(board, my_symbol, opponent)
     
     # Pesos dinámicos basados en la fase del juego
@@ -122,6 +350,14 @@ def evaluate_board_enhanced(board, my_symbol):
     
     return total_score
 
+def evaluate_board_pattern(board, my_symbol):
+    """
+    Evaluación por tablas de patrones (pattern_eval.py): bordes, esquinas,
+    diagonales y bloques 2x5 con pesos por fase. Unas pocas búsquedas en
+    tablas en lugar de los recorridos de evaluate_board_enhanced.
+    """
+    return PATTERN_EVALUATOR.evaluate(board, my_symbol)
+
 def get_game_phase(filled_squares):
     """Determina la fase del juego"""
     if filled_squares <= 20:
@@ -179,13 +415,17 @@ def calculate_coin_parity(board, my_symbol, opponent):
     
     return 100 * (my_count - opp_count) / total_pieces
 
-def calculate_corner_strategy(board, my_symbol, opponent):
+def calculate_corner_strategy(board, my_symbol, opponent, my_moves=None, opp_moves=None):
     """
     Estrategia de esquinas mejorada:
     - Esquinas capturadas: +25 puntos
     - Esquinas potenciales: +10 puntos
     - Esquinas del oponente: -25 puntos
+    Con las listas de jugadas de cada lado (o generándolas una vez) se sabe
+    qué esquinas puede tomar cada uno.
     """
+    if my_moves is None:
+        my_moves, opp_moves = both_moves(board, my_symbol)
     my_corners = 0
     opp_corners = 0
     potential_corners = 0
@@ -197,20 +437,22 @@ def calculate_corner_strategy(board, my_symbol, opponent):
             opp_corners += 25
         elif board[r][c] == 0:
             # Verificar si es una esquina potencial (podemos capturarla en el próximo movimiento)
-            if is_valid_move(board, r, c, my_symbol):
+            if (r, c) in my_moves:
                 potential_corners += 10
-            elif is_valid_move(board, r, c, opponent):
+            elif (r, c) in opp_moves:
                 potential_corners -= 5  # El oponente puede capturarla
     
     return my_corners - opp_corners + potential_corners
 
-def calculate_mobility_enhanced(board, my_symbol, opponent):
+def calculate_mobility_enhanced(board, my_symbol, opponent, my_moves=None, opp_moves=None):
     """
     Movilidad mejorada: actual + potencial
     """
-    # Movilidad actual
-    my_moves = len(get_valid_moves(board, my_symbol))
-    opp_moves = len(get_valid_moves(board, opponent))
+    # Movilidad actual (con las jugadas ya generadas si se pasan)
+    if my_moves is None:
+        my_moves, opp_moves = both_moves(board, my_symbol)
+    my_moves = len(my_moves)
+    opp_moves = len(opp_moves)
     
     actual_mobility = my_moves - opp_moves
     
@@ -245,148 +487,18 @@ def calculate_potential_mobility(board, player, opponent):
 
 def calculate_stability(board, my_symbol, opponent):
     """
-    Calcula la estabilidad de las fichas:
+    Calcula la estabilidad de las fichas (ver stability.py):
     - Stable: +3 puntos (no pueden ser flanqueadas nunca)
     - Semi-stable: +1 punto (podrían ser flanqueadas en el futuro)
     - Unstable: -1 punto (pueden ser flanqueadas inmediatamente)
     """
-    my_stability = 0
-    opp_stability = 0
-    
-    for r in range(8):
-        for c in range(8):
-            if board[r][c] == my_symbol:
-                my_stability += get_piece_stability(board, r, c, my_symbol)
-            elif board[r][c] == opponent:
-                opp_stability += get_piece_stability(board, r, c, opponent)
-    
-    return my_stability - opp_stability
-
-def get_piece_stability(board, row, col, player):
-    """
-    Determina la estabilidad de una ficha específica
-    """
-    # Las esquinas son siempre estables
-    if (row, col) in CORNERS:
-        return 3
-    
-    # Verificar si la ficha puede ser flanqueada
-    can_be_flanked = False
-    opponent = -player
-    
-    for dr, dc in DIRECTIONS:
-        # Verificar en ambas direcciones
-        r1, c1 = row + dr, col + dc
-        r2, c2 = row - dr, col - dc
-        
-        # Si hay espacios vacíos en línea que podrían permitir flanqueo futuro
-        line_has_potential_flank = False
-        
-        # Verificar hacia adelante
-        temp_r, temp_c = r1, c1
-        found_opponent = False
-        found_empty = False
-        
-        while 0 <= temp_r < 8 and 0 <= temp_c < 8:
-            if board[temp_r][temp_c] == 0:
-                found_empty = True
-                break
-            elif board[temp_r][temp_c] == opponent:
-                found_opponent = True
-            elif board[temp_r][temp_c] == player:
-                break
-            temp_r += dr
-            temp_c += dc
-        
-        # Verificar hacia atrás
-        temp_r, temp_c = r2, c2
-        found_opponent_back = False
-        found_empty_back = False
-        
-        while 0 <= temp_r < 8 and 0 <= temp_c < 8:
-            if board[temp_r][temp_c] == 0:
-                found_empty_back = True
-                break
-            elif board[temp_r][temp_c] == opponent:
-                found_opponent_back = True
-            elif board[temp_r][temp_c] == player:
-                break
-            temp_r -= dr
-            temp_c -= dc
-        
-        # Si hay potencial para flanqueo (espacios vacíos y oponentes en línea)
-        if (found_empty and found_opponent) or (found_empty_back and found_opponent_back):
-            line_has_potential_flank = True
-        
-        # Verificar si puede ser flanqueada inmediatamente
-        if can_piece_be_flanked_immediately(board, row, col, player, dr, dc):
-            can_be_flanked = True
-            break
-    
-    # Clasificar estabilidad
-    if can_be_flanked:
-        return -1  # Unstable
-    elif any(can_piece_be_flanked_in_future(board, row, col, player, dr, dc) for dr, dc in DIRECTIONS):
-        return 1   # Semi-stable
-    else:
-        return 3   # Stable
-
-def can_piece_be_flanked_immediately(board, row, col, player, dr, dc):
-    """Verifica si una pieza puede ser flanqueada en el próximo movimiento"""
-    opponent = -player
-    
-    # Buscar en la dirección dada
-    r, c = row + dr, col + dc
-    found_empty_for_opponent = False
-    
-    while 0 <= r < 8 and 0 <= c < 8:
-        if board[r][c] == 0:
-            # Verificar si el oponente puede jugar aquí y flanquear
-            if is_valid_move(board, r, c, opponent):
-                # Simular el movimiento y ver si flanquea nuestra pieza
-                temp_board = copy.deepcopy(board)
-                temp_board = apply_move(temp_board, (r, c), opponent)
-                if temp_board[row][col] == opponent:
-                    return True
-            break
-        elif board[r][c] == opponent:
-            # Continuar buscando
-            pass
-        else:  # board[r][c] == player
-            break
-        r += dr
-        c += dc
-    
-    return False
-
-def can_piece_be_flanked_in_future(board, row, col, player, dr, dc):
-    """Verifica si una pieza podría ser flanqueada en movimientos futuros"""
-    opponent = -player
-    
-    # Buscar espacios vacíos en la línea que podrían permitir flanqueo futuro
-    r, c = row + dr, col + dc
-    has_opponent_in_line = False
-    
-    while 0 <= r < 8 and 0 <= c < 8:
-        if board[r][c] == 0:
-            return has_opponent_in_line  # Si hay oponentes en la línea y un espacio vacío
-        elif board[r][c] == opponent:
-            has_opponent_in_line = True
-        else:  # board[r][c] == player
-            break
-        r += dr
-        c += dc
-    
-    return False
+    my_bits, opp_bits = board_to_bitboards(board, my_symbol)
+    return stability_score(my_bits, opp_bits)
 
 # Mantener las funciones originales que funcionan bien
 def get_valid_moves(board, symbol):
-    valid_moves = []
-    for r in range(8):
-        for c in range(8):
-            if is_valid_move(board, r, c, symbol):
-                valid_moves.append((r, c))
-    return valid_moves
+    # Generación con bitboards (ver bitboard.py)
+    return valid_moves(board, symbol)
 
 def is_valid_move(board, row, col, symbol):
     if board[row][col] != 0:
@@ -410,25 +522,10 @@ def is_valid_move(board, row, col, symbol):
     return False
 
 def apply_move(board, move, symbol):
-    new_board = copy.deepcopy(board)
-    r, c = move
-    new_board[r][c] = symbol
-    opponent = -symbol
-
-    for dr, dc in DIRECTIONS:
-        to_flip = []
-        rr, cc = r + dr, c + dc
-        while 0 <= rr < 8 and 0 <= cc < 8:
-            if new_board[rr][cc] == opponent:
-                to_flip.append((rr, cc))
-            elif new_board[rr][cc] == symbol:
-                for fr, fc in to_flip:
-                    new_board[fr][fc] = symbol
-                break
-            else:
-                break
-            rr += dr
-            cc += dc
+    # Tablero nuevo con la jugada (copia por filas y do_move); la búsqueda
+    # juega sobre el mismo tablero con do_move/undo_move
+    new_board = [row[:] for row in board]
+    do_move(new_board, move, symbol, [])
     return new_board
 
 def is_initial_board(board):
@@ -439,59 +536,85 @@ def game_over(board):
     return not (get_valid_moves(board, 1) or get_valid_moves(board, -1))
 
 # Función alternativa usando la función original para comparación
-def decide_move2(board, my_symbol):
+def decide_move2(board, my_symbol, return_stats=False):
     """Función original mantenida para comparación"""
+    stats = SearchStats('majos_classic')
+    # Primero el libro de aperturas; si la posición no está, se busca
+    book_move = BOOK.lookup(board, my_symbol)
+    if book_move is not None:
+        return finish_search(book_move, stats, return_stats, 'book')
+    
     if is_initial_board(board):
         valid_opening = [move for move in OPENING_MOVES if is_valid_move(board, move[0], move[1], my_symbol)]
         if valid_opening:
-            return random.choice(valid_opening)
+            return finish_search(random.choice(valid_opening), stats, return_stats, 'opening')
     
-    _, best_move = minimax(board, depth=3, maximizing_player=True, my_symbol=my_symbol, alpha=float('-inf'), beta=float('inf'))
+    search_board = [row[:] for row in board]
+    _, best_move = minimax(search_board, depth=3, maximizing_player=True, my_symbol=my_symbol, alpha=float('-inf'), beta=float('inf'),
+                           stats=stats)
+    stats.completed_iteration(3)
     
     if best_move is None:
         valid_moves = get_valid_moves(board, my_symbol)
         if valid_moves:
-            return valid_moves[0]  
+            return finish_search(valid_moves[0], stats, return_stats)
         else:
-            return None 
+            return finish_search(None, stats, return_stats)
     
-    return best_move
+    return finish_search(best_move, stats, return_stats)
 
-def minimax(board, depth, maximizing_player, my_symbol, alpha, beta):
+def minimax(board, depth, maximizing_player, my_symbol, alpha, beta, undo=None, stats=None):
     """Función minimax original"""
     opponent = -my_symbol
-
-    if depth == 0 or game_over(board):
+    if undo is None:
+        undo = []
+    if stats is not None:
+        stats.nodes += 1
+
+    if depth == 0 or (game_over(board) if stats is None else stats.movegen(game_over, board)):
+        if stats is not None:
+            return stats.evaluate(evaluate_board, board, my_symbol), None
         return evaluate_board(board, my_symbol), None
 
-    valid_moves = get_valid_moves(board, my_symbol if maximizing_player else opponent)
+    if stats is None:
+        valid_moves = get_valid_moves(board, my_symbol if maximizing_player else opponent)
+    else:
+        valid_moves = stats.movegen(get_valid_moves, board, my_symbol if maximizing_player else opponent)
     if not valid_moves:
+        if stats is not None:
+            return stats.evaluate(evaluate_board, board, my_symbol), None
         return evaluate_board(board, my_symbol), None
 
     best_move = None
 
     if maximizing_player:
         max_eval = float('-inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, my_symbol)
-            eval, _ = minimax(new_board, depth - 1, False, my_symbol, alpha, beta)
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, my_symbol, undo)
+            eval, _ = minimax(board, depth - 1, False, my_symbol, alpha, beta, undo, stats)
+            undo_move(board, move, my_symbol, flips, undo)
             if eval > max_eval:
                 max_eval = eval
                 best_move = move
             alpha = max(alpha, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
                 break
         return max_eval, best_move
     else:
         min_eval = float('inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, opponent)
-            eval, _ = minimax(new_board, depth - 1, True, my_symbol, alpha, beta)
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, opponent, undo)
+            eval, _ = minimax(board, depth - 1, True, my_symbol, alpha, beta, undo, stats)
+            undo_move(board, move, opponent, flips, undo)
             if eval < min_eval:
                 min_eval = eval
                 best_move = move
             beta = min(beta, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
                 break
         return min_eval, best_move
 
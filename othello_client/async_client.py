@@ -0,0 +1,221 @@
+"""
+Cliente HTTP asíncrono (asyncio, solo librería estándar) para el torneo.
+
+Mantiene una conexión keep-alive en lugar de abrir una conexión TCP nueva
+en cada request, y mide el tiempo de ida y vuelta de cada llamada. Un
+cliente envía un request a la vez: cuando varios jugadores corren en el
+mismo proceso (multi_player.py) cada uno usa su propio AsyncHttpClient. AdaptivePoller decide cuánto esperar entre consultas:
+consultas rápidas justo después de nuestra jugada y cada vez más
+espaciadas mientras no pasa nada.
+"""
+
+import asyncio
+import json
+import socket
+import ssl
+import time
+from urllib.parse import urlsplit
+
+
+class HttpError(ConnectionError):
+    """Respuesta HTTP que no se pudo leer"""
+
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def __repr__(self):
+        return f'<Response [{self.status_code}]>'
+
+
+class RoundTripStats:
+    """Tiempos de ida y vuelta de los requests (en segundos)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def as_dict(self):
+        mean = self.total / self.count if self.count else None
+        to_ms = lambda value: None if value is None else round(value * 1000, 2)
+        return {'requests': self.count, 'mean_ms': to_ms(mean), 'min_ms': to_ms(self.min),
+                'max_ms': to_ms(self.max), 'last_ms': to_ms(self.last)}
+
+
+class AsyncHttpClient:
+    """
+    Cliente con una conexión persistente. Los requests se envían uno a la vez
+    por la misma conexión; si el servidor la cerró, se reconecta y se
+    reintenta una vez. Con retry=False solo se reintenta si el request no
+    llegó a escribirse (para los que no se pueden repetir, como una jugada).
+    """
+
+    def __init__(self, base_url, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.secure = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.secure else 80)
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.stats = RoundTripStats()
+        self._reader = None
+        self._writer = None
+        self._sent = False
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self.secure else None
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        sock = self._writer.get_extra_info('socket')
+        if sock is not None:
+            # Los requests son pequeños: no esperar a juntar paquetes (Nagle)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._reader = None
+        self._writer = None
+
+    def _abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def post(self, path, json_body=None, retry=True):
+        """
+        POST con cuerpo JSON opcional (los parámetros pueden ir en path).
+        retry=False: si la conexión falla después de enviar el request no se
+        reintenta (el servidor pudo haberlo procesado) y el error se propaga.
+        """
+        body = json.dumps(json_body).encode() if json_body is not None else b''
+        async with self._lock:
+            start = time.perf_counter()
+            for attempt in range(2):
+                if self._writer is None:
+                    await self._connect()
+                self._sent = False
+                try:
+                    response = await asyncio.wait_for(self._send(path, body), self.timeout)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    await self.close()
+                    if attempt == 1 or (self._sent and not retry):
+                        raise
+                except BaseException:
+                    # Timeout o cancelación a mitad de un request: la conexión
+                    # queda con una respuesta pendiente y no se puede reusar
+                    self._abort()
+                    raise
+            self.stats.add(time.perf_counter() - start)
+            return response
+
+    async def _send(self, path, body):
+        request = (
+            f'POST {self.base_path}{path} HTTP/1.1\r\n'
+            f'Host: {self.host}\r\n'
+            'Connection: keep-alive\r\n'
+            'Content-Type: application/json\r\n'
+            'Accept: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            '\r\n'
+        ).encode() + body
+        self._writer.write(request)
+        await self._writer.drain()
+        self._sent = True
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise HttpError('el servidor cerró la conexión')
+        try:
+            status_code = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f'línea de estado inválida: {status_line!r}')
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            data = b''.join(chunks)
+        else:
+            data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return Response(status_code, data)
+
+
+_clients = {}
+
+
+def get_client(base_url):
+    """
+    Un cliente (una conexión) por servidor, compartido por los jugadores del
+    proceso: ninguno lo cierra por su cuenta, se cierran todos juntos con
+    close_clients al terminar.
+    """
+    if base_url not in _clients:
+        _clients[base_url] = AsyncHttpClient(base_url)
+    return _clients[base_url]
+
+
+async def close_clients():
+    """Cierra los clientes de get_client (una vez, al terminar el programa)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
+
+
+class AdaptivePoller:
+    """
+    Intervalo de consulta adaptativo: fast() vuelve al intervalo mínimo
+    (después de nuestra jugada la respuesta suele llegar pronto) y cada
+    espera sin novedades lo multiplica por backoff hasta maximum.
+    """
+
+    def __init__(self, minimum=0.1, maximum=2.0, backoff=1.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.interval = minimum
+
+    def fast(self):
+        self.interval = self.minimum
+
+    async def wait(self):
+        await asyncio.sleep(self.interval)
+        self.interval = min(self.maximum, self.interval * self.backoff)
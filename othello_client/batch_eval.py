@@ -0,0 +1,200 @@
+"""
+Evaluación vectorizada de muchas hojas a la vez con NumPy.
+
+Recibe un arreglo (N, 8, 8) int8 con N tableros y retorna N puntajes en una
+sola llamada. Los términos disponibles son los mismos que usan los
+evaluadores de los motores: pesos posicionales, esquinas, diferencia de
+fichas, movilidad, fichas de frontera y movilidad potencial.
+
+NumPy es opcional: si no está instalado, numpy_available() retorna False y
+los motores siguen evaluando hoja por hoja.
+
+Cada lote tiene un costo fijo de unas 7 evaluaciones sueltas, y dentro de
+una búsqueda alfa-beta con buen orden quedan pocas hojas por nodo: por eso
+solo Fabi lo usa en la búsqueda y es opcional (decide_move2(batch=True)).
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from bitboard import SHIFTS, valid_moves
+from board_ops import do_move, undo_move
+
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
+              (0, -1),          (0, 1),
+              (1, -1),  (1, 0), (1, 1)]
+
+CORNERS = [(0, 0), (0, 7), (7, 0), (7, 7)]
+
+
+def numpy_available():
+    return np is not None
+
+
+def _bounds(delta):
+    """Rangos destino/origen para desplazar un eje delta casillas"""
+    if delta >= 0:
+        return slice(0, 8 - delta), slice(delta, 8)
+    return slice(-delta, 8), slice(0, 8 + delta)
+
+
+def _shifted(x, dr, dc):
+    """y[:, r, c] = x[:, r + dr, c + dc] (False fuera del tablero)"""
+    y = np.zeros_like(x)
+    if abs(dr) >= 8 or abs(dc) >= 8:
+        return y
+    rows_to, rows_from = _bounds(dr)
+    cols_to, cols_from = _bounds(dc)
+    y[:, rows_to, cols_to] = x[:, rows_from, cols_from]
+    return y
+
+
+def pack_bits(mask):
+    """(N, 8, 8) bool -> N bitboards uint64 con la misma numeración que bitboard.py"""
+    packed = np.packbits(mask.reshape(len(mask), 64), axis=1, bitorder='little')
+    return packed.view('<u8').reshape(len(mask))
+
+
+def popcount(bits):
+    return np.unpackbits(bits.view(np.uint8).reshape(len(bits), 8), axis=1).sum(axis=1)
+
+
+if np is not None:
+    # Mismos desplazamientos que bitboard.SHIFTS, como escalares uint64
+    _SHIFTS = [(np.uint64(abs(d)), d > 0, np.uint64(mask)) for d, mask in SHIFTS]
+
+
+def legal_moves(p, o):
+    """Bitboards (uint64) de jugadas legales de P para N posiciones a la vez"""
+    empty = ~(p | o)
+    moves = np.zeros_like(p)
+    for amount, left, mask in _SHIFTS:
+        w = o & mask
+        if left:
+            t = w & (p << amount)
+            for _ in range(5):
+                t |= w & (t << amount)
+            moves |= t << amount
+        else:
+            t = w & (p >> amount)
+            for _ in range(5):
+                t |= w & (t >> amount)
+            moves |= t >> amount
+    return moves & empty
+
+
+def mobility(boards, symbol):
+    """Número de jugadas legales de symbol en cada uno de los N tableros"""
+    p = pack_bits(boards == symbol)
+    o = pack_bits(boards == -symbol)
+    return popcount(legal_moves(p, o))
+
+
+def _adjacent_to(mask):
+    """Casillas vecinas (en las 8 direcciones) de alguna casilla de mask"""
+    result = np.zeros_like(mask)
+    for dr, dc in DIRECTIONS:
+        result |= _shifted(mask, dr, dc)
+    return result
+
+
+class BatchEvaluator:
+    """
+    Combinación lineal de términos, evaluada para N tableros a la vez.
+    Cada coeficiente en 0 desactiva su término (y su costo).
+      position_weights: matriz 8x8 (fichas propias suman, del oponente restan)
+      corner: valor de cada esquina propia (se resta por cada esquina rival)
+      coin_parity: por ficha de diferencia
+      mobility: por jugada legal de diferencia
+      frontier: por ficha de frontera de diferencia (propias menos rivales)
+      potential_mobility: por casilla vacía junto al oponente, de diferencia
+    """
+
+    def __init__(self, position_weights=None, corner=0, coin_parity=0, mobility=0,
+                 frontier=0, potential_mobility=0):
+        if np is None:
+            raise ImportError('BatchEvaluator requiere numpy (pip install numpy)')
+        self.position_weights = None
+        if position_weights is not None:
+            self.position_weights = np.asarray(position_weights, dtype=np.int32)
+        self.corner = corner
+        self.coin_parity = coin_parity
+        self.mobility = mobility
+        self.frontier = frontier
+        self.potential_mobility = potential_mobility
+        self._corner_rows = np.array([r for r, _ in CORNERS])
+        self._corner_cols = np.array([c for _, c in CORNERS])
+
+    def __call__(self, boards, my_symbol):
+        """boards: arreglo (N, 8, 8) int8. Retorna un arreglo de N puntajes"""
+        boards = np.asarray(boards, dtype=np.int8)
+        # Tablero relativo: +1 fichas propias, -1 del oponente
+        relative = boards.astype(np.int32) * my_symbol
+        scores = np.zeros(len(boards), dtype=np.float64)
+
+        if self.position_weights is not None:
+            scores += np.einsum('nrc,rc->n', relative, self.position_weights)
+
+        if self.corner:
+            scores += self.corner * relative[:, self._corner_rows, self._corner_cols].sum(axis=1)
+
+        if self.coin_parity:
+            scores += self.coin_parity * relative.sum(axis=(1, 2))
+
+        if self.mobility:
+            p = pack_bits(relative == 1)
+            o = pack_bits(relative == -1)
+            my_moves = popcount(legal_moves(p, o)).astype(np.int64)
+            opp_moves = popcount(legal_moves(o, p)).astype(np.int64)
+            scores += self.mobility * (my_moves - opp_moves)
+
+        if self.frontier or self.potential_mobility:
+            empty = boards == 0
+            mine = relative == 1
+            theirs = relative == -1
+            if self.frontier:
+                near_empty = _adjacent_to(empty)
+                scores += self.frontier * ((mine & near_empty).sum(axis=(1, 2)) -
+                                           (theirs & near_empty).sum(axis=(1, 2)))
+            if self.potential_mobility:
+                scores += self.potential_mobility * ((empty & _adjacent_to(theirs)).sum(axis=(1, 2)) -
+                                                     (empty & _adjacent_to(mine)).sum(axis=(1, 2)))
+
+        return scores
+
+
+def evaluate_two_plies(board, moves, symbol, my_symbol, evaluator, undo, stats=None):
+    """
+    Valor minimax exacto de cada hijo de un nodo a profundidad 2.
+    Juega cada jugada de moves para symbol y todas las respuestas del
+    oponente, junta los nietos (hojas) en un solo lote y los evalúa de una
+    vez. Un hijo sin respuestas se evalúa como hoja, igual que en minimax.
+    Retorna los valores (desde my_symbol) en el orden de moves.
+    stats (SearchStats, opcional) cuenta los nietos como nodos y las hojas.
+    """
+    leaves = []
+    groups = []
+    for move in moves:
+        flips = do_move(board, move, symbol, undo)
+        replies = valid_moves(board, -symbol)
+        start = len(leaves)
+        if replies:
+            for reply in replies:
+                reply_flips = do_move(board, reply, -symbol, undo)
+                leaves.append([row[:] for row in board])
+                undo_move(board, reply, -symbol, reply_flips, undo)
+        else:
+            leaves.append([row[:] for row in board])
+        groups.append((start, len(leaves), bool(replies)))
+        undo_move(board, move, symbol, flips, undo)
+
+    if stats is not None:
+        stats.nodes += sum(end - start for start, end, has_replies in groups if has_replies)
+        stats.leaves += len(leaves)
+    scores = evaluator(np.array(leaves, dtype=np.int8), my_symbol).tolist()
+    # Las respuestas son del oponente de symbol: minimiza si symbol es my_symbol
+    pick = min if symbol == my_symbol else max
+    return [pick(scores[start:end]) if has_replies else scores[start]
+            for start, end, has_replies in groups]
@@ -0,0 +1,229 @@
+"""
+Perft y nodos por segundo de los cuatro motores.
+
+perft(d) cuenta las hojas del árbol de jugadas legales a profundidad d (un
+paso de turno cuenta como jugada; un juego terminado cuenta como hoja). Los
+valores desde la posición inicial se comparan con los conocidos; en las
+demás posiciones cada motor se compara con la versión en bitboards.
+
+Además mide, en posiciones de todas las fases del juego, cuántas llamadas
+por segundo hace cada motor de generación de jugadas, apply_move y cada
+evaluación. Las evaluaciones se miden sin caché (compute_evaluation_enhanced
+y no evaluate_board_enhanced, que pasa por la EvalCache de Majos): con unas
+pocas posiciones repetidas la caché solo mediría aciertos. El resultado
+sale en JSON para poder comparar entre commits.
+
+Uso:
+    python benchmark.py --depth 6 --position-depth 3 --seconds 1 --out bench.json
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from bitboard import board_to_bitboards, get_moves, iter_squares, make_move, valid_moves
+from board_ops import do_move
+
+# Perft conocido desde la posición inicial (profundidad 1..9)
+PERFT_START = [4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288]
+
+# Posiciones de prueba: jugadas al azar (semilla fija) hasta estas fichas
+BENCH_DISCS = [8, 20, 32, 44, 56]
+BENCH_SEED = 2024
+
+
+def initial_board():
+    board = [[0] * 8 for _ in range(8)]
+    board[3][3] = 1
+    board[3][4] = -1
+    board[4][3] = -1
+    board[4][4] = 1
+    return board
+
+
+def random_position(discs, seed=BENCH_SEED):
+    """Partida al azar hasta tener discs fichas. Retorna (tablero, turno)"""
+    rng = random.Random(seed * 100 + discs)
+    while True:
+        board = initial_board()
+        symbol = -1
+        passes = 0
+        while sum(cell != 0 for row in board for cell in row) < discs and passes < 2:
+            moves = valid_moves(board, symbol)
+            if moves:
+                do_move(board, rng.choice(moves), symbol, [])
+                passes = 0
+            else:
+                passes += 1
+            symbol = -symbol
+        if passes < 2 and valid_moves(board, symbol):
+            return board, symbol
+
+
+def bench_positions():
+    positions = [('start', initial_board(), -1)]
+    for discs in BENCH_DISCS:
+        board, symbol = random_position(discs)
+        positions.append((f'{discs} discs', board, symbol))
+    return positions
+
+
+def perft_bitboard(p, o, depth, passed=False):
+    if depth == 0:
+        return 1
+    moves = get_moves(p, o)
+    if not moves:
+        if passed:
+            return 1
+        return perft_bitboard(o, p, depth - 1, True)
+    if depth == 1:
+        return bin(moves).count('1')
+    return sum(perft_bitboard(*make_move(p, o, sq), depth - 1) for sq in iter_squares(moves))
+
+
+def perft_board(get_moves_fn, apply_fn, board, symbol, depth, passed=False):
+    """Perft con las funciones de lista de un motor (sin atajo en depth 1)"""
+    if depth == 0:
+        return 1
+    moves = get_moves_fn(board, symbol)
+    if not moves:
+        if passed:
+            return 1
+        return perft_board(get_moves_fn, apply_fn, board, -symbol, depth - 1, True)
+    return sum(perft_board(get_moves_fn, apply_fn, apply_fn(board, move, symbol), -symbol, depth - 1)
+               for move in moves)
+
+
+def load_engines():
+    """
+    Funciones de cada motor: (get_valid_moves, apply_move, {nombre: evaluate}).
+    Un motor que no se puede importar (por ejemplo sin requests) queda con
+    su error en lugar de funciones. Solo evaluaciones sin caché.
+    """
+    engines = {}
+    for name in ('Fabi_player', 'diego_player', 'Majos_Player'):
+        try:
+            module = importlib.import_module(name)
+        except ImportError as error:
+            engines[name] = repr(error)
+            continue
+        evaluators = {function: getattr(module, function)
+                      for function in ('evaluate_board', 'compute_evaluation_enhanced', 'evaluate_board_pattern')
+                      if hasattr(module, function)}
+        engines[name] = (module.get_valid_moves, module.apply_move, evaluators)
+    try:
+        from othello_player import OthelloPlayer
+    except ImportError as error:
+        engines['OthelloPlayer'] = repr(error)
+    else:
+        player = OthelloPlayer('benchmark')
+        engines['OthelloPlayer'] = (player.get_valid_moves,
+                                    lambda board, move, symbol: player.make_move(board, move[0], move[1], symbol),
+                                    {'evaluate_board': player.evaluate_board})
+    return engines
+
+
+def rate(function, args_list, seconds):
+    """Llamadas por segundo de function recorriendo args_list en ciclo"""
+    calls = 0
+    start = time.perf_counter()
+    end = start + seconds
+    while True:
+        for args in args_list:
+            function(*args)
+        calls += len(args_list)
+        now = time.perf_counter()
+        if now >= end:
+            return calls / (now - start)
+
+
+def run_perft(engines, depth, position_depth):
+    """depth para la posición inicial, position_depth para las demás"""
+    results = []
+    ok = True
+    for name, board, symbol in bench_positions():
+        for d in range(1, (depth if name == 'start' else position_depth) + 1):
+            p, o = board_to_bitboards(board, symbol)
+            start = time.perf_counter()
+            reference = perft_bitboard(p, o, d)
+            elapsed = time.perf_counter() - start
+            entry = {'position': name, 'depth': d, 'leaves': reference,
+                     'bitboard_nps': round(reference / elapsed) if elapsed else None}
+            if name == 'start' and d <= len(PERFT_START):
+                entry['expected'] = PERFT_START[d - 1]
+                ok &= reference == PERFT_START[d - 1]
+            for engine, functions in engines.items():
+                if isinstance(functions, str):
+                    continue
+                get_moves_fn, apply_fn, _ = functions
+                start = time.perf_counter()
+                leaves = perft_board(get_moves_fn, apply_fn, board, symbol, d)
+                elapsed = time.perf_counter() - start
+                entry[engine] = {'leaves': leaves, 'nps': round(leaves / elapsed) if elapsed else None}
+                ok &= leaves == reference
+            results.append(entry)
+    return results, ok
+
+
+def run_rates(engines, seconds):
+    positions = [(board, symbol) for _, board, symbol in bench_positions()]
+    moves_per_position = [(board, valid_moves(board, symbol)[0], symbol) for board, symbol in positions]
+    results = {}
+    for engine, functions in engines.items():
+        if isinstance(functions, str):
+            results[engine] = {'error': functions}
+            continue
+        get_moves_fn, apply_fn, evaluators = functions
+        results[engine] = {
+            'get_valid_moves': round(rate(get_moves_fn, positions, seconds)),
+            'apply_move': round(rate(apply_fn, moves_per_position, seconds)),
+        }
+        for function, evaluate in evaluators.items():
+            results[engine][function] = round(rate(evaluate, positions, seconds))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perft y nodos por segundo de los motores')
+    parser.add_argument('--depth', type=int, default=6, help='profundidad de perft desde la posición inicial')
+    parser.add_argument('--position-depth', type=int, default=3, help='profundidad de perft en las demás posiciones')
+    parser.add_argument('--seconds', type=float, default=1.0, help='duración de cada medición de velocidad')
+    parser.add_argument('--out', default=None, help='archivo JSON de salida (por defecto stdout)')
+    args = parser.parse_args()
+
+    engines = load_engines()
+    perft, ok = run_perft(engines, args.depth, args.position_depth)
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'perft_ok': ok,
+        'perft': perft,
+        'calls_per_second': run_rates(engines, args.seconds),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if not ok:
+        print('perft no coincide con los valores esperados', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
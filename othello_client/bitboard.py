@@ -0,0 +1,140 @@
+"""
+Núcleo de generación de movimientos con bitboards.
+
+Una posición se representa con dos enteros de 64 bits: las fichas del jugador
+que mueve (P) y las del oponente (O). La casilla (fila, columna) corresponde
+al bit fila * 8 + columna, así que recorrer los bits de menor a mayor da el
+mismo orden que el recorrido fila por fila de get_valid_moves.
+"""
+
+FULL = 0xFFFFFFFFFFFFFFFF
+
+# Máscaras que evitan que un desplazamiento horizontal o diagonal "dé la vuelta"
+# de una fila a la siguiente
+NOT_COL_0 = 0xFEFEFEFEFEFEFEFE
+NOT_COL_7 = 0x7F7F7F7F7F7F7F7F
+INNER_COLS = NOT_COL_0 & NOT_COL_7
+
+# (desplazamiento, máscara aplicada a las fichas del oponente)
+# +1 = columna siguiente, +8 = fila siguiente
+SHIFTS = [
+    (1, INNER_COLS), (-1, INNER_COLS),
+    (8, FULL), (-8, FULL),
+    (7, INNER_COLS), (-7, INNER_COLS),
+    (9, INNER_COLS), (-9, INNER_COLS),
+]
+
+SQUARE_TO_MOVE = [(sq >> 3, sq & 7) for sq in range(64)]
+
+
+def shift(bits, d):
+    """Desplaza un bitboard d posiciones (positivo hacia casillas mayores)"""
+    if d > 0:
+        return (bits << d) & FULL
+    return bits >> -d
+
+
+def square(row, col):
+    return row * 8 + col
+
+
+def popcount(bits):
+    return bits.bit_count()
+
+
+def board_to_bitboards(board, symbol):
+    """
+    Convierte el tablero 8x8 del servidor a (P, O), donde P son las fichas
+    de symbol y O las del oponente.
+    """
+    p = 0
+    o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == symbol:
+                p |= bit
+            elif cell == -symbol:
+                o |= bit
+            bit <<= 1
+    return p, o
+
+
+def bitboards_to_board(p, o, symbol):
+    """Convierte (P, O) de vuelta al tablero 8x8 del servidor"""
+    board = [[0] * 8 for _ in range(8)]
+    for sq in range(64):
+        bit = 1 << sq
+        if p & bit:
+            board[sq >> 3][sq & 7] = symbol
+        elif o & bit:
+            board[sq >> 3][sq & 7] = -symbol
+    return board
+
+
+def get_moves(p, o):
+    """Bitboard con todas las jugadas legales del jugador P"""
+    empty = ~(p | o) & FULL
+    moves = 0
+    for d, mask in SHIFTS:
+        w = o & mask
+        t = w & shift(p, d)
+        t |= w & shift(t, d)
+        t |= w & shift(t, d)
+        t |= w & shift(t, d)
+        t |= w & shift(t, d)
+        t |= w & shift(t, d)
+        moves |= shift(t, d)
+    return moves & empty
+
+
+def get_flips(p, o, sq):
+    """Bitboard con las fichas que voltea P al jugar en la casilla sq"""
+    flips = 0
+    start = 1 << sq
+    for d, mask in SHIFTS:
+        w = o & mask
+        x = shift(start, d) & w
+        line = 0
+        while x:
+            line |= x
+            x = shift(x, d)
+            if x & p:
+                flips |= line
+                break
+            x &= w
+    return flips
+
+
+def make_move(p, o, sq):
+    """
+    Juega en sq y retorna (P, O) desde el punto de vista del jugador
+    que mueve a continuación (los roles se intercambian).
+    """
+    flips = get_flips(p, o, sq)
+    return o & ~flips, p | flips | (1 << sq)
+
+
+def iter_squares(bits):
+    """Recorre las casillas activas de un bitboard de menor a mayor"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def moves_to_list(moves):
+    """Convierte un bitboard de jugadas en la lista de tuplas (fila, columna)"""
+    return [SQUARE_TO_MOVE[sq] for sq in iter_squares(moves)]
+
+
+def valid_moves(board, symbol):
+    """Equivalente de get_valid_moves(board, symbol) sobre bitboards"""
+    p, o = board_to_bitboards(board, symbol)
+    return moves_to_list(get_moves(p, o))
+
+
+def both_moves(board, symbol):
+    """Jugadas de symbol y de su rival con una sola conversión a bitboards"""
+    p, o = board_to_bitboards(board, symbol)
+    return moves_to_list(get_moves(p, o)), moves_to_list(get_moves(o, p))
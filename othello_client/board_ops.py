@@ -0,0 +1,49 @@
+"""
+Make/unmake sobre el tablero 8x8 del servidor.
+
+En lugar de copiar el tablero en cada nodo, la búsqueda juega el movimiento
+directamente sobre el tablero, guarda las fichas volteadas en una pila de
+deshacer y las restaura al regresar. Las casillas se guardan como enteros
+fila * 8 + columna para no crear tuplas nuevas en cada nodo.
+"""
+
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
+              (0, -1),          (0, 1),
+              (1, -1),  (1, 0), (1, 1)]
+
+
+def do_move(board, move, symbol, undo):
+    """
+    Juega move para symbol modificando board.
+    Agrega las fichas volteadas a undo y retorna cuántas fueron.
+    """
+    r, c = move
+    board[r][c] = symbol
+    opponent = -symbol
+    start = len(undo)
+
+    for dr, dc in DIRECTIONS:
+        line_start = len(undo)
+        rr, cc = r + dr, c + dc
+        while 0 <= rr < 8 and 0 <= cc < 8 and board[rr][cc] == opponent:
+            undo.append(rr * 8 + cc)
+            rr += dr
+            cc += dc
+        if 0 <= rr < 8 and 0 <= cc < 8 and board[rr][cc] == symbol:
+            for i in range(line_start, len(undo)):
+                sq = undo[i]
+                board[sq >> 3][sq & 7] = symbol
+        else:
+            del undo[line_start:]
+
+    return len(undo) - start
+
+
+def undo_move(board, move, symbol, flips, undo):
+    """Revierte do_move: devuelve las fichas volteadas al oponente y vacía la casilla"""
+    opponent = -symbol
+    for _ in range(flips):
+        sq = undo.pop()
+        board[sq >> 3][sq & 7] = opponent
+    r, c = move
+    board[r][c] = 0
@@ -1,6 +1,13 @@
-import copy
 import random
 
+from bitboard import both_moves, valid_moves
+from board_ops import do_move, undo_move
+from move_ordering import MoveOrderer
+from opening_book import BOOK
+from pvs import decide_with_pvs
+from search_stats import SearchStats, finish_search
+from search_tables import SearchTables
+
 
 DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
               (0, -1),          (0, 1),
@@ -8,61 +15,119 @@ DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
 
 OPENING_MOVES = [(2, 3), (3, 2), (4, 5), (5, 4)]
 
-def decide_move2(board, my_symbol):
+def new_tables():
+    # Killers e historia vacías (search_tables.py)
+    return SearchTables(ordering=MoveOrderer())
+
+# Tablas de las funciones de decisión que no reciben otras (la historia se conserva entre jugadas)
+TABLES = new_tables()
+
+def decide_move2(board, my_symbol, return_stats=False, tables=None):
+    # tables (SearchTables) reemplaza a TABLES
+    stats = SearchStats('diego')
+    ordering = (tables or TABLES).ordering
+    # Primero el libro de aperturas; si la posición no está, se busca
+    book_move = BOOK.lookup(board, my_symbol)
+    if book_move is not None:
+        return finish_search(book_move, stats, return_stats, 'book')
+    
     if is_initial_board(board):
         valid_opening = [move for move in OPENING_MOVES if is_valid_move(board, move[0], move[1], my_symbol)]
         if valid_opening:
-            return random.choice(valid_opening)
+            return finish_search(random.choice(valid_opening), stats, return_stats, 'opening')
     
-    _, best_move = minimax(board, depth=3, maximizing_player=True, my_symbol=my_symbol, alpha=float('-inf'), beta=float('inf'))
+    search_board = [row[:] for row in board]
+    ordering.new_search()
+    ordering.start_iteration(3)
+    _, best_move = minimax(search_board, depth=3, maximizing_player=True, my_symbol=my_symbol, alpha=float('-inf'), beta=float('inf'),
+                           stats=stats, ordering=ordering)
+    stats.completed_iteration(3)
     
     if best_move is None:
         valid_moves = get_valid_moves(board, my_symbol)
         if valid_moves:
-            return valid_moves[0]  
+            return finish_search(valid_moves[0], stats, return_stats)
         else:
-            return None 
+            return finish_search(None, stats, return_stats)
     
-    return best_move
+    return finish_search(best_move, stats, return_stats)
 
-def minimax(board, depth, maximizing_player, my_symbol, alpha, beta):
-    opponent = -my_symbol
+def decide_move_pvs(board, my_symbol, depth=3, return_stats=False, tables=None):
+    # Misma profundidad que decide_move2, con negamax PVS y pasos de turno (pvs.py)
+    return decide_with_pvs('diego_pvs', board, my_symbol, evaluate_board, max_depth=depth,
+                           ordering=(tables or TABLES).ordering,
+                           return_stats=return_stats)
 
-    if depth == 0 or game_over(board):
+def minimax(board, depth, maximizing_player, my_symbol, alpha, beta, undo=None, stats=None, ordering=None):
+    opponent = -my_symbol
+    if undo is None:
+        undo = []
+    if stats is not None:
+        stats.nodes += 1
+
+    if depth == 0:
+        if stats is not None:
+            return stats.evaluate(evaluate_board, board, my_symbol), None
         return evaluate_board(board, my_symbol), None
 
-    valid_moves = get_valid_moves(board, my_symbol if maximizing_player else opponent)
+    # Una generación por nodo; las del rival solo si el que mueve no tiene jugadas
+    current_player = my_symbol if maximizing_player else opponent
+    if stats is None:
+        valid_moves = get_valid_moves(board, current_player)
+    else:
+        valid_moves = stats.movegen(get_valid_moves, board, current_player)
     if not valid_moves:
-        return evaluate_board(board, my_symbol), None
+        if stats is None:
+            other_moves = get_valid_moves(board, -current_player)
+        else:
+            other_moves = stats.movegen(get_valid_moves, board, -current_player)
+        my_moves, opp_moves = (valid_moves, other_moves) if maximizing_player else (other_moves, valid_moves)
+        if stats is not None:
+            return stats.evaluate(evaluate_board, board, my_symbol, my_moves, opp_moves), None
+        return evaluate_board(board, my_symbol, my_moves, opp_moves), None
+
+    if ordering is not None:
+        ordering.order(valid_moves, board, current_player, depth)
 
     best_move = None
 
     if maximizing_player:
         max_eval = float('-inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, my_symbol)
-            eval, _ = minimax(new_board, depth - 1, False, my_symbol, alpha, beta)
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, my_symbol, undo)
+            eval, _ = minimax(board, depth - 1, False, my_symbol, alpha, beta, undo, stats, ordering)
+            undo_move(board, move, my_symbol, flips, undo)
             if eval > max_eval:
                 max_eval = eval
                 best_move = move
             alpha = max(alpha, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if ordering is not None:
+                    ordering.record_cutoff(move, my_symbol, depth)
                 break
         return max_eval, best_move
     else:
         min_eval = float('inf')
-        for move in valid_moves:
-            new_board = apply_move(board, move, opponent)
-            eval, _ = minimax(new_board, depth - 1, True, my_symbol, alpha, beta)
+        for index, move in enumerate(valid_moves):
+            flips = do_move(board, move, opponent, undo)
+            eval, _ = minimax(board, depth - 1, True, my_symbol, alpha, beta, undo, stats, ordering)
+            undo_move(board, move, opponent, flips, undo)
             if eval < min_eval:
                 min_eval = eval
                 best_move = move
             beta = min(beta, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if ordering is not None:
+                    ordering.record_cutoff(move, opponent, depth)
                 break
         return min_eval, best_move
 
-def evaluate_board(board, my_symbol):
+def evaluate_board(board, my_symbol, my_moves=None, opp_moves=None):
+    # my_moves/opp_moves: jugadas de cada lado si la búsqueda ya las generó
     opponent = -my_symbol
     my_score = 0
     opp_score = 0
@@ -75,8 +140,8 @@ def evaluate_board(board, my_symbol):
         elif board[r][c] == opponent:
             corner_score -= 25
 
-    my_moves = get_valid_moves(board, my_symbol)
-    opp_moves = get_valid_moves(board, opponent)
+    if my_moves is None:
+        my_moves, opp_moves = both_moves(board, my_symbol)
     mobility_score = len(my_moves) - len(opp_moves)
 
     for row in board:
@@ -90,12 +155,8 @@ def evaluate_board(board, my_symbol):
     return total_score
 
 def get_valid_moves(board, symbol):
-    valid_moves = []
-    for r in range(8):
-        for c in range(8):
-            if is_valid_move(board, r, c, symbol):
-                valid_moves.append((r, c))
-    return valid_moves
+    # Generación con bitboards (ver bitboard.py)
+    return valid_moves(board, symbol)
 
 def is_valid_move(board, row, col, symbol):
     if board[row][col] != 0:
@@ -119,25 +180,10 @@ def is_valid_move(board, row, col, symbol):
     return False
 
 def apply_move(board, move, symbol):
-    new_board = copy.deepcopy(board)
-    r, c = move
-    new_board[r][c] = symbol
-    opponent = -symbol
-
-    for dr, dc in DIRECTIONS:
-        to_flip = []
-        rr, cc = r + dr, c + dc
-        while 0 <= rr < 8 and 0 <= cc < 8:
-            if new_board[rr][cc] == opponent:
-                to_flip.append((rr, cc))
-            elif new_board[rr][cc] == symbol:
-                for fr, fc in to_flip:
-                    new_board[fr][fc] = symbol
-                break
-            else:
-                break
-            rr += dr
-            cc += dc
+    # Tablero nuevo con la jugada (copia por filas y do_move); la búsqueda
+    # juega sobre el mismo tablero con do_move/undo_move
+    new_board = [row[:] for row in board]
+    do_move(new_board, move, symbol, [])
     return new_board
 
 def is_initial_board(board):
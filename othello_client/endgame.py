@@ -0,0 +1,186 @@
+"""
+Solucionador exacto de finales sobre bitboards.
+
+Busca hasta el final de la partida con negamax alfa-beta y retorna la
+diferencia final de fichas exacta (jugador que mueve menos oponente).
+Ordenamiento:
+  - fastest-first: primero las jugadas que dejan al oponente con menos
+    respuestas (solo cuando quedan bastantes casillas vacías),
+  - paridad: se prefieren las regiones (cuadrantes) con un número impar de
+    casillas vacías,
+  - con 3 vacías o menos se usa un camino especializado que prueba las
+    casillas vacías directamente, sin generar la lista de jugadas.
+"""
+
+from bitboard import FULL, board_to_bitboards, get_flips, get_moves, iter_squares, popcount
+
+# Número de casillas vacías a partir del cual los motores resuelven el final
+ENDGAME_EMPTIES = 14
+
+# Por debajo de esta cantidad de vacías el fastest-first ya no compensa su costo
+FASTEST_FIRST_MIN_EMPTIES = 7
+
+# Cuadrantes de 4x4 del tablero, usados para la paridad de regiones
+QUADRANTS = [0x000000000F0F0F0F, 0x00000000F0F0F0F0,
+             0x0F0F0F0F00000000, 0xF0F0F0F000000000]
+
+QUADRANT_OF = [0] * 64
+for _q, _mask in enumerate(QUADRANTS):
+    for _sq in iter_squares(_mask):
+        QUADRANT_OF[_sq] = _q
+
+# Prioridad estática de casillas para desempatar (esquinas primero, X al final)
+SQUARE_PRIORITY = [
+    9, 2, 7, 6, 6, 7, 2, 9,
+    2, 0, 3, 4, 4, 3, 0, 2,
+    7, 3, 5, 5, 5, 5, 3, 7,
+    6, 4, 5, 0, 0, 5, 4, 6,
+    6, 4, 5, 0, 0, 5, 4, 6,
+    7, 3, 5, 5, 5, 5, 3, 7,
+    2, 0, 3, 4, 4, 3, 0, 2,
+    9, 2, 7, 6, 6, 7, 2, 9,
+]
+
+
+def final_score(p, o):
+    """Diferencia final; las casillas vacías se las lleva el ganador"""
+    mine = popcount(p)
+    theirs = popcount(o)
+    empties = 64 - mine - theirs
+    if mine > theirs:
+        return mine - theirs + empties
+    if mine < theirs:
+        return mine - theirs - empties
+    return 0
+
+
+class EndgameSolver:
+    """
+    Solucionador exacto. deadline (opcional) es un search_control.Deadline;
+    si se acaba el tiempo se lanza SearchTimeout.
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self.nodes = 0
+
+    def solve(self, p, o, alpha=-64, beta=64):
+        """Valor exacto de la posición (con ventana alfa-beta)"""
+        empties = 64 - popcount(p | o)
+        return self._search(p, o, alpha, beta, empties, False)
+
+    def best_move(self, p, o):
+        """Retorna (score, (fila, columna)) o (score, None) si hay que pasar"""
+        empties = 64 - popcount(p | o)
+        moves = get_moves(p, o)
+        if not moves:
+            return -self._search(o, p, -64, 64, empties, True), None
+        alpha = -65
+        best = None
+        for sq in self._ordered_moves(p, o, moves, empties):
+            flips = get_flips(p, o, sq)
+            score = -self._search(o & ~flips, p | flips | (1 << sq), -64, -alpha, empties - 1, False)
+            if score > alpha:
+                alpha = score
+                best = sq
+        return alpha, (best >> 3, best & 7)
+
+    def _tick(self):
+        self.nodes += 1
+        if self.deadline is not None:
+            self.deadline.tick()
+
+    def _search(self, p, o, alpha, beta, empties, passed):
+        self._tick()
+        if empties <= 3:
+            return self._search_last(p, o, alpha, beta, empties, passed)
+
+        moves = get_moves(p, o)
+        if not moves:
+            if passed:
+                return final_score(p, o)
+            return -self._search(o, p, -beta, -alpha, empties, True)
+
+        best = -65
+        for sq in self._ordered_moves(p, o, moves, empties):
+            flips = get_flips(p, o, sq)
+            score = -self._search(o & ~flips, p | flips | (1 << sq), -beta, -alpha, empties - 1, False)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def _search_last(self, p, o, alpha, beta, empties, passed):
+        """Camino especializado para las últimas casillas vacías"""
+        if empties == 0:
+            return final_score(p, o)
+
+        empty = ~(p | o) & FULL
+        best = -65
+        any_move = False
+        for sq in self._parity_squares(empty):
+            flips = get_flips(p, o, sq)
+            if not flips:
+                continue
+            any_move = True
+            self.nodes += 1
+            np_ = o & ~flips
+            no_ = p | flips | (1 << sq)
+            if empties == 1:
+                score = -final_score(np_, no_)
+            else:
+                score = -self._search_last(np_, no_, -beta, -alpha, empties - 1, False)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        return best
+
+        if not any_move:
+            if passed:
+                return final_score(p, o)
+            return -self._search_last(o, p, -beta, -alpha, empties, True)
+        return best
+
+    def _parity_squares(self, empty):
+        """Casillas vacías con las de regiones impares primero"""
+        odd = 0
+        for mask in QUADRANTS:
+            if popcount(empty & mask) & 1:
+                odd |= mask
+        return list(iter_squares(empty & odd)) + list(iter_squares(empty & ~odd))
+
+    def _ordered_moves(self, p, o, moves, empties):
+        odd_regions = 0
+        empty = ~(p | o) & FULL
+        for q, mask in enumerate(QUADRANTS):
+            if popcount(empty & mask) & 1:
+                odd_regions |= 1 << q
+
+        if empties < FASTEST_FIRST_MIN_EMPTIES:
+            return sorted(iter_squares(moves),
+                          key=lambda sq: (not (odd_regions >> QUADRANT_OF[sq]) & 1, -SQUARE_PRIORITY[sq]))
+
+        scored = []
+        for sq in iter_squares(moves):
+            flips = get_flips(p, o, sq)
+            np_ = p | flips | (1 << sq)
+            no_ = o & ~flips
+            mobility = popcount(get_moves(no_, np_))
+            parity = 0 if (odd_regions >> QUADRANT_OF[sq]) & 1 else 1
+            scored.append((mobility, parity, -SQUARE_PRIORITY[sq], sq))
+        scored.sort()
+        return [entry[3] for entry in scored]
+
+
+def solve_board(board, symbol, deadline=None):
+    """
+    Resuelve el final para symbol sobre el tablero 8x8 del servidor.
+    Retorna (diferencia final exacta, jugada) o lanza SearchTimeout.
+    """
+    p, o = board_to_bitboards(board, symbol)
+    return EndgameSolver(deadline).best_move(p, o)
@@ -0,0 +1,185 @@
+"""
+Estado del motor durante una partida.
+
+El servidor solo manda el tablero. EngineSession recuerda el tablero que
+quedó después de nuestra jugada y, cuando vuelve a ser nuestro turno,
+deduce la respuesta del rival comparando los dos tableros: las casillas
+nuevas del rival que, jugadas sobre nuestro tablero, dan exactamente el
+tablero recibido (ninguna si pasó, varias si el servidor nos saltó por no
+tener jugadas). Con eso lleva la lista de jugadas de la partida y la
+variante principal de la búsqueda anterior (stats.pv): si el rival jugó lo
+que esperábamos, el resto de la PV es la línea prevista y su primera
+jugada es la respuesta que conviene pensar primero (ponder.py); también
+cuenta cuántas respuestas se predijeron. La PV no se le pasa al motor: cada
+decide busca sobre el tablero recibido, sin la línea prevista.
+
+Lo único del motor que pasa de un turno a otro son sus tablas (tabla de
+transposición, killers e historia, search_tables.py), que se conservan
+entre turnos y se vacían al empezar la sesión, así una partida no hereda
+entradas de la anterior. Si un tablero no se puede explicar con jugadas
+del rival (turno perdido, otra partida) la sesión se resincroniza; si varias
+jugadas seguidas del rival lo explican en más de un orden, también se
+resincroniza (y se cuenta en ambiguous) en lugar de registrar un orden
+adivinado.
+"""
+
+import itertools
+
+from bitboard import valid_moves
+from board_ops import do_move
+
+# Jugadas seguidas del rival (nosotros sin jugadas) que se intentan deducir
+MAX_REPLIES = 3
+
+
+class EngineSession:
+    """
+    decide(board, symbol, return_stats=True) retorna (jugada, SearchStats),
+    por ejemplo un engines.Engine. reset es lo que vacía el estado del motor
+    (Engine.reset); se llama al crear la sesión.
+    """
+
+    def __init__(self, decide, my_symbol, match_id=None, reset=None):
+        self.decide_function = decide
+        self.my_symbol = my_symbol
+        self.match_id = match_id
+        # Tablero después de nuestra última jugada (None antes de jugar)
+        self.board = None
+        # Primer tablero de la partida registrada (en nuestro turno) y las
+        # jugadas desde ahí: (símbolo, jugada), jugada None es un pase
+        self.start_board = None
+        self.moves = []
+        # SearchStats de cada una de nuestras jugadas (None si no hay)
+        self.own_stats = []
+        # Línea esperada desde self.board: empieza con la respuesta del rival
+        self.pv = []
+        self.stats = None
+        self.replies = 0
+        self.predicted = 0
+        self.resyncs = 0
+        self.ambiguous = 0
+        # (tablero, resultado) del último observe sin jugada nuestra después:
+        # volver a consultar el mismo turno no es una respuesta nueva
+        self._observed = None
+        if reset is not None:
+            reset()
+
+    def expected_reply(self):
+        """Respuesta del rival según la última PV, o None"""
+        return self.pv[0] if self.pv else None
+
+    def observe(self, board):
+        """
+        Deduce la jugada del rival que lleva de self.board a board (o varias
+        seguidas si no teníamos jugadas). Retorna la última, None si pasó o
+        False si no se pudo deducir. Observar otra vez el mismo tablero antes
+        de record (la jugada no se confirmó) retorna lo mismo sin cambiar nada.
+        """
+        if self._observed is not None and self._observed[0] == board:
+            return self._observed[1]
+        result = self._observe(board)
+        self._observed = [row[:] for row in board], result
+        return result
+
+    def _observe(self, board):
+        if self.board is None:
+            self.start_board = [row[:] for row in board]
+            return False
+        opponent = -self.my_symbol
+        placed = [(r, c) for r in range(8) for c in range(8) if self.board[r][c] == 0 and board[r][c] != 0]
+        orders = []
+        if len(placed) <= MAX_REPLIES and all(board[r][c] == opponent for r, c in placed):
+            orders = self._replay(board, placed)
+        if len(orders) != 1:
+            # La partida registrada vuelve a empezar desde este tablero
+            if orders:
+                self.ambiguous += 1
+            else:
+                self.resyncs += 1
+            self.pv = []
+            self.start_board = [row[:] for row in board]
+            self.moves = []
+            self.own_stats = []
+            return False
+
+        replies = orders[0]
+        self.replies += 1
+        self.board = [row[:] for row in board]
+        if not replies:
+            self.moves.append((opponent, None))
+            self.pv = []
+            return None
+        for index, reply in enumerate(replies):
+            if index:
+                # El servidor nos saltó: no teníamos jugadas
+                self.moves.append((self.my_symbol, None))
+                self.own_stats.append(None)
+            self.moves.append((opponent, reply))
+        if len(replies) == 1 and replies[0] == self.expected_reply():
+            self.predicted += 1
+            self.pv = self.pv[1:]
+        else:
+            self.pv = []
+        return replies[-1]
+
+    def _replay(self, board, placed):
+        """Órdenes de las jugadas del rival en placed que llevan a board (lista de listas)"""
+        orders = []
+        for order in itertools.permutations(placed):
+            current = [row[:] for row in self.board]
+            for index, move in enumerate(order):
+                if index and valid_moves(current, self.my_symbol):
+                    break
+                if do_move(current, move, -self.my_symbol, []) == 0:
+                    break
+            else:
+                if current == board:
+                    orders.append(list(order))
+        return orders
+
+    def decide(self, board, return_stats=False):
+        """Jugada para board; actualiza la partida con la respuesta del rival y nuestra jugada"""
+        self.observe(board)
+        move, stats = self.decide_function(board, self.my_symbol, return_stats=True)
+        self.record(board, move, stats)
+        return (move, stats) if return_stats else move
+
+    def record(self, board, move, stats=None):
+        """Nuestra jugada move en board (None o una casilla ocupada no cambian el tablero)"""
+        self.stats = stats
+        self._observed = None
+        self.own_stats.append(stats)
+        self.board = [row[:] for row in board]
+        if move is None or board[move[0]][move[1]] != 0 or do_move(self.board, move, self.my_symbol, []) == 0:
+            self.board = [row[:] for row in board]
+            self.moves.append((self.my_symbol, None))
+            self.pv = []
+            return
+        self.moves.append((self.my_symbol, tuple(move)))
+        pv = [tuple(m) for m in getattr(stats, 'pv', None) or ()]
+        self.pv = pv[1:] if pv and pv[0] == tuple(move) else []
+
+    def finish(self, board):
+        """Tablero final: registra las últimas jugadas del rival, si las hubo"""
+        if self.board is None or board == self.board:
+            return
+        saved = self.start_board, self.moves, self.own_stats, self.resyncs, self.ambiguous
+        if self.observe(board) is False:
+            # Sin esas jugadas, pero la partida registrada hasta la nuestra sigue valiendo
+            self.start_board, self.moves, self.own_stats, self.resyncs, self.ambiguous = saved
+
+    def prediction_rate(self):
+        return self.predicted / self.replies if self.replies else None
+
+    def as_dict(self):
+        rate = self.prediction_rate()
+        return {
+            'match_id': self.match_id,
+            'symbol': self.my_symbol,
+            'moves': len(self.moves),
+            'replies': self.replies,
+            'predicted': self.predicted,
+            'prediction_rate': None if rate is None else round(rate, 4),
+            'resyncs': self.resyncs,
+            'ambiguous': self.ambiguous,
+        }
@@ -0,0 +1,188 @@
+"""
+Registro de motores.
+
+Cada motor se elige por nombre (othello_player.py, newOthello_player.py y
+selfplay.py aceptan --engine) y su módulo se importa recién cuando se
+carga, así que elegir un motor no obliga a importar los demás. Los
+parámetros de la función del motor se pasan como nombre=valor:
+    python othello_player.py sesion usuario --engine fabi_pvs --param time_limit=2 --param confidence=None
+
+warm_up deja el motor listo antes de la primera jugada: importa el módulo
+(claves Zobrist, pesos de patrones, parámetros de ProbCut), lee las páginas
+del libro de aperturas y hace una búsqueda corta, así el primer turno de
+una partida no paga esos costos.
+"""
+
+import ast
+import contextlib
+import importlib
+import inspect
+import io
+import random
+import sys
+import time
+
+from bitboard import valid_moves
+from board_ops import do_move
+
+# Motor: (módulo, función, recibe time_limit)
+ENGINES = {
+    'fabi': ('Fabi_player', 'decide_move2', True),
+    'fabi_pvs': ('Fabi_player', 'decide_move_pvs', True),
+    'majos': ('Majos_Player', 'decide_move_enhanced', True),
+    'majos_pvs': ('Majos_Player', 'decide_move_pvs', True),
+    'majos_pattern': ('Majos_Player', 'decide_move_pattern', True),
+    'majos_classic': ('Majos_Player', 'decide_move2', False),
+    'diego': ('diego_player', 'decide_move2', False),
+    'diego_pvs': ('diego_player', 'decide_move_pvs', False),
+    'othello_player': ('othello_player', 'AI_MOVE', True),
+}
+
+DEFAULT_ENGINE = 'fabi'
+
+# Tiempo de la búsqueda de calentamiento (segundos) y jugadas al azar para
+# llegar a una posición fuera del libro
+WARM_UP_TIME = 0.3
+WARM_UP_PLIES = 20
+
+
+class Engine:
+    """
+    Función de decisión de un motor con sus parámetros fijos.
+    engine(board, symbol) retorna la jugada; time_limit y stop solo se
+    pasan si la función los acepta. Por defecto usa las tablas del módulo
+    (TABLES, search_tables.py), compartidas con los otros Engine del mismo
+    módulo; isolate() le da tablas propias. Cada llamada toma el lock de
+    esas tablas: dos hilos (pondering y turno) no buscan sobre ellas a la vez.
+    """
+
+    def __init__(self, name, function, params=None):
+        self.name = name
+        self.function = function
+        self.params = dict(params or {})
+        accepted = inspect.signature(function).parameters
+        for key in self.params:
+            if key not in accepted:
+                raise ValueError(f'el motor {name} no acepta el parámetro {key}')
+        self.timed = ENGINES[name][2]
+        self.cancelable = 'stop' in accepted
+        self.module = sys.modules.get(getattr(function, '__module__', None))
+        self.accepts_tables = 'tables' in accepted
+        self.tables = None
+
+    def isolate(self):
+        """
+        Tablas propias, vacías (new_tables() del módulo), que se pasan a la
+        función en cada llamada: dos motores del mismo módulo en un proceso
+        (selfplay.py) no comparten transposiciones, killers ni historia.
+        """
+        if self.accepts_tables:
+            self.tables = self.module.new_tables()
+
+    def __call__(self, board, symbol, time_limit=None, stop=None, return_stats=False):
+        kwargs = dict(self.params)
+        if self.tables is not None:
+            kwargs['tables'] = self.tables
+        if time_limit is not None and self.timed:
+            kwargs['time_limit'] = time_limit
+        if stop is not None and self.cancelable:
+            kwargs['stop'] = stop
+        if return_stats:
+            kwargs['return_stats'] = True
+        tables = self.active_tables()
+        if tables is None:
+            return self.function(board, symbol, **kwargs)
+        with tables.lock:
+            return self.function(board, symbol, **kwargs)
+
+    def active_tables(self):
+        """SearchTables que usa la búsqueda: las propias o las del módulo (None si no tiene)"""
+        return self.tables if self.tables is not None else getattr(self.module, 'TABLES', None)
+
+    def reset(self):
+        """Vacía las tablas del motor (engine_session.py, selfplay.py)"""
+        tables = self.active_tables()
+        if tables is not None:
+            with tables.lock:
+                tables.clear()
+
+    def __repr__(self):
+        params = ', '.join(f'{key}={value!r}' for key, value in self.params.items())
+        return f'Engine({self.name}{", " + params if params else ""})'
+
+
+def _othello_player_function():
+    from othello_player import OthelloPlayer
+    player = OthelloPlayer('engine')
+
+    def ai_move(board, symbol, time_limit=None, return_stats=False):
+        player.current_symbol = symbol
+        return player.AI_MOVE(board, return_stats, time_limit)
+    return ai_move
+
+
+def load_engine(name, **params):
+    """Importa el módulo del motor y retorna su Engine"""
+    if name not in ENGINES:
+        raise ValueError(f'motor desconocido: {name} (opciones: {", ".join(sorted(ENGINES))})')
+    module_name, function_name, _ = ENGINES[name]
+    if name == 'othello_player':
+        function = _othello_player_function()
+    else:
+        function = getattr(importlib.import_module(module_name), function_name)
+    return Engine(name, function, params)
+
+
+def parse_params(items):
+    """['time_limit=2', 'confidence=None'] -> {'time_limit': 2, 'confidence': None}"""
+    params = {}
+    for item in items or ():
+        key, sep, value = item.partition('=')
+        if not sep or not key:
+            raise ValueError(f'parámetro inválido: {item} (se espera nombre=valor)')
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return params
+
+
+def add_engine_arguments(parser, default=DEFAULT_ENGINE):
+    """Opciones --engine y --param para el argparse de un cliente"""
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=default)
+    parser.add_argument('--param', action='append', default=[], metavar='NOMBRE=VALOR',
+                        help='parámetro de la función del motor (se puede repetir)')
+    parser.add_argument('--no-warm-up', dest='warm_up', action='store_false',
+                        help='no calentar el motor antes de conectarse')
+
+
+def warm_up_position(seed=0):
+    """Tablero de medio juego (fuera del libro) y el símbolo que mueve"""
+    rng = random.Random(seed)
+    board = [[0] * 8 for _ in range(8)]
+    board[3][3] = 1
+    board[3][4] = -1
+    board[4][3] = -1
+    board[4][4] = 1
+    symbol = -1
+    for _ in range(WARM_UP_PLIES):
+        legal = valid_moves(board, symbol)
+        if not legal:
+            symbol = -symbol
+            legal = valid_moves(board, symbol)
+            if not legal:
+                break
+        do_move(board, rng.choice(legal), symbol, [])
+        symbol = -symbol
+    return board, symbol
+
+
+def warm_up(engine, time_limit=WARM_UP_TIME):
+    """Calienta el libro de aperturas y el motor. Retorna los segundos que tomó."""
+    from opening_book import BOOK
+    start = time.perf_counter()
+    BOOK.warm_up()
+    board, symbol = warm_up_position()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine(board, symbol, time_limit=time_limit)
+    return time.perf_counter() - start
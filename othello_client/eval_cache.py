@@ -0,0 +1,93 @@
+"""
+Caché de evaluaciones con desalojo LRU.
+
+Guarda el valor de evaluación de cada posición ya vista, con la clave
+Zobrist del tablero y la perspectiva (mismo hash que la tabla de
+transposición). Sirve cuando la misma hoja vuelve por una transposición o
+en la búsqueda de la jugada siguiente: la caché vive en el módulo del motor,
+así que se conserva entre jugadas de la misma partida. Como la evaluación
+solo depende del tablero, no hace falta vaciarla entre partidas; el límite
+de entradas acota la memoria.
+"""
+
+from collections import OrderedDict
+
+from transposition import PERSPECTIVE_KEY, hash_board
+
+# Entradas por defecto (cada una ocupa unos 150 bytes)
+EVAL_CACHE_ENTRIES = 200000
+
+
+def position_key(board, my_symbol):
+    """Clave de búsqueda (search_key) del tablero sin el bit de turno"""
+    key = hash_board(board)
+    if my_symbol == -1:
+        key ^= PERSPECTIVE_KEY
+    return key
+
+
+class EvalCache:
+    """Diccionario clave -> evaluación con a lo sumo max_entries entradas"""
+
+    def __init__(self, max_entries=EVAL_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Evaluación guardada o None; un acierto pasa la entrada al final (más reciente)"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def evaluate(self, function, board, my_symbol, key=None, *args):
+        """
+        function(board, my_symbol, *args) pasando por la caché. key es
+        position_key del tablero si la búsqueda ya la tiene (se ahorra
+        recalcular el hash); args solo se usan si hay que evaluar.
+        """
+        if key is None:
+            key = position_key(board, my_symbol)
+        value = self.get(key)
+        if value is None:
+            value = function(board, my_symbol, *args)
+            self.put(key, value)
+        return value
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        rate = self.hit_rate()
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': None if rate is None else round(rate, 4),
+        }
@@ -0,0 +1,313 @@
+"""
+Registro binario de las partidas jugadas.
+
+Cada partida terminada se guarda como un registro de tamaño fijo
+(RECORD.size bytes): tablero inicial como dos bitboards, una jugada por
+byte (casilla fila * 8 + columna, PASS para un pase), resultado, colores y,
+para cada una de nuestras jugadas, tiempo, profundidad, nodos y origen de
+la decisión (búsqueda, libro, final exacto, ponder...).
+
+Los registros se agregan a archivos segmentados (games-00000.ogl, ...) de a
+lo sumo SEGMENT_RECORDS registros, cada uno con su encabezado. La escritura
+pasa por un buffer que se baja al disco cada FLUSH_RECORDS partidas, cada
+FLUSH_SECONDS o al cerrar (también al salir del proceso, salvo que lo maten),
+así anotar una partida en play() cuesta un struct.pack. Un registro a medio
+escribir (el proceso murió) se descarta al leer y al volver a abrir el
+segmento.
+
+Se activa con la variable de entorno OTHELLO_GAME_LOG (directorio) o con
+--game-log en los clientes. Para leerlos:
+    python game_log.py games/ --summary
+    python game_log.py games/ > partidas.jsonl
+"""
+
+import argparse
+import atexit
+import glob
+import json
+import os
+import struct
+import time
+
+from bitboard import board_to_bitboards, bitboards_to_board
+
+MAGIC = b'OGLG'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+# Jugadas por registro (contando pases) y jugadas propias con estadísticas
+MAX_PLIES = 96
+MAX_OWN_MOVES = MAX_PLIES // 2
+
+PASS = 64
+NO_MOVE = 255
+UNKNOWN_DISCS = 255
+
+# Origen de cada jugada propia (SearchStats.source); 0 es sin estadísticas
+SOURCES = (None, 'search', 'book', 'opening', 'endgame', 'ponder', 'pass')
+
+# Bits de flags
+TRUNCATED = 1        # la partida tenía más de MAX_PLIES jugadas
+RESYNCED = 2         # la sesión perdió el hilo: el registro empieza a mitad de partida
+RESULT_UNKNOWN = 4   # sin fichas finales
+AMBIGUOUS = 8        # varias jugadas seguidas del rival admitían más de un orden: el registro empieza después
+
+RECORD = struct.Struct(f'<d16s16sbbQQBBBB{MAX_PLIES}s{MAX_OWN_MOVES}H{MAX_OWN_MOVES}s'
+                       f'{MAX_OWN_MOVES}I{MAX_OWN_MOVES}s')
+
+# Registros por segmento; el buffer se baja al disco cada FLUSH_RECORDS
+# partidas o si pasaron FLUSH_SECONDS desde la última vez
+SEGMENT_RECORDS = 4096
+FLUSH_RECORDS = 4
+FLUSH_SECONDS = 300
+
+O_BINARY = getattr(os, 'O_BINARY', 0)
+
+# Directorio de los registros (vacío: no se registra)
+GAME_LOG_DIR = os.environ.get('OTHELLO_GAME_LOG')
+
+
+def segment_path(directory, index):
+    return os.path.join(directory, f'games-{index:05d}.ogl')
+
+
+def segment_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, 'games-*.ogl')))
+
+
+def _text(value):
+    return str(value if value is not None else '').encode('utf-8')[:16]
+
+
+def encode_game(session, engine, my_discs=None, opponent_discs=None, end_time=None):
+    """Registro binario de la partida de session (engine_session.EngineSession)"""
+    my_symbol = session.my_symbol
+    start = session.start_board or [[0] * 8 for _ in range(8)]
+    black, white = board_to_bitboards(start, -1)
+    flags = TRUNCATED if len(session.moves) > MAX_PLIES else 0
+    if session.resyncs:
+        flags |= RESYNCED
+    if session.ambiguous:
+        flags |= AMBIGUOUS
+    if my_discs is None or opponent_discs is None:
+        flags |= RESULT_UNKNOWN
+        my_discs = opponent_discs = UNKNOWN_DISCS
+
+    moves = session.moves[:MAX_PLIES]
+    packed = bytes(PASS if move is None else move[0] * 8 + move[1] for _, move in moves)
+    first = moves[0][0] if moves else my_symbol
+
+    milliseconds, depths, nodes, sources = [], [], [], []
+    for stats in session.own_stats[:MAX_OWN_MOVES]:
+        if stats is None:
+            milliseconds.append(0)
+            depths.append(0)
+            nodes.append(0)
+            sources.append(0)
+            continue
+        milliseconds.append(min(0xFFFF, round(stats.elapsed * 1000)))
+        depths.append(min(0xFF, stats.depth))
+        nodes.append(min(0xFFFFFFFF, stats.nodes + stats.endgame_nodes))
+        sources.append(SOURCES.index(stats.source) if stats.source in SOURCES else 0)
+    padding = [0] * (MAX_OWN_MOVES - len(milliseconds))
+
+    return RECORD.pack(end_time if end_time is not None else time.time(), _text(engine), _text(session.match_id),
+                       my_symbol, first, black, white, min(my_discs, 0xFF), min(opponent_discs, 0xFF),
+                       len(moves), flags, packed.ljust(MAX_PLIES, bytes([NO_MOVE])),
+                       *(milliseconds + padding), bytes(depths + padding), *(nodes + padding),
+                       bytes(sources + padding))
+
+
+def decode_game(data):
+    """Diccionario con los campos de un registro"""
+    values = RECORD.unpack(data)
+    end_time, engine, match_id, my_symbol, first, black, white, my_discs, opponent_discs, plies, flags, packed = \
+        values[:12]
+    offset = 12
+    milliseconds = values[offset:offset + MAX_OWN_MOVES]
+    offset += MAX_OWN_MOVES
+    depths = values[offset]
+    nodes = values[offset + 1:offset + 1 + MAX_OWN_MOVES]
+    sources = values[offset + 1 + MAX_OWN_MOVES]
+
+    moves = []
+    symbol = first
+    own = []
+    for sq in packed[:plies]:
+        move = None if sq == PASS else (sq >> 3, sq & 7)
+        moves.append([symbol, move])
+        if symbol == my_symbol:
+            index = len(own)
+            if index < MAX_OWN_MOVES:
+                own.append({'move': move, 'seconds': milliseconds[index] / 1000, 'depth': depths[index],
+                            'nodes': nodes[index], 'source': SOURCES[sources[index]]
+                            if sources[index] < len(SOURCES) else None})
+        symbol = -symbol
+    known = not flags & RESULT_UNKNOWN
+    return {
+        'time': end_time,
+        'engine': engine.rstrip(b'\0').decode('utf-8', 'replace'),
+        'match_id': match_id.rstrip(b'\0').decode('utf-8', 'replace') or None,
+        'symbol': my_symbol,
+        'start_board': bitboards_to_board(black, white, -1),
+        'moves': moves,
+        'own_moves': own,
+        'my_discs': my_discs if known else None,
+        'opponent_discs': opponent_discs if known else None,
+        'truncated': bool(flags & TRUNCATED),
+        'resynced': bool(flags & RESYNCED),
+        'ambiguous': bool(flags & AMBIGUOUS),
+    }
+
+
+class GameLogger:
+    """
+    Junta los registros en un buffer y los agrega al último segmento del
+    directorio con una sola escritura (O_APPEND: varios clientes pueden
+    compartir el directorio). Cuando el segmento se llena sigue en otro.
+    """
+
+    def __init__(self, directory, segment_records=SEGMENT_RECORDS, flush_records=FLUSH_RECORDS,
+                 flush_seconds=FLUSH_SECONDS):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.flush_records = flush_records
+        self.flush_seconds = flush_seconds
+        self.games = 0
+        self._buffer = bytearray()
+        self._pending = 0
+        self._last_flush = time.time()
+        self._fd = None
+        os.makedirs(directory, exist_ok=True)
+        paths = segment_paths(directory)
+        self._segment = int(os.path.basename(paths[-1])[6:11]) if paths else 0
+        atexit.register(self.close)
+
+    def _open_segment(self):
+        while True:
+            path = segment_path(self.directory, self._segment)
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND | O_BINARY, 0o644)
+            except FileExistsError:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | O_BINARY)
+                size = os.fstat(fd).st_size
+                if size < HEADER.size or (size - HEADER.size) // RECORD.size >= self.segment_records:
+                    os.close(fd)
+                    self._segment += 1
+                    continue
+                # Un registro incompleto al final (el proceso murió escribiendo) se descarta
+                partial = (size - HEADER.size) % RECORD.size
+                if partial:
+                    os.ftruncate(fd, size - partial)
+            else:
+                os.write(fd, HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self._fd = fd
+            return
+
+    def _segment_room(self):
+        """Registros que todavía caben en el segmento abierto"""
+        records = (os.fstat(self._fd).st_size - HEADER.size) // RECORD.size
+        return self.segment_records - records
+
+    def write(self, record):
+        """Agrega un registro ya codificado (encode_game)"""
+        self._buffer += record
+        self._pending += 1
+        self.games += 1
+        if self._pending >= self.flush_records or time.time() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def log_game(self, session, engine, my_discs=None, opponent_discs=None):
+        self.write(encode_game(session, engine, my_discs, opponent_discs))
+
+    def flush(self):
+        """Baja el buffer al disco"""
+        self._last_flush = time.time()
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._pending = 0
+        while data:
+            if self._fd is None:
+                self._open_segment()
+            room = self._segment_room()
+            if room <= 0:
+                os.close(self._fd)
+                self._fd = None
+                self._segment += 1
+                continue
+            chunk = data[:room * RECORD.size]
+            os.write(self._fd, chunk)
+            data = data[len(chunk):]
+
+    def close(self):
+        self.flush()
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+
+
+def open_game_log(directory=None):
+    """GameLogger del directorio (o de OTHELLO_GAME_LOG); None si no hay directorio"""
+    directory = directory or GAME_LOG_DIR
+    return GameLogger(directory) if directory else None
+
+
+def read_games(directory):
+    """Recorre los registros de todos los segmentos en orden, sin cargarlos en memoria"""
+    for path in segment_paths(directory):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                # Segmento recién creado por otro proceso
+                continue
+            magic, version, record_size = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError(f'{path} no es un registro de partidas válido')
+            while True:
+                data = f.read(RECORD.size)
+                if len(data) < RECORD.size:
+                    break
+                yield decode_game(data)
+
+
+def summarize(games):
+    """Partidas, resultado y tiempo/profundidad media por jugada, por motor"""
+    engines = {}
+    for game in games:
+        total = engines.setdefault(game['engine'], {'games': 0, 'wins': 0, 'draws': 0, 'losses': 0,
+                                                    'moves': 0, 'seconds': 0.0, 'depth': 0, 'nodes': 0})
+        total['games'] += 1
+        if game['my_discs'] is not None:
+            margin = game['my_discs'] - game['opponent_discs']
+            total['wins' if margin > 0 else 'draws' if margin == 0 else 'losses'] += 1
+        for move in game['own_moves']:
+            if move['source'] is None:
+                continue
+            total['moves'] += 1
+            total['seconds'] += move['seconds']
+            total['depth'] += move['depth']
+            total['nodes'] += move['nodes']
+    for total in engines.values():
+        moves = total.pop('moves') or 1
+        total['seconds_per_move'] = round(total.pop('seconds') / moves, 4)
+        total['mean_depth'] = round(total.pop('depth') / moves, 2)
+        total['nodes_per_move'] = round(total.pop('nodes') / moves)
+    return engines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lee el registro binario de partidas')
+    parser.add_argument('directory')
+    parser.add_argument('--summary', action='store_true', help='resumen por motor en lugar de las partidas')
+    args = parser.parse_args()
+
+    if args.summary:
+        for engine, total in summarize(read_games(args.directory)).items():
+            print(f'{engine}: {total}')
+        return
+    for game in read_games(args.directory):
+        print(json.dumps(game))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,477 @@
+"""
+Servidor local que reemplaza al del curso para pruebas fuera de línea.
+
+Implementa los dos protocolos de los clientes con las reglas completas
+(pasos de turno incluidos) y varias sesiones a la vez:
+  - othello_player.py: /player/new_player, /game/game_info,
+    /player/match_info, /player/turn_to_move, /player/move (query string)
+  - newOthello_player.py: /tournament/join, /match/active, /match/status,
+    /match/move (cuerpo JSON)
+Una sesión (o torneo) empieza su ronda cuando tiene al menos dos jugadores
+y pasaron start_delay segundos sin nuevas inscripciones; cada ronda empareja
+a todos los jugadores (el impar queda en la banca) y tras rounds rondas la
+sesión termina. GET /stats retorna los contadores del servidor.
+
+Se puede agregar latencia a cada respuesta y cortar conexiones al azar.
+El modo load levanta el servidor y cientos de clientes simulados (jugadas
+al azar, mismo esquema de consultas que los clientes reales) para medir la
+latencia de extremo a extremo de las jugadas.
+
+Uso:
+    python local_server.py serve --port 8000 --latency 20 --drop-rate 0.01
+    python local_server.py load --clients 200 --protocol tournament --sessions 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from async_client import AdaptivePoller, AsyncHttpClient
+from bitboard import valid_moves
+from board_ops import do_move
+
+# Rondas por sesión y segundos sin inscripciones antes de empezar una ronda
+SESSION_ROUNDS = 3
+START_DELAY = 1.0
+
+# Intervalos de consulta de los clientes simulados (segundos)
+CLIENT_POLL_MIN = 0.05
+CLIENT_POLL_MAX = 2.0
+
+
+def initial_board():
+    board = [[0] * 8 for _ in range(8)]
+    board[3][3] = 1
+    board[3][4] = -1
+    board[4][3] = -1
+    board[4][4] = 1
+    return board
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Match:
+    """Una partida: negras (-1) empiezan; los pasos de turno son automáticos"""
+
+    def __init__(self, match_id, black, white):
+        self.match_id = match_id
+        self.players = {-1: black, 1: white}
+        self.board = initial_board()
+        self.turn = -1
+        self.finished = False
+        self.turn_started = time.perf_counter()
+        self.ended_seen = set()
+
+    def symbol_of(self, username):
+        return -1 if self.players[-1] == username else 1
+
+    def to_move(self):
+        return None if self.finished else self.players[self.turn]
+
+    def play(self, username, move):
+        """Retorna la latencia del turno (segundos) o None si la jugada no es válida"""
+        if self.finished or self.players[self.turn] != username or move not in valid_moves(self.board, self.turn):
+            return None
+        do_move(self.board, move, self.turn, [])
+        latency = time.perf_counter() - self.turn_started
+        if valid_moves(self.board, -self.turn):
+            self.turn = -self.turn
+        elif not valid_moves(self.board, self.turn):
+            self.finished = True
+        self.turn_started = time.perf_counter()
+        return latency
+
+    def discs(self):
+        return {self.players[symbol]: sum(row.count(symbol) for row in self.board) for symbol in (-1, 1)}
+
+    def winner(self):
+        black = sum(row.count(-1) for row in self.board)
+        white = sum(row.count(1) for row in self.board)
+        if black == white:
+            return 'Draw'
+        return self.players[-1] if black > white else self.players[1]
+
+
+class Session:
+    """Sesión del protocolo clásico o torneo del protocolo nuevo"""
+
+    def __init__(self, name, match_ids, rounds=SESSION_ROUNDS, start_delay=START_DELAY):
+        self.name = name
+        self.rounds = rounds
+        self.start_delay = start_delay
+        self.players = []
+        self.round = 0
+        self.matches = {}
+        self.finished = False
+        self.last_join = time.perf_counter()
+        self._match_ids = match_ids
+
+    def join(self, username):
+        if username in self.players or self.finished:
+            return False
+        self.players.append(username)
+        self.last_join = time.perf_counter()
+        return True
+
+    def in_round(self):
+        return bool(self.matches) and not all(match.finished for match in self.matches.values())
+
+    def update(self):
+        """Empieza la siguiente ronda cuando corresponde"""
+        if self.finished or self.in_round():
+            return
+        if self.round >= self.rounds:
+            self.finished = True
+            return
+        if len(self.players) < 2 or time.perf_counter() - self.last_join < self.start_delay:
+            return
+        self.round += 1
+        players = self.players[:]
+        # Rotación para que cambien rivales y colores entre rondas
+        shift = (self.round - 1) % len(players)
+        players = players[shift:] + players[:shift]
+        self.matches = {}
+        for black, white in zip(players[0::2], players[1::2]):
+            match = Match(str(next(self._match_ids)), black, white)
+            self.matches[black] = match
+            self.matches[white] = match
+
+    def match_of(self, username):
+        return self.matches.get(username)
+
+
+class GameServer:
+    """Estado de todas las sesiones; los manejadores HTTP lo usan con un lock"""
+
+    def __init__(self, rounds=SESSION_ROUNDS, start_delay=START_DELAY, latency=0.0, jitter=0.0, drop_rate=0.0,
+                 seed=None):
+        self.rounds = rounds
+        self.start_delay = start_delay
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.tournaments = {}
+        self.requests = {}
+        self.drops = 0
+        self.move_latencies = []
+        self._match_ids = itertools.count(1)
+
+    def _session(self, table, name, create=False):
+        if name not in table and create:
+            table[name] = Session(name, self._match_ids, self.rounds, self.start_delay)
+        session = table.get(name)
+        if session is not None:
+            session.update()
+        return session
+
+    def all_finished(self):
+        with self.lock:
+            sessions = list(self.sessions.values()) + list(self.tournaments.values())
+            for session in sessions:
+                session.update()
+            return bool(sessions) and all(session.finished for session in sessions)
+
+    def stats(self):
+        latencies = self.move_latencies
+        return {
+            'requests': dict(self.requests),
+            'drops': self.drops,
+            'moves': len(latencies),
+            'move_latency_ms': None if not latencies else {
+                'mean': round(statistics.mean(latencies) * 1000, 2),
+                'p50': round(percentile(latencies, 0.5) * 1000, 2),
+                'p95': round(percentile(latencies, 0.95) * 1000, 2),
+                'max': round(max(latencies) * 1000, 2),
+            },
+            'sessions': {name: {'players': len(s.players), 'round': s.round, 'finished': s.finished}
+                         for name, s in itertools.chain(self.sessions.items(), self.tournaments.items())},
+        }
+
+    def handle(self, path, query, body):
+        """Retorna (código HTTP, respuesta JSON)"""
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            if path.startswith('/player/') or path == '/game/game_info':
+                return self._classic(path, query)
+            if path.startswith('/tournament/') or path.startswith('/match/'):
+                return self._tournament(path, body or {})
+            if path == '/stats':
+                return 200, self.stats()
+            return 404, {'detail': 'Not Found'}
+
+    def _classic(self, path, query):
+        name = query.get('session_name', '')
+        player = query.get('player_name', '')
+        session = self._session(self.sessions, name, create=path == '/player/new_player')
+
+        if path == '/player/new_player':
+            if not session.join(player):
+                return 200, {'status': 409, 'message': f'Player {player} cannot join session {name}'}
+            return 200, {'status': 200, 'message': f'Player {player} joined session {name}'}
+
+        if path == '/game/game_info':
+            if session is None or session.finished:
+                return 200, {'session_status': 'finished', 'round_status': 'finished'}
+            return 200, {'session_status': 'active', 'round_status': 'ready' if session.in_round() else 'waiting'}
+
+        match = session.match_of(player) if session is not None else None
+        if path == '/player/match_info':
+            if match is None or match.finished:
+                # Sin partida en esta ronda (o ya terminó la suya): a la banca
+                status = 'bench' if session is not None and session.in_round() else 'waiting'
+                return 200, {'match_status': status}
+            return 200, {'match_status': 'active', 'symbol': match.symbol_of(player), 'match': match.match_id}
+
+        if match is None or match.match_id != query.get('match_id'):
+            return 200, {'status': 404, 'message': 'Match not found', 'game_over': True, 'turn': False,
+                         'winner': 'Unknown'}
+
+        if path == '/player/turn_to_move':
+            return 200, {'game_over': match.finished, 'turn': match.to_move() == player, 'board': match.board,
+                         'score': match.discs(), 'winner': match.winner() if match.finished else None}
+
+        if path == '/player/move':
+            try:
+                move = (int(query.get('row')), int(query.get('col')))
+            except (TypeError, ValueError):
+                move = None
+            latency = match.play(player, move)
+            if latency is None:
+                return 200, {'status': 409, 'message': 'Invalid move'}
+            self.move_latencies.append(latency)
+            return 200, {'status': 200, 'message': 'Move accepted'}
+
+        return 404, {'detail': 'Not Found'}
+
+    def _tournament(self, path, body):
+        name = body.get('tournament_name', '')
+        player = body.get('username', '')
+        session = self._session(self.tournaments, name, create=path == '/tournament/join')
+
+        if path == '/tournament/join':
+            if not session.join(player):
+                return 409, {'detail': f'Player {player} cannot join tournament {name}'}
+            return 200, {'msg': f'Player {player} joined tournament {name}'}
+
+        match = session.match_of(player) if session is not None else None
+        if path == '/match/active':
+            active = match is not None and (not match.finished or player not in match.ended_seen)
+            return 200, {'is_in_active_match': active}
+
+        if match is None or (match.finished and player in match.ended_seen):
+            return 404, {'detail': 'No active match'}
+
+        if path == '/match/status':
+            if match.finished:
+                match.ended_seen.add(player)
+                return 200, {'msg': 'Match ended', 'winner': match.winner(), 'score': match.discs()}
+            if match.to_move() != player:
+                return 409, {'detail': 'Not your turn'}
+            return 200, {'msg': 'Your turn', 'board': match.board, 'player_color': match.symbol_of(player)}
+
+        if path == '/match/move':
+            try:
+                move = (int(body.get('x')), int(body.get('y')))
+            except (TypeError, ValueError):
+                move = None
+            latency = match.play(player, move)
+            if latency is None:
+                return 409, {'detail': 'Invalid move'}
+            self.move_latencies.append(latency)
+            return 200, {'msg': 'Move accepted'}
+
+        return 404, {'detail': 'Not Found'}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        game = self.server.game
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            body = None
+
+        if game.latency or game.jitter:
+            time.sleep(max(0.0, game.latency + game.random.uniform(-game.jitter, game.jitter)))
+        if game.drop_rate and game.random.random() < game.drop_rate:
+            # Falla inyectada: se cierra la conexión sin responder
+            with game.lock:
+                game.drops += 1
+            self.close_connection = True
+            return
+
+        status, payload = game.handle(parts.path, query, body if isinstance(body, dict) else None)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host='127.0.0.1', port=0, **config):
+    """Levanta el servidor en un hilo. Retorna (httpd, game, url)"""
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    httpd.game = GameServer(**config)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, httpd.game, f'http://{host}:{httpd.server_port}'
+
+
+async def classic_client(base_url, session_name, username, rng):
+    """Cliente simulado del protocolo de othello_player.py (jugadas al azar)"""
+    client = AsyncHttpClient(base_url)
+    poller = AdaptivePoller(CLIENT_POLL_MIN, CLIENT_POLL_MAX)
+    player = f'session_name={session_name}&player_name={username}'
+
+    async def post(path):
+        while True:
+            try:
+                return (await client.post(path)).json()
+            except (ConnectionError, OSError):
+                await asyncio.sleep(0.1)
+
+    try:
+        await post(f'/player/new_player?{player}')
+        while (await post(f'/game/game_info?session_name={session_name}'))['session_status'] == 'active':
+            match_info = await post(f'/player/match_info?{player}')
+            if match_info['match_status'] != 'active':
+                await poller.wait()
+                continue
+            poller.fast()
+            match = f'{player}&match_id={match_info["match"]}'
+            turn_info = await post(f'/player/turn_to_move?{match}')
+            while not turn_info['game_over']:
+                if turn_info['turn']:
+                    row, col = rng.choice(valid_moves(turn_info['board'], match_info['symbol']))
+                    await post(f'/player/move?{match}&row={row}&col={col}')
+                    poller.fast()
+                await poller.wait()
+                turn_info = await post(f'/player/turn_to_move?{match}')
+    finally:
+        await client.close()
+
+
+async def tournament_client(base_url, tournament_name, username, rng):
+    """Cliente simulado del protocolo de newOthello_player.py (jugadas al azar)"""
+    client = AsyncHttpClient(base_url)
+    poller = AdaptivePoller(CLIENT_POLL_MIN, CLIENT_POLL_MAX)
+    player = {'username': username, 'tournament_name': tournament_name}
+
+    async def post(path, body):
+        while True:
+            try:
+                return await client.post(path, body)
+            except (ConnectionError, OSError):
+                await asyncio.sleep(0.1)
+
+    try:
+        await post('/tournament/join', player)
+        while True:
+            if not (await post('/match/active', player)).json()['is_in_active_match']:
+                await poller.wait()
+                continue
+            poller.fast()
+            while True:
+                status = await post('/match/status', player)
+                if status.status_code == 404:
+                    break
+                if status.status_code == 409:
+                    await poller.wait()
+                    continue
+                response = status.json()
+                if response['msg'] != 'Match ended':
+                    x, y = rng.choice(valid_moves(response['board'], response['player_color']))
+                    await post('/match/move', {**player, 'x': x, 'y': y})
+                    poller.fast()
+    finally:
+        await client.close()
+
+
+async def drive(base_url, game, protocol, clients, sessions, seed=0, timeout=None):
+    """
+    Juega clients clientes simulados repartidos en sessions sesiones hasta que
+    todas terminan (o timeout segundos). Retorna las estadísticas del servidor.
+    """
+    rng = random.Random(seed)
+    play = classic_client if protocol == 'classic' else tournament_client
+    tasks = [asyncio.create_task(play(base_url, f'load{index % sessions}', f'client{index}',
+                                      random.Random(rng.random())))
+             for index in range(clients)]
+    start = time.perf_counter()
+    while not game.all_finished() and (timeout is None or time.perf_counter() - start < timeout):
+        await asyncio.sleep(0.2)
+    for task in tasks:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    with game.lock:
+        stats = game.stats()
+    stats['client_errors'] = [repr(result) for result in results
+                              if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError)]
+    stats['wall_seconds'] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local de Othello para pruebas')
+    parser.add_argument('mode', choices=('serve', 'load'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rounds', type=int, default=SESSION_ROUNDS)
+    parser.add_argument('--start-delay', type=float, default=START_DELAY)
+    parser.add_argument('--latency', type=float, default=0.0, help='latencia agregada por respuesta (ms)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='variación de la latencia (ms)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='fracción de conexiones cortadas')
+    parser.add_argument('--protocol', choices=('classic', 'tournament'), default='tournament')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--sessions', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=None, help='tiempo máximo de la prueba de carga (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = dict(rounds=args.rounds, start_delay=args.start_delay, latency=args.latency / 1000,
+                  jitter=args.jitter / 1000, drop_rate=args.drop_rate, seed=args.seed)
+    if args.mode == 'serve':
+        httpd = ThreadingHTTPServer((args.host, args.port), Handler)
+        httpd.daemon_threads = True
+        httpd.game = GameServer(**config)
+        print(f'Servidor en http://{args.host}:{httpd.server_port}')
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    httpd, game, url = start_server(args.host, 0, **config)
+    stats = asyncio.run(drive(url, game, args.protocol, args.clients, args.sessions, args.seed, args.timeout))
+    httpd.shutdown()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
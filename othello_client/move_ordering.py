@@ -0,0 +1,205 @@
+"""
+Orden dinámico de jugadas para la poda alfa-beta.
+
+La jugada hash (de la tabla de transposición) ya se prueba primero en cada
+minimax. MoveOrderer agrega:
+  - jugadas killer: las dos últimas jugadas que produjeron un corte en la
+    misma distancia a la raíz (ply), probadas antes que el resto,
+  - tabla de historia por color y casilla: cada corte suma depth² a la
+    jugada que lo produjo, y las jugadas con más historia van antes,
+  - fastest-first opcional: con depth >= fastest_first_depth las jugadas se
+    ordenan por cuántas respuestas le dejan al rival (menos primero). Es más
+    caro por nodo, así que solo conviene lejos de las hojas.
+
+Uso como script: compara el número de nodos a profundidad fija con cada
+combinación, sobre las posiciones de benchmark.py.
+    python move_ordering.py --engine fabi --depth 5
+"""
+
+import argparse
+import json
+
+from bitboard import board_to_bitboards, get_flips, get_moves, popcount
+
+KILLERS_PER_PLY = 2
+MAX_PLY = 64
+
+# Profundidad restante mínima para ordenar por fastest-first en los motores
+FASTEST_FIRST_DEPTH = 4
+
+
+class MoveOrderer:
+
+    def __init__(self, killers=True, history=True, fastest_first_depth=0):
+        self.use_killers = killers
+        self.use_history = history
+        self.fastest_first_depth = fastest_first_depth
+        self.root_depth = 0
+        self.killers = [[] for _ in range(MAX_PLY)]
+        # history[0]: negras (-1), history[1]: blancas (1)
+        self.history = [[0] * 64, [0] * 64]
+
+    def new_search(self):
+        """Al empezar una jugada: se olvidan los killers y la historia pierde peso"""
+        self.killers = [[] for _ in range(MAX_PLY)]
+        for table in self.history:
+            for sq in range(64):
+                table[sq] >>= 1
+
+    def clear(self):
+        """Olvida killers e historia (al empezar otra partida)"""
+        self.killers = [[] for _ in range(MAX_PLY)]
+        self.history = [[0] * 64, [0] * 64]
+
+    def start_iteration(self, depth):
+        """Profundidad de la raíz de la iteración (para calcular el ply)"""
+        self.root_depth = depth
+
+    def order(self, moves, board, player, depth):
+        """Ordena moves (lista de (fila, columna)) en el lugar y la retorna"""
+        ply = self.root_depth - depth
+        killers = self.killers[ply] if self.use_killers and 0 <= ply < MAX_PLY else ()
+        history = self.history[player > 0]
+        use_history = self.use_history
+
+        if self.fastest_first_depth and depth >= self.fastest_first_depth:
+            p, o = board_to_bitboards(board, player)
+            replies = {}
+            for move in moves:
+                sq = move[0] * 8 + move[1]
+                flips = get_flips(p, o, sq)
+                replies[move] = popcount(get_moves(o & ~flips, p | flips | (1 << sq)))
+        else:
+            replies = None
+
+        def key(move):
+            killer = killers.index(move) if move in killers else KILLERS_PER_PLY
+            return (killer,
+                    replies[move] if replies is not None else 0,
+                    -history[move[0] * 8 + move[1]] if use_history else 0)
+
+        moves.sort(key=key)
+        return moves
+
+    def order_root(self, moves, board, player, depth, tt=None, key=None):
+        """
+        Orden de la raíz: solo fastest-first (estable, respeta el orden
+        estático de moves) y la jugada hash primero. No usa killers ni
+        historia, que dependen de la búsqueda anterior: así la búsqueda
+        serial y parallel_search.py prueban la raíz en el mismo orden.
+        """
+        if self.fastest_first_depth and depth >= self.fastest_first_depth:
+            p, o = board_to_bitboards(board, player)
+
+            def replies(move):
+                sq = move[0] * 8 + move[1]
+                flips = get_flips(p, o, sq)
+                return popcount(get_moves(o & ~flips, p | flips | (1 << sq)))
+            moves.sort(key=replies)
+        if tt is not None:
+            entry = tt.peek(key)
+            if entry is not None and entry[3] in moves:
+                moves.remove(entry[3])
+                moves.insert(0, entry[3])
+        return moves
+
+    def record_cutoff(self, move, player, depth):
+        """La jugada move produjo un corte beta a profundidad restante depth"""
+        if self.use_killers:
+            ply = self.root_depth - depth
+            if 0 <= ply < MAX_PLY:
+                killers = self.killers[ply]
+                if move in killers:
+                    killers.remove(move)
+                killers.insert(0, move)
+                del killers[KILLERS_PER_PLY:]
+        if self.use_history:
+            self.history[player > 0][move[0] * 8 + move[1]] += depth * depth
+
+
+# Combinaciones que compara el script: (tabla de transposición, orderer)
+CONFIGURATIONS = {
+    'none': (False, None),
+    'hash': (True, None),
+    'killers': (False, dict(killers=True, history=False)),
+    'history': (False, dict(killers=False, history=True)),
+    'killers+history': (False, dict(killers=True, history=True)),
+    'fastest_first': (False, dict(killers=False, history=False, fastest_first_depth=3)),
+    'hash+killers+history': (True, dict(killers=True, history=True)),
+    'all': (True, dict(killers=True, history=True, fastest_first_depth=3)),
+}
+
+
+def _engine(name):
+    if name == 'fabi':
+        from Fabi_player import minimax
+    elif name == 'majos':
+        from Majos_Player import minimax_enhanced as minimax
+    else:
+        from diego_player import minimax
+    return minimax
+
+
+def count_nodes(engine, board, symbol, depth, use_table, ordering_options):
+    """Nodos de una profundización iterativa 1..depth con la configuración dada"""
+    from search_stats import SearchStats
+    from transposition import TranspositionTable
+
+    minimax = _engine(engine)
+    # diego no tiene tabla de transposición
+    use_table = use_table and engine != 'diego'
+    stats = SearchStats(engine)
+    tt = TranspositionTable(16) if use_table else None
+    ordering = MoveOrderer(**ordering_options) if ordering_options is not None else None
+    kwargs = {'stats': stats}
+    if ordering is not None:
+        kwargs['ordering'] = ordering
+    if use_table:
+        kwargs['tt'] = tt
+    for d in range(1, depth + 1):
+        if ordering is not None:
+            ordering.start_iteration(d)
+        minimax([row[:] for row in board], d, True, symbol, float('-inf'), float('inf'), **kwargs)
+        stats.completed_iteration(d)
+    stats.finish(None)
+    return stats
+
+
+def main():
+    from benchmark import bench_positions
+
+    parser = argparse.ArgumentParser(description='Nodos a profundidad fija con cada orden de jugadas')
+    parser.add_argument('--engine', choices=('fabi', 'majos', 'diego'), default='fabi')
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='salida en JSON')
+    args = parser.parse_args()
+
+    positions = [(board, symbol) for name, board, symbol in bench_positions() if name != 'start']
+    results = {}
+    for name, (use_table, options) in CONFIGURATIONS.items():
+        if name.startswith('hash') and args.engine == 'diego':
+            continue
+        nodes = 0
+        seconds = 0.0
+        cutoffs = first = 0
+        for board, symbol in positions:
+            stats = count_nodes(args.engine, board, symbol, args.depth, use_table, options)
+            nodes += stats.nodes
+            seconds += stats.elapsed
+            cutoffs += stats.cutoffs
+            first += stats.first_move_cutoffs
+        results[name] = {'nodes': nodes, 'seconds': round(seconds, 3),
+                         'first_move_cutoff_rate': round(first / cutoffs, 4) if cutoffs else None}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    base = results['none']['nodes']
+    print(f'{args.engine}, profundidad {args.depth}, {len(positions)} posiciones')
+    for name, result in results.items():
+        print(f"  {name:20} {result['nodes']:>9} nodos ({result['nodes'] / base:6.1%})  "
+              f"{result['seconds']:7.3f}s  corte con la 1a jugada {result['first_move_cutoff_rate']}")
+
+
+if __name__ == '__main__':
+    main()
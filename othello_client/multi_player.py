@@ -0,0 +1,242 @@
+"""
+Varios jugadores en un solo proceso.
+
+Cada jugador es una corrutina que habla con el servidor por el cliente
+asíncrono (una conexión por servidor). Las búsquedas no corren en el ciclo
+de eventos: van al pool de procesos compartido (el mismo de
+parallel_search), a través de un planificador que siempre despacha primero
+la búsqueda con el plazo más cercano. Así un jugador que lleva rato
+esperando su turno en la cola no queda detrás de los que acaban de pedir.
+
+Uso:
+    python multi_player.py --sessions s1,s2 --players 8 --workers 3
+    python multi_player.py --tournaments t1 --players 4 --base-url http://localhost:3000
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import time
+from urllib.parse import urlencode
+
+from async_client import AdaptivePoller, AsyncHttpClient, get_client
+from othello_player import OthelloPlayer, host_name
+from parallel_search import PARALLEL_WORKERS, get_pool
+
+# Tiempo por jugada que se le da a cada jugador (segundos)
+MOVE_TIME_BUDGET = 5.0
+
+# Intervalos de consulta del turno (segundos)
+TURN_POLL_MIN = 0.05
+TURN_POLL_MAX = 2.0
+
+# Estado de cada proceso del pool
+_worker_players = {}
+
+
+def othello_player_move(username, symbol, board, end_time):
+    """Se ejecuta en un proceso del pool: AI_MOVE de OthelloPlayer con el tiempo que queda"""
+    if username not in _worker_players:
+        _worker_players[username] = OthelloPlayer(username)
+    player = _worker_players[username]
+    player.current_symbol = symbol
+    return player.AI_MOVE(board, time_limit=max(0.1, end_time - time.time()))
+
+
+def fabi_move(username, symbol, board, end_time):
+    """Se ejecuta en un proceso del pool: decide_move2 con el tiempo que queda"""
+    from Fabi_player import MOVE_TIME_LIMIT, decide_move2
+    time_limit = min(MOVE_TIME_LIMIT, max(0.1, end_time - time.time()))
+    return decide_move2(board, symbol, time_limit=time_limit)
+
+
+class TurnDeadline:
+    """
+    Plazo de la jugada contado desde que se vio el turno por primera vez.
+    Si se vuelve a pedir la jugada del mismo tablero (la jugada no se aceptó
+    o se cortó la conexión) se conserva el plazo en lugar de empezar otro.
+    """
+
+    def __init__(self, move_time=MOVE_TIME_BUDGET):
+        self.move_time = move_time
+        self._board = None
+        self._deadline = None
+
+    def get(self, board):
+        if board != self._board:
+            self._board = [row[:] for row in board]
+            self._deadline = time.time() + self.move_time
+        return self._deadline
+
+
+class SearchScheduler:
+    """
+    Cola de búsquedas ordenada por plazo. Nunca hay más búsquedas en el pool
+    que procesos, así la cola (y no el pool) decide quién va primero.
+    """
+
+    def __init__(self, workers=PARALLEL_WORKERS):
+        self.workers = workers
+        self.pool = get_pool(workers)
+        self.running = 0
+        self.completed = 0
+        self.missed_deadlines = 0
+        self._queue = []
+        self._order = itertools.count()
+
+    async def search(self, search, username, symbol, board, deadline):
+        """deadline es la hora límite (time.time()) para tener la jugada"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (deadline, next(self._order), future, search, (username, symbol, board, deadline)))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self.running < self.workers and self._queue:
+            deadline, _, future, search, args = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self.running += 1
+            task = loop.run_in_executor(self.pool, search, *args)
+            task.add_done_callback(lambda task, future=future, deadline=deadline: self._finished(task, future, deadline))
+
+    def _finished(self, task, future, deadline):
+        self.running -= 1
+        self.completed += 1
+        if time.time() > deadline:
+            self.missed_deadlines += 1
+        if not future.cancelled():
+            if task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._dispatch()
+
+
+async def play_session(player, session_name, scheduler, base_url=host_name, move_time=MOVE_TIME_BUDGET,
+                       client=None):
+    """
+    Mismo protocolo que OthelloPlayer.connect y OthelloPlayer.play, sin
+    bloquear: las jugadas se piden al planificador. client (AsyncHttpClient)
+    es la conexión propia del jugador; por defecto la de get_client(base_url).
+    """
+    if client is None:
+        client = get_client(base_url)
+    poller = AdaptivePoller(TURN_POLL_MIN, TURN_POLL_MAX)
+    player_query = {'session_name': session_name, 'player_name': player.username}
+    turn_deadline = TurnDeadline(move_time)
+
+    async def post(path, **params):
+        response = await client.post(path + '?' + urlencode(params))
+        return response.json()
+
+    new_player = await post('/player/new_player', **player_query)
+    player.session_name = session_name
+    print(f'[{player.username}] {new_player["message"]}')
+    if new_player['status'] != 200:
+        return
+
+    session_info = await post('/game/game_info', session_name=session_name)
+    while session_info['session_status'] == 'active':
+        try:
+            if session_info['round_status'] == 'ready':
+                match_info = await post('/player/match_info', **player_query)
+
+                while match_info['match_status'] == 'bench':
+                    await asyncio.sleep(15)
+                    match_info = await post('/player/match_info', **player_query)
+
+                if match_info['match_status'] == 'active':
+                    player.current_symbol = match_info['symbol']
+
+                while match_info['match_status'] == 'active':
+                    turn_info = await post('/player/turn_to_move', match_id=match_info['match'], **player_query)
+                    while not turn_info['game_over']:
+                        if turn_info['turn']:
+                            deadline = turn_deadline.get(turn_info['board'])
+                            row, col = await scheduler.search(othello_player_move, player.username,
+                                                              player.current_symbol, turn_info['board'], deadline)
+                            move = await post('/player/move', match_id=match_info['match'], row=row, col=col,
+                                              **player_query)
+                            print(f'[{player.username}] {move["message"]}')
+                            poller.fast()
+                        await poller.wait()
+                        turn_info = await post('/player/turn_to_move', match_id=match_info['match'], **player_query)
+
+                    print(f'[{player.username}] Game Over. Winner : {turn_info["winner"]}')
+                    match_info = await post('/player/match_info', **player_query)
+
+            else:
+                await asyncio.sleep(5)
+
+        except (ConnectionError, OSError):
+            await asyncio.sleep(1)
+            continue
+
+        session_info = await post('/game/game_info', session_name=session_name)
+
+
+async def run_players(sessions=(), tournaments=(), players=1, prefix='player', workers=PARALLEL_WORKERS,
+                      base_url=None, move_time=MOVE_TIME_BUDGET):
+    """
+    Reparte players jugadores entre las sesiones (protocolo de
+    othello_player) y los torneos (protocolo de newOthello_player). Cada
+    jugador tiene su propia conexión: una respuesta lenta del servidor a un
+    jugador no hace esperar a los demás.
+    """
+    from newOthello_player import BASE_URL, play_tournament
+
+    scheduler = SearchScheduler(workers)
+    games = [('session', name) for name in sessions] + [('tournament', name) for name in tournaments]
+    coroutines = []
+    clients = []
+    for index in range(players):
+        kind, name = games[index % len(games)]
+        username = f'{prefix}{index + 1}'
+        if kind == 'session':
+            clients.append(AsyncHttpClient(base_url or host_name))
+            coroutines.append(play_session(OthelloPlayer(username), name, scheduler, base_url or host_name,
+                                           move_time, clients[-1]))
+        else:
+            async def decide(board, symbol, username=username, turn_deadline=TurnDeadline(move_time)):
+                return await scheduler.search(fabi_move, username, symbol, board, turn_deadline.get(board))
+            clients.append(AsyncHttpClient(base_url or BASE_URL))
+            coroutines.append(play_tournament(name, username, base_url or BASE_URL, decide=decide, ponder=False,
+                                              client=clients[-1]))
+
+    start = time.time()
+    try:
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+    finally:
+        for client in clients:
+            await client.close()
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f'{prefix}{index + 1} terminó con error: {result!r}')
+    print(f'{players} jugadores, {scheduler.completed} búsquedas, {scheduler.missed_deadlines} fuera de plazo, '
+          f'{time.time() - start:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Varios jugadores de Othello en un solo proceso')
+    parser.add_argument('--sessions', default='', help='sesiones separadas por coma (othello_player)')
+    parser.add_argument('--tournaments', default='', help='torneos separados por coma (newOthello_player)')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--prefix', default='player', help='prefijo de los nombres de usuario')
+    parser.add_argument('--workers', type=int, default=PARALLEL_WORKERS, help='procesos del pool de búsqueda')
+    parser.add_argument('--base-url', default=None, help='servidor (por defecto el de cada protocolo)')
+    parser.add_argument('--move-time', type=float, default=MOVE_TIME_BUDGET, help='plazo por jugada (segundos)')
+    args = parser.parse_args()
+
+    sessions = [name for name in args.sessions.split(',') if name]
+    tournaments = [name for name in args.tournaments.split(',') if name]
+    if not sessions and not tournaments:
+        parser.error('indique al menos una sesión o un torneo')
+    asyncio.run(run_players(sessions, tournaments, args.players, args.prefix, args.workers, args.base_url,
+                            args.move_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,84 +1,166 @@
-import requests
-import sys
-import time
-from Fabi_player import decide_move2
+import argparse
+import asyncio
+from board_ops import do_move
+from engine_session import EngineSession
+from game_log import GAME_LOG_DIR, open_game_log
+from engines import DEFAULT_ENGINE, add_engine_arguments, load_engine, parse_params, warm_up
+from ponder import Ponderer
+from async_client import AdaptivePoller, close_clients, get_client
 
 BASE_URL = "http://localhost:3000"
 # BASE_URL = 'https://7b679617-8c6b-4d0f-bb51-0505412c6c17.us-east-1.cloud.genez.io'
 
-if __name__ == "__main__":
+# Intervalos de consulta (segundos): turno del oponente y espera de partida
+TURN_POLL_MIN = 0.05
+TURN_POLL_MAX = 2.0
+MATCH_POLL_MIN = 1.0
+MATCH_POLL_MAX = 10.0
 
 
-    if len(sys.argv) != 3:
-        print("Usage: python othello_player.py <Session Name> <Username>")
-        sys.exit(1)
+async def play_tournament(tournament_name, username, base_url=BASE_URL, decide=None, ponder=True, engine=None,
+                          game_log=None, client=None):
+    """
+    decide(board, player) es una corrutina opcional que retorna la jugada
+    (por ejemplo el planificador de multi_player); si no, engine
+    (engines.Engine, por defecto DEFAULT_ENGINE) corre en un hilo.
+    ponder=False desactiva pensar en el turno del oponente; solo se piensa
+    con motores que se pueden cancelar (Engine.cancelable).
+    Cada partida lleva su EngineSession: el motor empieza la partida con
+    tablas vacías y las conserva entre turnos. game_log (game_log.GameLogger)
+    registra cada partida terminada. client (AsyncHttpClient) es la conexión
+    propia del jugador; por defecto la compartida de get_client(base_url).
+    """
+    if engine is None and decide is None:
+        engine = load_engine(DEFAULT_ENGINE)
+    if client is None:
+        client = get_client(base_url)
+    player_info = {
+        'username' : username
+        , 'tournament_name' : tournament_name
+    }
 
-    tournament_name = sys.argv[1]
-    username = sys.argv[2]
+    # Piensa nuestras respuestas mientras el oponente decide
+    ponder = ponder and engine is not None and engine.cancelable
+    ponderer = Ponderer(lambda board, player, stop: engine(board, player, stop=stop))
+    turn_poller = AdaptivePoller(TURN_POLL_MIN, TURN_POLL_MAX)
+    match_poller = AdaptivePoller(MATCH_POLL_MIN, MATCH_POLL_MAX)
+    session = None
 
     print('Requesting to join!')
-    req = requests.post(f"{BASE_URL}/tournament/join", json = {
-        'username' : username 
-        , 'tournament_name' : tournament_name
-    })
+    req = await client.post("/tournament/join", player_info)
 
     print(req)
 
-    if req.status_code == 409: 
+    if req.status_code == 409:
         print(req.json()['detail'])
 
-    if req.status_code == 200: 
+    if req.status_code == 200:
         print(f'Welcome to the {tournament_name} tournament. Please await while the tournament starts.')
 
-    
-        while True: 
-
-            active = requests.post(f"{BASE_URL}/match/active", json = {
-                'username' : username 
-                , 'tournament_name' : tournament_name
-            })
-            
-            if active.json()['is_in_active_match']: 
-
-                while True: 
-                    status = requests.post(f"{BASE_URL}/match/status", json = {
-                        'username' : username 
-                        , 'tournament_name' : tournament_name
-                    })
-
-                    if status.status_code == 404:
-                        break
-                    if status.status_code == 409: #Is not your turn 
-                        time.sleep(2)
-                    if status.status_code == 200: #Is your turn 
-
-                        response = status.json() 
-                        if response['msg'] == 'Match ended':
-                            print(response)
-                        else:
-                            moved = False 
-
-                            while not moved: 
-                                
-                                board = status.json()['board'] 
-                                player = status.json()['player_color']
-                                move = decide_move2(board, player)
+        try:
+            while True:
+
+                active = await client.post("/match/active", player_info)
+
+                if active.json()['is_in_active_match']:
+                    match_poller.fast()
+                    turn_poller.fast()
+
+                    while True:
+                        status = await client.post("/match/status", player_info)
+
+                        if status.status_code == 404:
+                            session = None
+                            break
+                        if status.status_code == 409: #Is not your turn
+                            await turn_poller.wait()
+                        if status.status_code == 200: #Is your turn
+
+                            response = status.json()
+                            if response['msg'] == 'Match ended':
+                                # No seguir pensando respuestas de una partida terminada
+                                ponderer.stop()
+                                if session is not None:
+                                    print(f'Partida: {session.as_dict()}')
+                                    if game_log is not None:
+                                        score = response.get('score') or {}
+                                        opponents = [discs for name, discs in score.items() if name != username]
+                                        game_log.log_game(session, engine.name if engine is not None else 'decide',
+                                                          score.get(username), opponents[0] if opponents else None)
+                                    session = None
+                                print(response)
+                                print(f'RTT: {client.stats.as_dict()}')
+                                await turn_poller.wait()
+                            else:
+                                board = response['board']
+                                player = response['player_color']
+                                if session is None or session.my_symbol != player:
+                                    ponderer.stop()
+                                    session = EngineSession(engine, player,
+                                                            reset=engine.reset if engine is not None else None)
+                                session.observe(board)
+                                move = ponderer.take(board)
+                                stats = None
+                                if move is None and decide is not None:
+                                    move = await decide(board, player)
+                                elif move is None:
+                                    # En un hilo para no bloquear el ciclo de eventos
+                                    move, stats = await asyncio.to_thread(engine, board, player, return_stats=True)
                                 print(f'Your move is {move}')
                                 if move is None:
-                                    moved = True
+                                    session.record(board, None)
                                 else:
-                                    res = requests.post(f"{BASE_URL}/match/move", json={
-                                        "username" : username
-                                        , "tournament_name": tournament_name
-                                        , "x" : move[0]
-                                        , "y": move[1]
-                                    })
-                                    
-                                    if res.status_code == 409: 
-                                        print('Invalid movement!!!')
-                                    else: 
-                                        moved = True
-                            
-            else:
-                print('Await for your next match')
-                time.sleep(10)
\ No newline at end of file
+                                    # Una jugada no se reintenta: si el servidor no
+                                    # responde o la rechaza (409) se vuelve a consultar
+                                    # /match/status, que dice si se aplicó
+                                    try:
+                                        res = await client.post("/match/move", {
+                                            **player_info
+                                            , "x" : move[0]
+                                            , "y": move[1]
+                                        }, retry=False)
+                                    except (ConnectionError, asyncio.IncompleteReadError) as error:
+                                        print(f'Move not confirmed: {error!r}')
+                                    else:
+                                        if res.status_code == 409:
+                                            print('Invalid movement!!!')
+                                        else:
+                                            session.record(board, move, stats)
+                                            if ponder:
+                                                next_board = [row[:] for row in board]
+                                                do_move(next_board, move, player, [])
+                                                ponderer.start(next_board, player, session.expected_reply())
+                                # La respuesta del oponente puede llegar pronto
+                                turn_poller.fast()
+
+                else:
+                    print('Await for your next match')
+                    await match_poller.wait()
+        finally:
+            ponderer.stop()
+            if game_log is not None:
+                game_log.flush()
+
+
+async def main(tournament_name, username, engine, game_log):
+    try:
+        await play_tournament(tournament_name, username, engine=engine, game_log=game_log)
+    finally:
+        # El cliente de get_client es compartido: se cierra una sola vez al final
+        await close_clients()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Cliente de torneos de Othello')
+    parser.add_argument('tournament_name')
+    parser.add_argument('username')
+    add_engine_arguments(parser)
+    parser.add_argument('--game-log', default=GAME_LOG_DIR, help='directorio del registro binario de partidas')
+    args = parser.parse_args()
+
+    engine = load_engine(args.engine, **parse_params(args.param))
+    if args.warm_up:
+        print(f'Motor {args.engine} listo ({warm_up(engine):.2f}s)')
+
+    asyncio.run(main(args.tournament_name, args.username, engine, open_game_log(args.game_log)))
@@ -0,0 +1,259 @@
+"""
+Libro de aperturas precalculado.
+
+El libro es un archivo binario con una tabla hash de direccionamiento
+abierto que se abre con mmap, así que cargarlo no cuesta nada y cada
+consulta lee solo unos pocos bytes. Las posiciones se normalizan bajo las 8
+simetrías del tablero y se guardan desde el punto de vista del jugador que
+mueve, por lo que una misma entrada sirve para blancas y negras.
+
+Formato (little endian):
+    cabecera: b'OTHB', versión (u16), reservado (u16), número de slots (u32)
+    slots:    clave (u64), casilla canónica (u8), profundidad (u8), score (i16)
+Una clave 0 marca un slot vacío. Una posición ocupa un slot por jugada.
+
+Para regenerar el libro:
+    python opening_book.py --plies 6 --depth 4
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+from bitboard import board_to_bitboards, get_moves, iter_squares, make_move
+
+MAGIC = b'OTHB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+SLOT = struct.Struct('<QBBh')
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _symmetries():
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (7 - r, c),
+        lambda r, c: (r, 7 - c),
+        lambda r, c: (7 - r, 7 - c),
+        lambda r, c: (c, 7 - r),
+        lambda r, c: (7 - c, r),
+        lambda r, c: (7 - c, 7 - r),
+    ]
+    maps = []
+    for transform in transforms:
+        mapping = [0] * 64
+        for sq in range(64):
+            r, c = transform(sq >> 3, sq & 7)
+            mapping[sq] = r * 8 + c
+        maps.append(mapping)
+    inverses = []
+    for mapping in maps:
+        inverse = [0] * 64
+        for sq, target in enumerate(mapping):
+            inverse[target] = sq
+        inverses.append(inverse)
+    return maps, inverses
+
+
+# SYMMETRY_MAPS[s][sq] es la casilla donde la simetría s lleva a sq
+SYMMETRY_MAPS, INVERSE_MAPS = _symmetries()
+
+
+def transform_bits(bits, mapping):
+    result = 0
+    for sq in iter_squares(bits):
+        result |= 1 << mapping[sq]
+    return result
+
+
+def canonical(p, o):
+    """Retorna (p, o, s): la versión mínima de la posición y la simetría usada"""
+    best = None
+    for s, mapping in enumerate(SYMMETRY_MAPS):
+        candidate = (transform_bits(p, mapping), transform_bits(o, mapping), s)
+        if best is None or candidate < best:
+            best = candidate
+    return best
+
+
+def _mix(x):
+    # splitmix64
+    x = (x + 0x9E3779B97F4A7C15) & MASK_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return x ^ (x >> 31)
+
+
+def position_key(p, o):
+    """Clave de 64 bits de una posición canónica (nunca 0)"""
+    return _mix(p ^ _mix(o)) or 1
+
+
+class OpeningBook:
+    """Libro de aperturas de solo lectura sobre un archivo mapeado en memoria"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.slots = 0
+        self._file = None
+        self._map = None
+        if path is not None and os.path.exists(path):
+            self._open(path)
+
+    def _open(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, slots = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} no es un libro de aperturas válido')
+        if slots & (slots - 1):
+            raise ValueError(f'{path}: el número de slots debe ser potencia de dos')
+        self.slots = slots
+
+    def __bool__(self):
+        return self.slots > 0
+
+    def warm_up(self):
+        """Lee una vez cada página del archivo para que las consultas no esperen al disco"""
+        if self._map is None:
+            return 0
+        pages = 0
+        for offset in range(0, len(self._map), mmap.PAGESIZE):
+            self._map[offset]
+            pages += 1
+        return pages
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = None
+        self._file = None
+        self.slots = 0
+
+    def _probe(self, key):
+        """Jugadas guardadas para la clave: lista de (casilla canónica, profundidad, score)"""
+        entries = []
+        mask = self.slots - 1
+        index = key & mask
+        for _ in range(self.slots):
+            slot_key, sq, depth, score = SLOT.unpack_from(self._map, HEADER.size + index * SLOT.size)
+            if slot_key == 0:
+                break
+            if slot_key == key:
+                entries.append((sq, depth, score))
+            index = (index + 1) & mask
+        return entries
+
+    def moves(self, board, symbol):
+        """
+        Jugadas del libro para symbol en board.
+        Retorna una lista de ((fila, columna), score) ordenada de mejor a peor.
+        """
+        if not self:
+            return []
+        p, o = board_to_bitboards(board, symbol)
+        cp, co, s = canonical(p, o)
+        inverse = INVERSE_MAPS[s]
+        result = []
+        for sq, _, score in self._probe(position_key(cp, co)):
+            real = inverse[sq]
+            result.append(((real >> 3, real & 7), score))
+        result.sort(key=lambda entry: -entry[1])
+        return result
+
+    def lookup(self, board, symbol):
+        """Mejor jugada del libro o None si la posición no está en el libro"""
+        moves = self.moves(board, symbol)
+        if not moves:
+            return None
+        move = moves[0][0]
+        if board[move[0]][move[1]] != 0:
+            return None
+        return move
+
+
+def write_book(path, entries):
+    """
+    Escribe el libro. entries es un dict {(p, o) canónica: [(casilla, profundidad, score), ...]}
+    """
+    count = sum(len(moves) for moves in entries.values())
+    slots = 1
+    while slots < count * 2:
+        slots <<= 1
+    table = [None] * slots
+    mask = slots - 1
+    for (p, o), moves in entries.items():
+        key = position_key(p, o)
+        for sq, depth, score in moves:
+            index = key & mask
+            while table[index] is not None:
+                index = (index + 1) & mask
+            table[index] = (key, sq, depth, max(-32768, min(32767, int(score))))
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, slots))
+        empty = SLOT.pack(0, 0, 0, 0)
+        for slot in table:
+            f.write(SLOT.pack(*slot) if slot is not None else empty)
+
+
+def build_book(path, plies, depth):
+    """
+    Genera el libro recorriendo todas las posiciones hasta plies jugadas
+    desde el inicio y puntuando cada jugada con la búsqueda de Fabi_player.
+    """
+    from Fabi_player import minimax
+    from bitboard import bitboards_to_board
+    from transposition import TranspositionTable
+
+    tt = TranspositionTable(16)
+    start = [[0] * 8 for _ in range(8)]
+    start[3][3] = 1
+    start[3][4] = -1
+    start[4][3] = -1
+    start[4][4] = 1
+    # Las negras (-1) mueven primero
+    frontier = {canonical(*board_to_bitboards(start, -1))[:2]}
+    entries = {}
+    for ply in range(plies):
+        next_frontier = set()
+        for p, o in frontier:
+            if (p, o) in entries:
+                continue
+            moves = []
+            for sq in iter_squares(get_moves(p, o)):
+                child_p, child_o = make_move(p, o, sq)
+                # Tablero del hijo visto desde el jugador que acaba de mover (symbol 1)
+                board = bitboards_to_board(child_o, child_p, 1)
+                score, _ = minimax(board, depth - 1, False, 1, float('-inf'), float('inf'), tt=tt)
+                moves.append((sq, depth, score))
+                next_frontier.add(canonical(child_p, child_o)[:2])
+            if moves:
+                entries[(p, o)] = moves
+        frontier = next_frontier
+        print(f'ply {ply + 1}: {len(entries)} posiciones')
+    write_book(path, entries)
+    return len(entries)
+
+
+def open_default_book():
+    return OpeningBook(DEFAULT_BOOK_PATH)
+
+
+# Se abre una sola vez al importar; si el archivo no existe el libro queda vacío
+BOOK = open_default_book()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    plies = int(args[args.index('--plies') + 1]) if '--plies' in args else 6
+    depth = int(args[args.index('--depth') + 1]) if '--depth' in args else 4
+    out = args[args.index('--out') + 1] if '--out' in args else DEFAULT_BOOK_PATH
+    total = build_book(out, plies, depth)
+    print(f'Libro escrito en {out} ({total} posiciones)')
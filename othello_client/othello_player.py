@@ -1,21 +1,39 @@
 import requests
+import argparse
 import random
-import sys
 import time
-import copy
-from diego_player import decide_move2
+from bitboard import valid_moves
+from board_ops import do_move, undo_move
+from engine_session import EngineSession
+from engines import add_engine_arguments, load_engine, parse_params, warm_up
+from game_log import GAME_LOG_DIR, open_game_log
+from opening_book import BOOK
+from ponder import Ponderer
+from search_control import Deadline, SearchTimeout
+from search_stats import SearchStats, finish_search
 
 ### Public IP Server
 ### Testing Server
 host_name = 'http://localhost:8000'
 
+### Tiempo máximo para pensar cada respuesta durante el turno del oponente
+PONDER_TIME_LIMIT = 10.0
+
 class OthelloPlayer():
 
-    def __init__(self, username):
+    def __init__(self, username, engine=None, game_log=None):
         ### Player username
         self.username = username
         ### Player symbol in a match
         self.current_symbol = 0
+        ### Motor del registro (engines.Engine); None usa el minimax de esta clase
+        self.engine = engine
+        ### Busca nuestras respuestas mientras el oponente piensa
+        self.ponderer = Ponderer(self.ponder_search)
+        ### Estado del motor durante la partida actual (engine_session.py)
+        self.session = None
+        ### Registro binario de las partidas terminadas (game_log.GameLogger)
+        self.game_log = game_log
 
 
     def connect(self, session_name) -> bool:
@@ -58,21 +76,26 @@ class OthelloPlayer():
 
 
                     while (match_info['match_status'] == 'active'):
+                        if self.session is None or self.session.match_id != match_info['match']:
+                            self.start_session(match_info['symbol'], match_info['match'])
                         turn_info = requests.post(host_name + '/player/turn_to_move?session_name=' + self.session_name + '&player_name=' + self.username + '&match_id=' +match_info['match'])
                         turn_info = turn_info.json()
                         while not turn_info['game_over']:
                             if turn_info['turn']:
                                 print('SCORE ', turn_info['score'])
-                                row, col = self.AI_MOVE(turn_info['board'])
+                                row, col = self.session.decide(turn_info['board'])
                                 move = requests.post(
                                     host_name + '/player/move?session_name=' + self.session_name + '&player_name=' + self.username + '&match_id=' +
                                     match_info['match'] + '&row=' + str(row) + '&col=' + str(col))
                                 move = move.json()
                                 print(move['message'])
+                                self.start_pondering(turn_info['board'], (row, col))
                             time.sleep(2)
                             turn_info = requests.post(host_name + '/player/turn_to_move?session_name=' + self.session_name + '&player_name=' + self.username + '&match_id=' +match_info['match'])
                             turn_info = turn_info.json()
 
+                        self.ponderer.stop()
+                        self.end_session(turn_info.get('board'))
                         print('Game Over. Winner : ' + turn_info['winner'])
                         match_info = requests.post(host_name + '/player/match_info?session_name=' + self.session_name + '&player_name=' + self.username)
                         match_info = match_info.json()
@@ -88,17 +111,48 @@ class OthelloPlayer():
             session_info = requests.post(host_name + '/game/game_info?session_name=' + self.session_name)
             session_info = session_info.json()
 
+        self.ponderer.stop()
+        self.end_session()
+        if self.game_log is not None:
+            self.game_log.flush()
+
+    def start_session(self, symbol, match_id):
+        """
+        Nueva partida: el motor empieza con tablas vacías y las conserva
+        entre turnos hasta end_session.
+        """
+        self.ponderer.stop()
+        self.current_symbol = symbol
+        self.session = EngineSession(self.session_move, symbol, match_id,
+                                     self.engine.reset if self.engine is not None else None)
+
+    def end_session(self, board=None):
+        """Cierra la partida; con el tablero final la registra con su resultado"""
+        session = self.session
+        self.session = None
+        if session is None:
+            return
+        my_discs = opponent_discs = None
+        if board is not None:
+            session.finish(board)
+            my_discs = sum(row.count(session.my_symbol) for row in board)
+            opponent_discs = sum(row.count(-session.my_symbol) for row in board)
+        print(f'Partida {session.match_id}: {session.as_dict()}')
+        if self.game_log is not None:
+            engine = self.engine.name if self.engine is not None else 'othello_player'
+            self.game_log.log_game(session, engine, my_discs, opponent_discs)
+
+    def session_move(self, board, symbol, return_stats=False):
+        """Función de decisión de la sesión: AI_MOVE con el símbolo de la partida"""
+        self.current_symbol = symbol
+        return self.AI_MOVE(board, return_stats)
+
     def get_valid_moves(self, board, player):
         """
         Retorna una lista de tuplas (fila, columna) que representan movimientos válidos
         para el jugador en el tablero actual.
         """
-        valid_moves = []
-        for row in range(8):
-            for col in range(8):
-                if self.is_valid_move(board, row, col, player):
-                    valid_moves.append((row, col))
-        return valid_moves
+        return valid_moves(board, player)
     
     def is_valid_move(self, board, row, col, player):
         """
@@ -135,29 +189,9 @@ class OthelloPlayer():
         if not self.is_valid_move(board, row, col, player):
             return board  # El movimiento no es válido
         
-        # Hacemos una copia profunda del tablero para no modificar el original
-        new_board = copy.deepcopy(board)
-        new_board[row][col] = player  # Colocamos la ficha del jugador
-        
-        # Direcciones (arriba, abajo, izquierda, derecha, diagonales)
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        
-        # Verificamos en todas las direcciones y volteamos las fichas necesarias
-        for dr, dc in directions:
-            pieces_to_flip = []
-            r, c = row + dr, col + dc
-            
-            # Seguimos en esa dirección recogiendo fichas del oponente
-            while 0 <= r < 8 and 0 <= c < 8 and new_board[r][c] == -player:
-                pieces_to_flip.append((r, c))
-                r += dr
-                c += dc
-            
-            # Si la dirección termina con una ficha del jugador actual, volteamos las fichas
-            if 0 <= r < 8 and 0 <= c < 8 and new_board[r][c] == player:
-                for flip_r, flip_c in pieces_to_flip:
-                    new_board[flip_r][flip_c] = player
-        
+        # Copia por filas (no hace falta copy.deepcopy: las filas son de enteros)
+        new_board = [r[:] for r in board]
+        do_move(new_board, (row, col), player, [])
         return new_board
 
     def evaluate_board(self, board, player):
@@ -201,16 +235,31 @@ class OthelloPlayer():
         # Combinamos las puntuaciones
         return weighted_score + 2 * mobility
 
-    def minimax(self, board, depth, alpha, beta, maximizing_player, player):
+    def minimax(self, board, depth, alpha, beta, maximizing_player, player, undo=None, deadline=None, stats=None):
         """
         Implementación del algoritmo Minimax con poda Alpha-Beta.
+        Los movimientos se juegan sobre board y se deshacen al regresar.
+        Con deadline, lanza SearchTimeout cuando se acaba el tiempo.
+        Con stats (SearchStats), cuenta nodos, cortes y tiempos.
         """
+        if undo is None:
+            undo = []
+        if deadline is not None:
+            deadline.tick()
+        if stats is not None:
+            stats.nodes += 1
+
         # Caso base: si alcanzamos la profundidad máxima o el juego termina
         if depth == 0:
+            if stats is not None:
+                return stats.evaluate(self.evaluate_board, board, player), None
             return self.evaluate_board(board, player), None
         
         # Obtenemos los movimientos válidos para el jugador actual
-        valid_moves = self.get_valid_moves(board, player if maximizing_player else -player)
+        if stats is None:
+            valid_moves = self.get_valid_moves(board, player if maximizing_player else -player)
+        else:
+            valid_moves = stats.movegen(self.get_valid_moves, board, player if maximizing_player else -player)
         
         # Si no hay movimientos válidos, pasamos el turno
         if not valid_moves:
@@ -222,82 +271,159 @@ class OthelloPlayer():
                 return (player_count - opponent_count) * 1000, None
             
             # Pasamos el turno y continuamos con el oponente
-            return self.minimax(board, depth - 1, alpha, beta, not maximizing_player, player)
+            return self.minimax(board, depth - 1, alpha, beta, not maximizing_player, player, undo, deadline, stats)
         
         best_move = None
         
         if maximizing_player:
             max_eval = float('-inf')
-            for move in valid_moves:
-                row, col = move
-                new_board = self.make_move(board, row, col, player)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, False, player)
+            for index, move in enumerate(valid_moves):
+                flips = do_move(board, move, player, undo)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, False, player, undo, deadline, stats)
+                undo_move(board, move, player, flips, undo)
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    if stats is not None:
+                        stats.cutoff(index)
                     break  # Poda beta
             return max_eval, best_move
         else:
             min_eval = float('inf')
-            for move in valid_moves:
-                row, col = move
-                new_board = self.make_move(board, row, col, -player)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, True, player)
+            for index, move in enumerate(valid_moves):
+                flips = do_move(board, move, -player, undo)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, True, player, undo, deadline, stats)
+                undo_move(board, move, -player, flips, undo)
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    if stats is not None:
+                        stats.cutoff(index)
                     break  # Poda alpha
             return min_eval, best_move
 
-    def AI_MOVE(self, board):
+    def AI_MOVE(self, board, return_stats=False, time_limit=None):
         """
         Utiliza el algoritmo Minimax con Alpha-Beta pruning para determinar
         el mejor movimiento en el estado actual del tablero.
+        Con return_stats=True retorna (jugada, SearchStats).
+        Con time_limit (segundos) profundiza de a un nivel hasta depth y se
+        queda con la última profundidad completa cuando se acaba el tiempo.
         """
+        stats = SearchStats('othello_player')
+        # Si la posición está en el libro de aperturas no hace falta buscar
+        book_move = BOOK.lookup(board, self.current_symbol)
+        if book_move is not None:
+            return finish_search(book_move, stats, return_stats, 'book')
+
+        # Si ya la pensamos durante el turno del oponente, respondemos de inmediato
+        pondered_move = self.ponderer.take(board)
+        if pondered_move is not None:
+            return finish_search(pondered_move, stats, return_stats, 'ponder')
+
         # Verificamos si hay movimientos válidos
         valid_moves = self.get_valid_moves(board, self.current_symbol)
         
         if not valid_moves:
             # Si no hay movimientos válidos, devolvemos una jugada inválida
             # (el servidor deberá manejar esto como un paso de turno)
-            return (0, 0)
+            return finish_search((0, 0), stats, return_stats, 'pass')
+
+        if self.engine is not None:
+            return self.engine(board, self.current_symbol, time_limit=time_limit, return_stats=return_stats)
         
         # Profundidad de búsqueda (ajustar según sea necesario)
         depth = 4  # Prueba con diferentes valores según la potencia de cálculo
         
         # Llamamos a minimax
-        _, best_move = self.minimax(
-            board, 
-            depth, 
-            float('-inf'), 
-            float('inf'), 
-            True, 
-            self.current_symbol
-        )
+        # Copia propia: minimax modifica el tablero mientras busca
+        if time_limit is None:
+            _, best_move = self.minimax(
+                [row[:] for row in board], 
+                depth, 
+                float('-inf'), 
+                float('inf'), 
+                True, 
+                self.current_symbol,
+                stats=stats
+            )
+            stats.completed_iteration(depth)
+        else:
+            best_move = None
+            deadline = Deadline(time_limit)
+            for current_depth in range(1, depth + 1):
+                try:
+                    _, move = self.minimax([row[:] for row in board], current_depth, float('-inf'), float('inf'),
+                                           True, self.current_symbol, deadline=deadline, stats=stats)
+                except SearchTimeout:
+                    break
+                best_move = move
+                stats.completed_iteration(current_depth)
         
         if best_move:
-            return best_move
+            return finish_search(best_move, stats, return_stats)
         else:
             # Fallback a un movimiento aleatorio si algo falla
-            return random.choice(valid_moves)
-        
-def AI_MOVE2(self, board):
-        return decide_move2(board, self.current_symbol)
+            return finish_search(random.choice(valid_moves), stats, return_stats)
+
+    def ponder_search(self, board, player, stop):
+        """
+        Misma búsqueda que AI_MOVE, cancelable con stop (threading.Event).
+        La usa el Ponderer durante el turno del oponente.
+        """
+        if not self.get_valid_moves(board, player):
+            return None
+        if self.engine is not None:
+            return self.engine(board, player, stop=stop)
+        deadline = Deadline(PONDER_TIME_LIMIT, stop_event=stop)
+        try:
+            _, best_move = self.minimax([row[:] for row in board], 4, float('-inf'), float('inf'), True, player,
+                                        deadline=deadline)
+        except SearchTimeout:
+            return None
+        return best_move
+
+    def start_pondering(self, board, move):
+        """
+        Empieza a pensar sobre el tablero que queda después de nuestra jugada.
+        Con un motor que no se puede cancelar no se piensa: su búsqueda
+        seguiría corriendo durante nuestro turno.
+        """
+        if self.engine is not None and not self.engine.cancelable:
+            return
+        row, col = move
+        if board[row][col] != 0:
+            return
+        board = [r[:] for r in board]
+        if do_move(board, move, self.current_symbol, []) == 0:
+            return
+        expected = self.session.expected_reply() if self.session is not None else None
+        self.ponderer.start(board, self.current_symbol, expected)
 
 if __name__ == '__main__':
-    script_name = sys.argv[0]
-    # The rest of the arguments start from sys.argv[1]
+    parser = argparse.ArgumentParser(description='Cliente de Othello')
     ### The first argument is the session id you want to join
-    session_id = sys.argv[1]
+    parser.add_argument('session_id')
     ### The second argument is the username you want to have
-    player_id = sys.argv[2]
+    parser.add_argument('player_id')
+    ### Motor del registro (engines.py); othello_player es el minimax de esta clase
+    add_engine_arguments(parser, default='othello_player')
+    parser.add_argument('--game-log', default=GAME_LOG_DIR, help='directorio del registro binario de partidas')
+    args = parser.parse_args()
+    session_id = args.session_id
+    player_id = args.player_id
 
     print('Bienvenido ' + player_id + '!')
-    othello_player = OthelloPlayer(player_id)
+    engine = load_engine(args.engine, **parse_params(args.param))
+    othello_player = OthelloPlayer(player_id, engine if args.engine != 'othello_player' else None,
+                                   open_game_log(args.game_log))
+    if args.warm_up:
+        seconds = warm_up(engine)
+        print(f'Motor {args.engine} listo ({seconds:.2f}s)')
     if othello_player.connect(session_id):
         othello_player.play()
     print('Hasta pronto!')
\ No newline at end of file
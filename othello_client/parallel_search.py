@@ -0,0 +1,220 @@
+"""
+Búsqueda en paralelo en la raíz con un pool de procesos.
+
+Cada jugada de la raíz se busca en un proceso distinto (el GIL no deja
+aprovechar varios núcleos con hilos). Los procesos comparten la mejor cota
+alfa encontrada hasta el momento: una jugada que empieza después busca con
+esa ventana y poda más.
+
+El resultado es el de la búsqueda serial con las mismas tablas vacías:
+misma jugada y mismo valor. La raíz se recorre en el orden de root_moves
+del motor (el mismo que usa la serial) y cada proceso busca con tabla de
+transposición y MoveOrderer propios (new_tables del motor); los valores
+exactos no dependen del orden ni de la tabla, porque en Othello una
+posición siempre queda a la misma distancia de la raíz. Si una jugada
+falla bajo la cota compartida con exactamente el valor ganador y está
+antes en el orden, se vuelve a buscar con ventana completa para respetar
+el desempate serial (gana la primera jugada con el mejor valor).
+
+Un evento compartido (multiprocessing.Event) cancela las búsquedas de los
+procesos: se activa al acabarse el tiempo o con stop.
+"""
+
+import importlib
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from board_ops import do_move
+from search_control import Deadline, SearchTimeout
+from transposition import EXACT, search_key
+
+# Motores que se pueden buscar en paralelo: módulo y función minimax
+ENGINES = {
+    'fabi': ('Fabi_player', 'minimax'),
+    'majos': ('Majos_Player', 'minimax_enhanced'),
+}
+
+# Número de procesos del pool por defecto
+PARALLEL_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+# Memoria de la tabla de transposición de cada proceso
+WORKER_TT_MEMORY_MB = 16
+
+# Cada cuánto (segundos) el proceso principal revisa stop mientras espera
+STOP_POLL_INTERVAL = 0.01
+
+_pool = None
+_pool_workers = 0
+_shared_alpha = None
+_shared_stop = None
+_search_ids = itertools.count(1)
+
+# Estado de cada proceso del pool
+_worker_alpha = None
+_worker_stop = None
+_worker_tables = {}
+_worker_search_id = None
+
+
+def _init_worker(shared_alpha, shared_stop):
+    global _worker_alpha, _worker_stop
+    _worker_alpha = shared_alpha
+    _worker_stop = shared_stop
+
+
+def get_pool(workers=PARALLEL_WORKERS):
+    """Pool compartido; se recrea si cambia el número de procesos"""
+    global _pool, _pool_workers, _shared_alpha, _shared_stop
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _shared_alpha = multiprocessing.Value('d', float('-inf'))
+        _shared_stop = multiprocessing.Event()
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(_shared_alpha, _shared_stop))
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+
+def new_search_id():
+    """Identificador de búsqueda: los procesos limpian su tabla cuando cambia"""
+    return next(_search_ids)
+
+
+def _engine_module(engine):
+    return importlib.import_module(ENGINES[engine][0])
+
+
+def _worker_search_tables(engine, search_id):
+    global _worker_search_id
+    if search_id != _worker_search_id:
+        # Entradas de otra búsqueda podrían tener más profundidad y cambiar
+        # los valores respecto a la búsqueda serial
+        for tables in _worker_tables.values():
+            tables.clear()
+        _worker_search_id = search_id
+    if engine not in _worker_tables:
+        _worker_tables[engine] = _engine_module(engine).new_tables(WORKER_TT_MEMORY_MB)
+    return _worker_tables[engine]
+
+
+def _search_kwargs(tables):
+    """Tablas para la función minimax del motor"""
+    kwargs = {'tt': tables.tt, 'ordering': tables.ordering}
+    if tables.eval_cache is not None:
+        kwargs['eval_cache'] = tables.eval_cache
+    return kwargs
+
+
+def _search_root_move(engine, search_id, board, move, my_symbol, depth, end_time, alpha=None):
+    """
+    Se ejecuta en un proceso del pool. Busca una jugada de la raíz.
+    end_time es la hora límite (time.time()), común a todos los procesos.
+    Retorna (valor, alfa usado) o None si se acabó el tiempo o se canceló.
+    """
+    module = _engine_module(engine)
+    search = getattr(module, ENGINES[engine][1])
+    tables = _worker_search_tables(engine, search_id)
+    # Mismo ply que en la búsqueda serial: la raíz está a profundidad depth
+    tables.ordering.start_iteration(depth)
+    board = [row[:] for row in board]
+    undo = []
+    do_move(board, move, my_symbol, undo)
+    if alpha is None:
+        alpha = _worker_alpha.value
+    seconds = end_time - time.time() if end_time is not None else float('inf')
+    deadline = Deadline(seconds, stop_event=_worker_stop)
+    try:
+        value, _ = search(board, depth - 1, False, my_symbol, alpha, float('inf'), undo,
+                          deadline=deadline, **_search_kwargs(tables))
+    except SearchTimeout:
+        return None
+    # Solo un valor exacto (mayor que alfa) puede subir la cota compartida
+    if value > alpha:
+        with _worker_alpha.get_lock():
+            if value > _worker_alpha.value:
+                _worker_alpha.value = value
+    return value, alpha
+
+
+def _wait_all(futures, end_time, stop):
+    """
+    Resultados de futures en orden. Si se acaba el tiempo o stop se activa,
+    avisa a los procesos (_shared_stop) y lanza SearchTimeout.
+    """
+    pending = set(futures)
+    while pending:
+        timeout = STOP_POLL_INTERVAL if stop is not None else None
+        if end_time is not None:
+            remaining = max(0.0, end_time - time.time())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        _, pending = wait(pending, timeout, return_when=FIRST_COMPLETED)
+        if pending and ((stop is not None and stop.is_set()) or (end_time is not None and time.time() >= end_time)):
+            _shared_stop.set()
+            raise SearchTimeout()
+    results = [future.result() for future in futures]
+    if any(result is None for result in results):
+        raise SearchTimeout()
+    return results
+
+
+def parallel_root_search(engine, board, my_symbol, depth, workers=PARALLEL_WORKERS,
+                         time_limit=None, search_id=None, moves=None, tt=None, stop=None):
+    """
+    Busca a profundidad depth repartiendo las jugadas de la raíz entre
+    workers procesos. Retorna (valor, jugada) como minimax del motor.
+    moves son las jugadas de la raíz en el orden de la búsqueda serial
+    (root_moves del motor si no se pasan). El resultado
+    se guarda en tt (la tabla del proceso principal), como lo deja minimax:
+    la jugada hash ordena la raíz de la siguiente iteración.
+    Lanza SearchTimeout si alguna jugada no terminó en time_limit segundos o
+    si stop (threading.Event) se activó.
+    """
+    if moves is None:
+        module = _engine_module(engine)
+        # order_root no usa killers ni historia: sirve el MoveOrderer del módulo
+        moves = module.root_moves(board, my_symbol, depth, tt, module.TABLES.ordering)
+    if not moves:
+        return None, None
+    if search_id is None:
+        search_id = new_search_id()
+
+    pool = get_pool(workers)
+    _shared_alpha.value = float('-inf')
+    _shared_stop.clear()
+    end_time = time.time() + time_limit if time_limit is not None else None
+    futures = [pool.submit(_search_root_move, engine, search_id, board, move, my_symbol, depth, end_time)
+               for move in moves]
+    results = _wait_all(futures, end_time, stop)
+
+    best_index = None
+    best_value = None
+    for index, (value, alpha) in enumerate(results):
+        if value > alpha and (best_value is None or value > best_value):
+            best_index = index
+            best_value = value
+
+    # Desempate serial: una jugada anterior que falló bajo con el mismo valor
+    # podría valer exactamente lo mismo
+    for index in range(best_index):
+        value, alpha = results[index]
+        if value <= alpha and value >= best_value:
+            exact = _wait_all([pool.submit(_search_root_move, engine, search_id, board, moves[index], my_symbol,
+                                           depth, end_time, float('-inf'))], end_time, stop)[0]
+            if exact[0] >= best_value:
+                best_index = index
+                break
+
+    if tt is not None:
+        tt.store(search_key(board, my_symbol, my_symbol), depth, EXACT, best_value, moves[best_index])
+    return best_value, moves[best_index]
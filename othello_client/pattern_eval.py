@@ -0,0 +1,344 @@
+"""
+Evaluador por patrones con tablas de pesos.
+
+Cada patrón (borde con las dos casillas X, esquina 3x3, bloque 2x5 de
+esquina y las diagonales de 4 a 8 casillas) aparece varias veces en el
+tablero por simetría. El contenido de sus casillas se lee como un número en
+base 3 (0 vacía, 1 propia, 2 rival) que indexa la tabla del patrón; hay un
+juego de tablas por fase (casillas vacías). La evaluación es la suma de
+PATTERN_INSTANCES búsquedas en tablas, en unidades de 1/WEIGHT_SCALE de
+ficha de diferencia final.
+
+Los pesos se guardan en un archivo binario compacto:
+    cabecera: b'OTPW', versión (u16), fases (u16), patrones (u16), escala (u16)
+    cuerpo:   tablas int16 (fase, patrón) comprimidas con zlib
+Si el archivo no existe, las tablas se siembran con la tabla de pesos por
+casilla de Fabi_player.
+
+Para reentrenar (partidas de práctica + ajuste por mínimos cuadrados):
+    python pattern_eval.py --games 3000 --epochs 30
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from bitboard import valid_moves
+from board_ops import do_move, undo_move
+
+MAGIC = b'OTPW'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHH')
+
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pattern_weights.bin')
+
+# Unidades de la evaluación por ficha de diferencia
+WEIGHT_SCALE = 16
+
+# Fases de 10 casillas vacías (la última incluye 0 vacías)
+PHASE_COUNT = 6
+
+# Casillas de cada patrón en su orientación base (fila, columna)
+PATTERNS = [
+    ('edge_2x', [(0, c) for c in range(8)] + [(1, 1), (1, 6)]),
+    ('corner_3x3', [(r, c) for r in range(3) for c in range(3)]),
+    ('corner_2x5', [(r, c) for r in range(2) for c in range(5)]),
+    ('diagonal_8', [(i, i) for i in range(8)]),
+    ('diagonal_7', [(i, i + 1) for i in range(7)]),
+    ('diagonal_6', [(i, i + 2) for i in range(6)]),
+    ('diagonal_5', [(i, i + 3) for i in range(5)]),
+    ('diagonal_4', [(i, i + 4) for i in range(4)]),
+]
+
+TRANSFORMS = [
+    lambda r, c: (r, c),
+    lambda r, c: (c, 7 - r),
+    lambda r, c: (7 - r, 7 - c),
+    lambda r, c: (7 - c, r),
+    lambda r, c: (r, 7 - c),
+    lambda r, c: (7 - c, 7 - r),
+    lambda r, c: (7 - r, c),
+    lambda r, c: (c, r),
+]
+
+
+def _instances(cells):
+    """Casillas (índices 0..63) de cada aparición distinta del patrón"""
+    instances = []
+    seen = set()
+    for transform in TRANSFORMS:
+        squares = [r * 8 + c for r, c in (transform(r, c) for r, c in cells)]
+        if frozenset(squares) not in seen:
+            seen.add(frozenset(squares))
+            instances.append(squares)
+    return instances
+
+
+PATTERN_SQUARES = [_instances(cells) for _, cells in PATTERNS]
+PATTERN_SIZES = [3 ** len(cells) for _, cells in PATTERNS]
+PATTERN_INSTANCES = sum(len(instances) for instances in PATTERN_SQUARES)
+
+
+def phase_of(empties):
+    return min(PHASE_COUNT - 1, (60 - empties) // 10) if empties < 60 else 0
+
+
+def swap_index(index, length):
+    """Índice del mismo contenido visto por el rival (1 <-> 2)"""
+    result = 0
+    power = 1
+    for _ in range(length):
+        digit = index % 3
+        result += (3 - digit) % 3 * power
+        index //= 3
+        power *= 3
+    return result
+
+
+def board_indices(board, my_symbol):
+    """
+    Índices de todas las apariciones, agrupados por patrón, y la fase.
+    cell * my_symbol % 3 da 0 vacía, 1 propia, 2 rival.
+    """
+    flat = [cell * my_symbol % 3 for row in board for cell in row]
+    empties = flat.count(0)
+    indices = []
+    for instances in PATTERN_SQUARES:
+        group = []
+        for squares in instances:
+            index = 0
+            for sq in squares:
+                index = index * 3 + flat[sq]
+            group.append(index)
+        indices.append(group)
+    return indices, phase_of(empties)
+
+
+def heuristic_seed():
+    """Tablas iniciales: pesos por casilla de Fabi_player repartidos entre los patrones que la cubren"""
+    from Fabi_player import POSITION_WEIGHTS
+
+    coverage = [0] * 64
+    for instances in PATTERN_SQUARES:
+        for squares in instances:
+            for sq in squares:
+                coverage[sq] += 1
+    tables = []
+    for instances in PATTERN_SQUARES:
+        # Las apariciones son simétricas: basta con la orientación base
+        squares = instances[0]
+        weights = [POSITION_WEIGHTS[sq >> 3][sq & 7] * WEIGHT_SCALE / coverage[sq] for sq in squares]
+        table = [0] * (3 ** len(squares))
+        for index in range(len(table)):
+            value = 0.0
+            rest = index
+            for weight in reversed(weights):
+                digit = rest % 3
+                if digit == 1:
+                    value += weight
+                elif digit == 2:
+                    value -= weight
+                rest //= 3
+            table[index] = int(round(value))
+        tables.append(table)
+    return [[table[:] for table in tables] for _ in range(PHASE_COUNT)]
+
+
+class PatternEvaluator:
+    """tables[fase][patrón][índice] con los pesos enteros"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    @classmethod
+    def load(cls, path=DEFAULT_WEIGHTS_PATH):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, phases, patterns, scale = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} no es un archivo de pesos válido')
+        if phases != PHASE_COUNT or patterns != len(PATTERNS) or scale != WEIGHT_SCALE:
+            raise ValueError(f'{path}: los pesos no corresponden a los patrones de este módulo')
+        weights = array('h')
+        weights.frombytes(zlib.decompress(data[HEADER.size:]))
+        if sys.byteorder == 'big':
+            weights.byteswap()
+        tables = []
+        offset = 0
+        for _ in range(PHASE_COUNT):
+            phase_tables = []
+            for size in PATTERN_SIZES:
+                phase_tables.append(weights[offset:offset + size].tolist())
+                offset += size
+            tables.append(phase_tables)
+        return cls(tables)
+
+    def save(self, path=DEFAULT_WEIGHTS_PATH):
+        weights = array('h')
+        for phase_tables in self.tables:
+            for table in phase_tables:
+                weights.extend(max(-32768, min(32767, int(round(w)))) for w in table)
+        if sys.byteorder == 'big':
+            weights.byteswap()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, PHASE_COUNT, len(PATTERNS), WEIGHT_SCALE))
+            f.write(zlib.compress(weights.tobytes(), 9))
+
+    def evaluate(self, board, my_symbol):
+        """Diferencia final esperada para my_symbol (en 1/WEIGHT_SCALE de ficha)"""
+        flat = [cell * my_symbol % 3 for row in board for cell in row]
+        tables = self.tables[phase_of(flat.count(0))]
+        score = 0
+        for table, instances in zip(tables, PATTERN_SQUARES):
+            for squares in instances:
+                index = 0
+                for sq in squares:
+                    index = index * 3 + flat[sq]
+                score += table[index]
+        return score
+
+
+def open_default_evaluator():
+    if os.path.exists(DEFAULT_WEIGHTS_PATH):
+        return PatternEvaluator.load(DEFAULT_WEIGHTS_PATH)
+    return PatternEvaluator(heuristic_seed())
+
+
+# Se carga una sola vez al importar
+PATTERN_EVALUATOR = open_default_evaluator()
+
+
+def play_training_game(rng, epsilon, solve_empties):
+    """
+    Partida de práctica: jugada al azar con probabilidad epsilon y si no la
+    mejor según evaluate_board de Fabi_player a un ply; con solve_empties
+    vacías o menos se juega perfecto. Retorna [(tablero, turno)] y la
+    diferencia final para las negras.
+    """
+    from Fabi_player import evaluate_board
+    from endgame import solve_board
+
+    board = [[0] * 8 for _ in range(8)]
+    board[3][3] = board[4][4] = 1
+    board[3][4] = board[4][3] = -1
+    symbol = -1
+    positions = []
+    passes = 0
+    undo = []
+    while passes < 2:
+        moves = valid_moves(board, symbol)
+        if not moves:
+            passes += 1
+            symbol = -symbol
+            continue
+        passes = 0
+        positions.append(([row[:] for row in board], symbol))
+        empties = sum(row.count(0) for row in board)
+        if empties <= solve_empties:
+            _, move = solve_board(board, symbol)
+        elif rng.random() < epsilon:
+            move = rng.choice(moves)
+        else:
+            best = None
+            for candidate in moves:
+                flips = do_move(board, candidate, symbol, undo)
+                score = evaluate_board(board, symbol)
+                undo_move(board, candidate, symbol, flips, undo)
+                if best is None or score > best[0]:
+                    best = (score, candidate)
+            move = best[1]
+        do_move(board, move, symbol, undo)
+        undo.clear()
+        symbol = -symbol
+    black = sum(row.count(-1) for row in board)
+    white = sum(row.count(1) for row in board)
+    return positions, black - white
+
+
+def fit(evaluator, samples, epochs, learning_rate=1.5, prior=4.0):
+    """
+    Ajuste por mínimos cuadrados con descenso de gradiente por lotes. Cada
+    peso se mueve con el residuo medio de las muestras que lo usan; prior
+    frena las entradas con pocas muestras (se quedan cerca de la semilla).
+    samples: [(fase, índices por patrón, resultado en unidades de la escala)].
+    """
+    for epoch in range(epochs):
+        gradients = [[{} for _ in PATTERNS] for _ in range(PHASE_COUNT)]
+        counts = [[{} for _ in PATTERNS] for _ in range(PHASE_COUNT)]
+        squared = 0.0
+        for phase, indices, target in samples:
+            tables = evaluator.tables[phase]
+            prediction = 0
+            for table, group in zip(tables, indices):
+                for index in group:
+                    prediction += table[index]
+            residual = target - prediction
+            squared += residual * residual
+            residual /= PATTERN_INSTANCES
+            for pattern, group in enumerate(indices):
+                gradient = gradients[phase][pattern]
+                count = counts[phase][pattern]
+                for index in group:
+                    gradient[index] = gradient.get(index, 0.0) + residual
+                    count[index] = count.get(index, 0) + 1
+        for phase in range(PHASE_COUNT):
+            for pattern in range(len(PATTERNS)):
+                table = evaluator.tables[phase][pattern]
+                count = counts[phase][pattern]
+                for index, gradient in gradients[phase][pattern].items():
+                    table[index] += learning_rate * gradient / (count[index] + prior)
+        rmse = (squared / len(samples)) ** 0.5 / WEIGHT_SCALE
+        print(f'época {epoch + 1}: error medio {rmse:.2f} fichas')
+    _antisymmetrize(evaluator)
+
+
+def _antisymmetrize(evaluator):
+    """Fuerza evaluate(b, -s) == -evaluate(b, s) y redondea a enteros"""
+    for phase_tables in evaluator.tables:
+        for pattern, table in enumerate(phase_tables):
+            length = len(PATTERNS[pattern][1])
+            result = [0] * len(table)
+            for index in range(len(table)):
+                result[index] = int(round((table[index] - table[swap_index(index, length)]) / 2))
+            phase_tables[pattern] = result
+
+
+def train(games, epochs, epsilon=0.15, solve_empties=10, seed=0):
+    rng = random.Random(seed)
+    evaluator = PatternEvaluator(heuristic_seed())
+    samples = []
+    start = time.time()
+    for game in range(games):
+        positions, black_margin = play_training_game(rng, epsilon, solve_empties)
+        for board, symbol in positions:
+            indices, phase = board_indices(board, symbol)
+            margin = black_margin if symbol == -1 else -black_margin
+            samples.append((phase, indices, margin * WEIGHT_SCALE))
+        if (game + 1) % 100 == 0:
+            print(f'{game + 1} partidas, {len(samples)} posiciones ({time.time() - start:.0f}s)')
+    fit(evaluator, samples, epochs)
+    return evaluator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Entrena las tablas del evaluador por patrones')
+    parser.add_argument('--games', type=int, default=3000)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--epsilon', type=float, default=0.15, help='probabilidad de jugada al azar')
+    parser.add_argument('--solve-empties', type=int, default=10, help='vacías desde las que se juega perfecto')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=DEFAULT_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    evaluator = train(args.games, args.epochs, args.epsilon, args.solve_empties, args.seed)
+    evaluator.save(args.out)
+    print(f'Pesos escritos en {args.out} ({os.path.getsize(args.out)} bytes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Pensar durante el turno del oponente (pondering).
+
+Apenas enviamos nuestra jugada, un hilo en segundo plano empieza a buscar
+nuestra respuesta para cada jugada probable del oponente. Mientras tanto el
+ciclo principal solo espera al servidor (requests y time.sleep sueltan el
+GIL), así que la CPU deja de estar ociosa.
+
+Cuando llega el tablero real se le avisa al hilo que pare y se lo espera un
+momento (PONDER_JOIN_TIMEOUT): la búsqueda cancelable revisa stop cada pocos
+nodos. Solo se piensa con motores que se pueden cancelar; aun así el motor
+toma el lock de sus tablas (search_tables.py) en cada llamada, así que la
+búsqueda real nunca corre a la vez que la del hilo sobre las mismas tablas.
+Si ese tablero ya se buscó completo, la jugada se usa de inmediato; si no,
+la búsqueda normal igual aprovecha la tabla de transposición que dejó el
+pondering.
+"""
+
+import threading
+
+from bitboard import board_to_bitboards, get_flips, get_moves, iter_squares, popcount
+from board_ops import do_move
+
+# Segundos que se espera al hilo de pondering después de pedirle que pare
+PONDER_JOIN_TIMEOUT = 0.05
+
+
+def board_key(board):
+    return tuple(cell for row in board for cell in row)
+
+
+def predict_replies(board, opponent):
+    """
+    Jugadas del oponente ordenadas de más a menos probable: primero las que
+    nos dejan menos respuestas (lo que busca cualquier motor con movilidad).
+    """
+    p, o = board_to_bitboards(board, opponent)
+    scored = []
+    for sq in iter_squares(get_moves(p, o)):
+        flips = get_flips(p, o, sq)
+        our_moves = popcount(get_moves(o & ~flips, p | flips | (1 << sq)))
+        scored.append((our_moves, sq))
+    scored.sort()
+    return [(sq >> 3, sq & 7) for _, sq in scored]
+
+
+class Ponderer:
+    """
+    search(board, my_symbol, stop_event) debe retornar nuestra jugada para
+    board y terminar pronto cuando stop_event se activa (por ejemplo
+    decide_move2 con stop=stop_event; ver Engine.cancelable).
+    """
+
+    def __init__(self, search, max_replies=None):
+        self.search = search
+        self.max_replies = max_replies
+        self._thread = None
+        self._stop = threading.Event()
+        self._results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, board, my_symbol, expected=None):
+        """
+        board es el tablero después de nuestra jugada (mueve el oponente).
+        expected es la respuesta que predijo la búsqueda (PV); se piensa primero.
+        """
+        self.stop(PONDER_JOIN_TIMEOUT)
+        self._results = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        args=([row[:] for row in board], my_symbol, self._stop, expected,
+                                              self._results),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Detiene el pondering; con timeout espera al hilo hasta esos segundos.
+        Sin timeout no espera (no bloquea el ciclo de eventos) y lo que el
+        hilo encuentre después ya no se usa.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            if timeout is not None:
+                self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def take(self, board):
+        """
+        Jugada ya calculada para board, o None si no se alcanzó a buscar.
+        Antes espera un momento a que el hilo suelte las tablas del motor.
+        """
+        self.stop(PONDER_JOIN_TIMEOUT)
+        move = self._results.get(board_key(board))
+        if move is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return move
+
+    def _run(self, board, my_symbol, stop, expected, results):
+        replies = predict_replies(board, -my_symbol)
+        if expected in replies:
+            replies.remove(expected)
+            replies.insert(0, expected)
+        if self.max_replies is not None:
+            replies = replies[:self.max_replies]
+        for reply in replies:
+            if stop.is_set():
+                return
+            child = [row[:] for row in board]
+            do_move(child, reply, -my_symbol, [])
+            move = self.search(child, my_symbol, stop)
+            # Una búsqueda interrumpida no cuenta: solo se guarda si terminó sola
+            if not stop.is_set() and move is not None:
+                results[board_key(child)] = move
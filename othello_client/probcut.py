@@ -0,0 +1,254 @@
+"""
+Multi-ProbCut para la búsqueda PVS (pvs.py).
+
+El valor de una búsqueda profunda v_d se predice con una búsqueda corta
+v_s del mismo nodo: v_d ~ a * v_s + b, con error de desviación sigma. Antes
+de expandir un nodo a profundidad d (con su par s en MPC_DEPTHS):
+  - si la búsqueda corta dice que v_d >= beta + t * sigma, se corta por arriba,
+  - si dice que v_d <= alpha - t * sigma, se corta por abajo,
+donde t es la confianza: más baja corta más (más rápido, menos exacto).
+Cada prueba es una búsqueda de ventana mínima a profundidad s.
+
+a, b y sigma se ajustan por regresión lineal para cada profundidad y fase
+(casillas vacías) con posiciones de partidas del motor contra sí mismo
+(selfplay.py), por motor (cada evaluación tiene su escala). Se guardan en
+probcut_<motor>.json:
+    python probcut.py --engine fabi --positions 200 --max-depth 7
+Si el archivo no está, el motor busca sin ProbCut y ProbCut.load lo avisa.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Profundidad del nodo -> profundidad de la búsqueda corta (misma paridad)
+MPC_DEPTHS = {3: 1, 4: 2, 5: 3, 6: 2, 7: 3, 8: 4, 9: 5, 10: 4}
+
+# Fases de 15 casillas vacías
+MPC_PHASES = 4
+
+# Confianza por defecto (en desviaciones estándar)
+MPC_CONFIDENCE = 1.5
+
+# Con menos muestras en una fase se usan los parámetros de todas las fases juntas
+MIN_SAMPLES = 30
+
+PARAMS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Motor del registro (engines.py) que juega las partidas de cada evaluación,
+# sin ProbCut (los parámetros todavía no existen) y tiempo por jugada
+SELFPLAY_ENGINES = {
+    'fabi': ('fabi', {}),
+    'majos': ('majos', {}),
+    'majos_pattern': ('majos_pattern', {'confidence': None}),
+    'diego': ('diego', {}),
+}
+SELFPLAY_TIME_LIMIT = 0.05
+# Jugadas al azar de cada apertura (para que las partidas no se repitan)
+OPENING_PLIES = 8
+
+
+def phase_of(empties):
+    return min(MPC_PHASES - 1, (60 - empties) // 15)
+
+
+def params_path(engine):
+    return os.path.join(PARAMS_DIR, f'probcut_{engine}.json')
+
+
+class ProbCut:
+    """
+    Parámetros ajustados: params[fase][profundidad] = (a, b, sigma).
+    confidence es el t de las pruebas.
+    """
+
+    def __init__(self, params, confidence=MPC_CONFIDENCE):
+        self.params = params
+        self.confidence = confidence
+
+    @classmethod
+    def load(cls, engine, confidence=MPC_CONFIDENCE):
+        """ProbCut del motor, o None (con un aviso) si no hay parámetros ajustados"""
+        path = params_path(engine)
+        if not os.path.exists(path):
+            print(f'ProbCut: falta {os.path.basename(path)}, {engine} busca sin ProbCut '
+                  f'(python probcut.py --engine {engine})', file=sys.stderr)
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        params = [{int(depth): tuple(values) for depth, values in phase.items()} for phase in data['params']]
+        return cls(params, confidence)
+
+    def thresholds(self, depth, empties):
+        """
+        (profundidad corta, a, b, t * sigma) para un nodo a profundidad depth,
+        o None si no hay prueba para esa profundidad.
+        """
+        shallow = MPC_DEPTHS.get(depth)
+        if shallow is None:
+            return None
+        values = self.params[phase_of(empties)].get(depth)
+        if values is None:
+            return None
+        a, b, sigma = values
+        return shallow, a, b, self.confidence * sigma
+
+
+def with_confidence(probcut, confidence):
+    """probcut con otra confianza; None (sin ProbCut) si no hay parámetros o confidence es None"""
+    if probcut is None or confidence is None:
+        return None
+    return ProbCut(probcut.params, confidence)
+
+
+def _evaluator(engine):
+    if engine == 'fabi':
+        from Fabi_player import evaluate_board
+        return evaluate_board
+    if engine == 'majos':
+        from Majos_Player import compute_evaluation_enhanced
+        return compute_evaluation_enhanced
+    if engine == 'majos_pattern':
+        from Majos_Player import evaluate_board_pattern
+        return evaluate_board_pattern
+    from diego_player import evaluate_board
+    return evaluate_board
+
+
+def selfplay_game(engines, rng, time_limit=SELFPLAY_TIME_LIMIT, opening_plies=OPENING_PLIES):
+    """
+    Partida del motor contra sí mismo después de una apertura al azar.
+    engines[símbolo] es el Engine de cada color. Retorna [(tablero, turno)].
+    """
+    from bitboard import valid_moves
+    from board_ops import do_move
+    from selfplay import initial_board
+
+    board = initial_board()
+    symbol = -1
+    positions = []
+    passes = 0
+    while passes < 2:
+        moves = valid_moves(board, symbol)
+        if not moves:
+            passes += 1
+            symbol = -symbol
+            continue
+        passes = 0
+        positions.append(([row[:] for row in board], symbol))
+        if len(positions) <= opening_plies:
+            move = rng.choice(moves)
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                move = engines[symbol](board, symbol, time_limit=time_limit)
+            move = tuple(move) if move is not None and tuple(move) in moves else rng.choice(moves)
+        do_move(board, move, symbol, [])
+        symbol = -symbol
+    return positions
+
+
+def collect_samples(engine, positions, max_depth, seed=0):
+    """
+    Valores exactos (ventana completa, sin ProbCut) de profundidad 1..max_depth
+    para posiciones tomadas al azar de partidas del motor contra sí mismo
+    (SELFPLAY_ENGINES). Retorna [(vacías, {profundidad: valor})].
+    """
+    from engines import load_engine
+    from pvs import DISC_WIN_SCORE, PrincipalVariationSearch
+    from transposition import TranspositionTable
+
+    evaluate = _evaluator(engine)
+    rng = random.Random(seed)
+    random.seed(seed)
+    name, params = SELFPLAY_ENGINES[engine]
+    engines = {}
+    for symbol in (-1, 1):
+        engines[symbol] = load_engine(name, **params)
+        engines[symbol].isolate()
+    tt = TranspositionTable(32)
+    samples = []
+    start = time.time()
+    while len(samples) < positions:
+        for function in engines.values():
+            function.reset()
+        game = selfplay_game(engines, rng)
+        # Hasta tres posiciones por partida, con al menos max_depth + 4 vacías
+        candidates = [(board, symbol) for board, symbol in game
+                      if sum(row.count(0) for row in board) >= max_depth + 4]
+        for board, symbol in rng.sample(candidates, min(3, len(candidates))):
+            tt.new_search()
+            searcher = PrincipalVariationSearch(evaluate, symbol, tt)
+            values = {}
+            for depth in range(1, max_depth + 1):
+                score, _ = searcher.search_root([row[:] for row in board], depth, symbol)
+                if abs(score) < DISC_WIN_SCORE:
+                    values[depth] = score
+            samples.append((sum(row.count(0) for row in board), values))
+            if len(samples) % 20 == 0:
+                print(f'{len(samples)} posiciones ({time.time() - start:.0f}s)')
+    return samples[:positions]
+
+
+def _regression(pairs):
+    shallow = [s for s, _ in pairs]
+    deep = [d for _, d in pairs]
+    mean_s = statistics.fmean(shallow)
+    mean_d = statistics.fmean(deep)
+    var_s = sum((s - mean_s) ** 2 for s in shallow)
+    a = sum((s - mean_s) * (d - mean_d) for s, d in pairs) / var_s if var_s else 1.0
+    b = mean_d - a * mean_s
+    sigma = (sum((d - a * s - b) ** 2 for s, d in pairs) / max(1, len(pairs) - 2)) ** 0.5
+    return a, b, sigma
+
+
+def fit(samples):
+    """params[fase][profundidad] = (a, b, sigma, muestras)"""
+    params = [{} for _ in range(MPC_PHASES)]
+    for depth, shallow in MPC_DEPTHS.items():
+        by_phase = [[] for _ in range(MPC_PHASES)]
+        for empties, values in samples:
+            if depth in values and shallow in values:
+                by_phase[phase_of(empties)].append((values[shallow], values[depth]))
+        pooled = [pair for pairs in by_phase for pair in pairs]
+        if len(pooled) < MIN_SAMPLES:
+            continue
+        pooled_fit = _regression(pooled)
+        for phase, pairs in enumerate(by_phase):
+            a, b, sigma = _regression(pairs) if len(pairs) >= MIN_SAMPLES else pooled_fit
+            # a <= 0 no sirve para predecir: esa profundidad queda sin prueba
+            if a <= 0:
+                continue
+            params[phase][depth] = (round(a, 4), round(b, 3), round(sigma, 3), len(pairs))
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ajusta los cortes de Multi-ProbCut de un motor')
+    parser.add_argument('--engine', choices=('fabi', 'majos', 'majos_pattern', 'diego'), default='fabi')
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--max-depth', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    samples = collect_samples(args.engine, args.positions, args.max_depth, args.seed)
+    params = fit(samples)
+    for phase, depths in enumerate(params):
+        for depth, (a, b, sigma, count) in sorted(depths.items()):
+            print(f'fase {phase} profundidad {depth}<-{MPC_DEPTHS[depth]}: '
+                  f'a={a} b={b} sigma={sigma} ({count} muestras)')
+    path = params_path(args.engine)
+    with open(path, 'w') as f:
+        json.dump({'engine': args.engine, 'positions': len(samples), 'max_depth': args.max_depth,
+                   'params': [{str(depth): list(values[:3]) for depth, values in sorted(depths.items())}
+                              for depths in params]}, f, indent=1)
+    print(f'Parámetros escritos en {path}')
+
+
+if __name__ == '__main__':
+    main()
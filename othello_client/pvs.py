@@ -0,0 +1,319 @@
+"""
+Búsqueda de variante principal (PVS) en forma negamax.
+
+Un solo buscador sirve a todos los motores: cada uno pasa su función de
+evaluación evaluate(board, my_symbol). Los valores de negamax son siempre
+desde el punto de vista del jugador que mueve, así que en los nodos del
+rival se usa -evaluate(board, my_symbol) (la evaluación de Majos no es
+simétrica: evaluate(b, s) != -evaluate(b, -s), por eso no se llama con el
+símbolo del rival).
+
+  - La primera jugada de cada nodo se busca con la ventana completa y las
+    demás con una ventana mínima (scout); si el scout mejora alfa sin llegar
+    a beta, se vuelve a buscar con la ventana completa.
+  - En la raíz, cada iteración usa una ventana de aspiración centrada en el
+    valor de la iteración anterior que se ensancha al fallar.
+  - Si el jugador no tiene jugadas pero el rival sí, se pasa el turno (sin
+    gastar profundidad); si ninguno tiene, se cuenta la diferencia de fichas
+    como endgame.final_score (las vacías para el ganador). Los minimax de
+    los motores evaluaban la posición en lugar de pasar.
+  - Los valores son enteros: la evaluación de Majos es float y se redondea
+    en las hojas, así la ventana (alfa, alfa + 1) del scout es de verdad
+    mínima (no queda ningún valor posible entre los dos extremos).
+
+Los valores se guardan en la tabla de transposición del motor con claves
+propias (PVS_KEY), porque minimax guarda valores desde el punto de vista
+de my_symbol y aquí son del jugador que mueve.
+"""
+
+import math
+import random
+import time
+
+from bitboard import board_to_bitboards, valid_moves
+from board_ops import do_move, undo_move
+from endgame import ENDGAME_EMPTIES, final_score, solve_board
+from opening_book import BOOK
+from search_control import Deadline, SearchTimeout, principal_variation, should_start_next_iteration
+from search_stats import SearchStats, finish_search
+from transposition import EXACT, LOWER, SIDE_KEY, bound_flag, child_key, search_key
+
+# Clave que separa las entradas de PVS de las de minimax en la misma tabla
+PVS_KEY = random.Random(0x9E6A).getrandbits(64)
+
+# Valor de una ficha de diferencia al final de la partida (domina cualquier evaluación)
+DISC_WIN_SCORE = 10000
+
+# Semiancho inicial de la ventana de aspiración (en unidades de la evaluación)
+ASPIRATION_WINDOW = 16
+# Fallos de la ventana de aspiración antes de buscar con la ventana completa
+ASPIRATION_RETRIES = 3
+# Las iteraciones menos profundas se buscan con la ventana completa
+ASPIRATION_MIN_DEPTH = 3
+
+INF = float('inf')
+
+
+class PrincipalVariationSearch:
+    """
+    Buscador negamax PVS para un motor.
+    evaluate(board, my_symbol) es la evaluación del motor; move_key (opcional)
+    es su orden estático de jugadas (para list.sort); tt, ordering, deadline y
+    stats son los mismos objetos que usan los minimax de los motores.
+    Con eval_cache (EvalCache) las hojas pasan por la caché usando la clave
+    Zobrist del nodo. Con probcut (probcut.ProbCut) los nodos que no son la
+    raíz prueban los cortes de Multi-ProbCut antes de expandirse.
+    """
+
+    def __init__(self, evaluate, my_symbol, tt=None, ordering=None, deadline=None, stats=None, move_key=None,
+                 window=ASPIRATION_WINDOW, eval_cache=None, probcut=None):
+        self.evaluate = evaluate
+        self.my_symbol = my_symbol
+        self.tt = tt
+        self.ordering = ordering
+        self.deadline = deadline
+        self.stats = stats
+        self.move_key = move_key
+        self.window = window
+        self.eval_cache = eval_cache
+        self.probcut = probcut
+        self.root_depth = 0
+        # Las búsquedas cortas de ProbCut no prueban cortes a su vez
+        self._probing = False
+
+    def root_key(self, board, player):
+        return search_key(board, player, self.my_symbol) ^ PVS_KEY
+
+    def search_root(self, board, depth, player, guess=None):
+        """
+        Retorna (score, jugada) a profundidad depth. Con guess (valor de la
+        iteración anterior) busca con ventana de aspiración.
+        """
+        key = self.root_key(board, player) if self.tt is not None else None
+        self.root_depth = depth
+        if guess is None or depth < ASPIRATION_MIN_DEPTH or abs(guess) >= DISC_WIN_SCORE:
+            return self.search(board, depth, player, -INF, INF, [], key)
+
+        delta = self.window
+        alpha, beta = guess - delta, guess + delta
+        for _ in range(ASPIRATION_RETRIES):
+            score, move = self.search(board, depth, player, alpha, beta, [], key)
+            if alpha < score < beta:
+                return score, move
+            if self.stats is not None:
+                self.stats.researches += 1
+            delta *= 2
+            if score <= alpha:
+                alpha = score - delta
+            else:
+                beta = score + delta
+        return self.search(board, depth, player, -INF, INF, [], key)
+
+    def search(self, board, depth, player, alpha, beta, undo, key=None):
+        """
+        Negamax PVS (fail-soft) desde el punto de vista de player.
+        board se modifica durante la búsqueda y se restaura antes de retornar.
+        """
+        stats = self.stats
+        if self.deadline is not None:
+            self.deadline.tick()
+        if stats is not None:
+            stats.nodes += 1
+
+        if depth == 0:
+            return self._evaluate(board, player, key), None
+
+        if stats is None:
+            moves = valid_moves(board, player)
+        else:
+            moves = stats.movegen(valid_moves, board, player)
+        if not moves:
+            opponent_moves = valid_moves(board, -player) if stats is None else stats.movegen(valid_moves, board, -player)
+            if not opponent_moves:
+                return self._final_score(board, player), None
+            # Pasar no gasta profundidad: el rival sí tiene jugadas
+            child = key ^ SIDE_KEY if key is not None else None
+            score, _ = self.search(board, depth, -player, -beta, -alpha, undo, child)
+            return -score, None
+
+        if self.move_key is not None:
+            moves.sort(key=self.move_key)
+        if self.ordering is not None:
+            self.ordering.order(moves, board, player, depth)
+
+        tt = self.tt
+        alpha_orig, beta_orig = alpha, beta
+        if tt is not None:
+            entry = tt.probe(key)
+            if entry is not None:
+                tt_depth, tt_flag, tt_score, tt_move = entry
+                if tt_depth >= depth:
+                    if tt_flag == EXACT:
+                        return tt_score, tt_move
+                    if tt_flag == LOWER:
+                        alpha = max(alpha, tt_score)
+                    else:
+                        beta = min(beta, tt_score)
+                    if alpha >= beta:
+                        return tt_score, tt_move
+                if tt_move in moves:
+                    moves.remove(tt_move)
+                    moves.insert(0, tt_move)
+
+        if self.probcut is not None and depth < self.root_depth and not self._probing:
+            cut = self._probcut(board, depth, player, alpha, beta, undo, key)
+            if cut is not None:
+                return cut, None
+
+        best_score = -INF
+        best_move = None
+        for index, move in enumerate(moves):
+            flips = do_move(board, move, player, undo)
+            child = child_key(key, move, player, flips, undo) if tt is not None else None
+            if index == 0:
+                score = -self.search(board, depth - 1, -player, -beta, -alpha, undo, child)[0]
+            else:
+                # Scout con ventana mínima: solo pregunta si la jugada mejora alfa
+                score = -self.search(board, depth - 1, -player, -alpha - 1, -alpha, undo, child)[0]
+                if alpha < score < beta:
+                    if stats is not None:
+                        stats.researches += 1
+                    score = -self.search(board, depth - 1, -player, -beta, -alpha, undo, child)[0]
+            undo_move(board, move, player, flips, undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if stats is not None:
+                            stats.cutoff(index)
+                        if self.ordering is not None:
+                            self.ordering.record_cutoff(move, player, depth)
+                        break
+
+        if tt is not None:
+            tt.store(key, depth, bound_flag(best_score, alpha_orig, beta_orig), best_score, best_move)
+        return best_score, best_move
+
+    def _probcut(self, board, depth, player, alpha, beta, undo, key):
+        """
+        Prueba de Multi-ProbCut: retorna beta o alpha si la búsqueda corta
+        predice un corte con la confianza dada, o None para buscar normal.
+        """
+        thresholds = self.probcut.thresholds(depth, sum(row.count(0) for row in board))
+        if thresholds is None:
+            return None
+        shallow, a, b, margin = thresholds
+        self._probing = True
+        try:
+            # Cotas enteras, como los valores: v_s >= x <=> v_s >= ceil(x) y
+            # v_s <= x <=> v_s <= floor(x), y las ventanas siguen siendo mínimas
+            if beta < INF:
+                # v_d >= beta + margin  <=>  v_s >= (beta + margin - b) / a
+                bound = math.ceil((beta + margin - b) / a)
+                score, _ = self.search(board, shallow, player, bound - 1, bound, undo, key)
+                if score >= bound:
+                    if self.stats is not None:
+                        self.stats.probcuts += 1
+                    return beta
+            if alpha > -INF:
+                bound = math.floor((alpha - margin - b) / a)
+                score, _ = self.search(board, shallow, player, bound, bound + 1, undo, key)
+                if score <= bound:
+                    if self.stats is not None:
+                        self.stats.probcuts += 1
+                    return alpha
+        finally:
+            self._probing = False
+        return None
+
+    def _evaluate(self, board, player, key):
+        if self.eval_cache is not None:
+            # position_key del tablero: sin la sal de PVS ni el bit de turno
+            if key is not None:
+                key ^= PVS_KEY ^ SIDE_KEY if player == -1 else PVS_KEY
+            args = (self.evaluate, board, self.my_symbol, key)
+            function = self.eval_cache.evaluate
+        else:
+            args = (board, self.my_symbol)
+            function = self.evaluate
+        score = self.stats.evaluate(function, *args) if self.stats is not None else function(*args)
+        score = round(score)
+        return score if player == self.my_symbol else -score
+
+    def _final_score(self, board, player):
+        # Misma cuenta que el solucionador exacto, en la escala de la evaluación
+        return final_score(*board_to_bitboards(board, player)) * DISC_WIN_SCORE
+
+
+def decide_with_pvs(engine, board, my_symbol, evaluate, time_limit=None, max_depth=None,
+                     endgame_empties=ENDGAME_EMPTIES, tt=None, ordering=None, move_key=None,
+                     window=ASPIRATION_WINDOW, eval_cache=None, probcut=None, stop=None, return_stats=False):
+    """
+    Decisión completa con PVS: libro, final exacto (con endgame_empties
+    casillas vacías o menos) y profundización iterativa hasta time_limit
+    segundos o max_depth. Los motores la envuelven con su evaluación;
+    eval_cache (EvalCache) es la caché que usa esa evaluación, si tiene, y
+    probcut (probcut.ProbCut) activa Multi-ProbCut.
+    """
+    start = time.time()
+    stats = SearchStats(engine)
+    book_move = BOOK.lookup(board, my_symbol)
+    if book_move is not None:
+        return finish_search(book_move, stats, return_stats, 'book')
+
+    empties = sum(cell == 0 for row in board for cell in row)
+    if time_limit is not None and empties <= endgame_empties:
+        endgame_deadline = Deadline(time_limit / 2, stop_event=stop)
+        try:
+            _, move = solve_board(board, my_symbol, endgame_deadline)
+        except SearchTimeout:
+            move = None
+        stats.endgame_nodes = endgame_deadline.nodes
+        if move is not None:
+            stats.depth = empties
+            return finish_search(move, stats, return_stats, 'endgame')
+
+    deadline = None
+    if time_limit is not None:
+        deadline = Deadline(time_limit - (time.time() - start), stop_event=stop)
+    if tt is not None:
+        tt.new_search()
+        stats.track_table(tt)
+    if ordering is not None:
+        ordering.new_search()
+    if eval_cache is not None:
+        stats.track_cache(eval_cache)
+    searcher = PrincipalVariationSearch(evaluate, my_symbol, tt, ordering, deadline, stats, move_key, window,
+                                        eval_cache, probcut)
+
+    best_move = None
+    score = None
+    pv = []
+    last_depth = min(empties, max_depth) if max_depth else empties
+    for depth in range(1, last_depth + 1):
+        iteration_start = time.time()
+        if ordering is not None:
+            ordering.start_iteration(depth)
+        try:
+            score, move = searcher.search_root([row[:] for row in board], depth, my_symbol, score)
+        except SearchTimeout:
+            break
+        if move is not None:
+            best_move = move
+        stats.completed_iteration(depth)
+        if tt is not None:
+            pv = principal_variation(tt, board, my_symbol, my_symbol, depth, salt=PVS_KEY)
+        if deadline is not None and not should_start_next_iteration(deadline, time.time() - iteration_start):
+            break
+
+    if best_move is None:
+        moves = valid_moves(board, my_symbol)
+        return finish_search(moves[0] if moves else None, stats, return_stats)
+
+    stats.pv = pv
+    if deadline is not None:
+        print(f"⏱️ Tiempo de decisión: {time.time() - start:.3f} segundos (PVS profundidad {stats.depth}, "
+              f"PV {pv}, {stats.nodes} nodos)")
+    return finish_search(best_move, stats, return_stats)
@@ -0,0 +1,92 @@
+"""
+Control de tiempo para la búsqueda con profundización iterativa.
+
+La búsqueda llama deadline.tick() en cada nodo; cuando se acaba el tiempo
+se lanza SearchTimeout, que sube hasta el ciclo de profundización. Como los
+motores buscan sobre una copia del tablero, abortar a mitad de camino no
+deja nada que limpiar: se usa la jugada de la última iteración completa.
+"""
+
+import time
+
+from board_ops import do_move
+from transposition import child_key, search_key
+
+
+class SearchTimeout(Exception):
+    """Se acabó el tiempo de la búsqueda actual"""
+
+
+class Deadline:
+    """
+    Límite de tiempo de una búsqueda. Solo consulta el reloj cada
+    check_every nodos para que el costo por nodo sea mínimo.
+    stop_event (threading.Event, opcional) permite cancelar la búsqueda
+    desde otro hilo, por ejemplo al terminar de pensar en el turno rival.
+    """
+
+    def __init__(self, seconds, check_every=32, stop_event=None):
+        self.start = time.perf_counter()
+        self.end = self.start + seconds
+        self.check_every = check_every
+        self.stop_event = stop_event
+        self.nodes = 0
+        self._countdown = check_every
+
+    def tick(self):
+        self.nodes += 1
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_every
+            if time.perf_counter() >= self.end:
+                raise SearchTimeout()
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchTimeout()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def remaining(self):
+        return self.end - time.perf_counter()
+
+    def expired(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        return time.perf_counter() >= self.end
+
+
+def principal_variation(tt, board, side_to_move, my_symbol, max_length, salt=0):
+    """
+    Sigue las jugadas guardadas en la tabla de transposición desde la raíz.
+    Retorna la variante principal como lista de jugadas.
+    salt se combina con las claves (búsquedas con entradas propias, como pvs.py).
+    """
+    board = [row[:] for row in board]
+    undo = []
+    key = search_key(board, side_to_move, my_symbol) ^ salt
+    pv = []
+    seen = set()
+    while len(pv) < max_length and key not in seen:
+        seen.add(key)
+        # peek: leer la PV no cuenta en las estadísticas de la tabla (SearchStats.track_table)
+        entry = tt.peek(key)
+        if entry is None or entry[3] is None:
+            break
+        move = entry[3]
+        if board[move[0]][move[1]] != 0:
+            break
+        flips = do_move(board, move, side_to_move, undo)
+        if flips == 0:
+            break
+        key = child_key(key, move, side_to_move, flips, undo)
+        side_to_move = -side_to_move
+        pv.append(move)
+    return pv
+
+
+def should_start_next_iteration(deadline, last_iteration_time, branching=4.0):
+    """
+    Estima si vale la pena empezar otra iteración: si la siguiente
+    probablemente no termina, es mejor devolver la jugada ya.
+    """
+    return not deadline.expired() and deadline.remaining() > last_iteration_time * branching
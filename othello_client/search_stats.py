@@ -0,0 +1,159 @@
+"""
+Estadísticas de búsqueda por jugada.
+
+Cada minimax acepta stats=None; con un SearchStats cuenta nodos, hojas,
+cortes beta (y cuántos se dieron con la primera jugada probada, la medida
+de qué tan bueno es el orden de jugadas), re-búsquedas y cortes ProbCut de
+PVS y el tiempo gastado generando jugadas y evaluando. Sin stats la
+búsqueda no paga nada extra.
+
+Las funciones decide_* aceptan return_stats=True para retornar
+(jugada, stats). Si STATS_LOG_PATH tiene una ruta (variable de entorno
+OTHELLO_STATS_LOG), cada búsqueda agrega una línea JSON a ese archivo.
+"""
+
+import json
+import os
+import time
+
+# Archivo JSON lines donde se guardan las estadísticas de cada búsqueda
+STATS_LOG_PATH = os.environ.get('OTHELLO_STATS_LOG')
+
+
+class SearchStats:
+    """
+    Contadores de una búsqueda. El tiempo de generación de jugadas incluye
+    la detección de fin de juego; el de evaluación incluye la movilidad que
+    calcula cada evaluador.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.source = 'search'
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+        self.probcuts = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.eval_cache_hits = 0
+        self.eval_cache_misses = 0
+        self.endgame_nodes = 0
+        self.depth = 0
+        self.iteration_nodes = []
+        self.movegen_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.elapsed = 0.0
+        self.move = None
+        # Variante principal de la última iteración completa (si el motor la calcula)
+        self.pv = []
+        self._start = time.perf_counter()
+        self._tt = None
+        self._tt_start = (0, 0)
+        self._cache = None
+        self._cache_start = (0, 0)
+
+    def movegen(self, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.movegen_seconds += time.perf_counter() - start
+        return result
+
+    def evaluate(self, function, *args):
+        self.leaves += 1
+        start = time.perf_counter()
+        result = function(*args)
+        self.eval_seconds += time.perf_counter() - start
+        return result
+
+    def cutoff(self, move_index):
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+
+    def completed_iteration(self, depth):
+        """Al terminar cada iteración de la profundización iterativa"""
+        self.depth = depth
+        self.iteration_nodes.append(self.nodes - sum(self.iteration_nodes))
+
+    def track_table(self, tt):
+        """Toma los contadores de la tabla de transposición al empezar"""
+        self._tt = tt
+        self._tt_start = (tt.probes, tt.hits)
+
+    def track_cache(self, cache):
+        """Toma los contadores de la caché de evaluaciones al empezar"""
+        self._cache = cache
+        self._cache_start = (cache.hits, cache.misses)
+
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else None
+
+    def effective_branching_factor(self):
+        """Razón de nodos entre las dos últimas iteraciones, o nodos^(1/profundidad)"""
+        iterations = [nodes for nodes in self.iteration_nodes if nodes]
+        if len(iterations) >= 2:
+            return iterations[-1] / iterations[-2]
+        if self.nodes and self.depth:
+            return self.nodes ** (1 / self.depth)
+        return None
+
+    def finish(self, move, source=None):
+        self.move = move
+        if source is not None:
+            self.source = source
+        self.elapsed = time.perf_counter() - self._start
+        if self._tt is not None:
+            self.tt_probes = self._tt.probes - self._tt_start[0]
+            self.tt_hits = self._tt.hits - self._tt_start[1]
+        if self._cache is not None:
+            self.eval_cache_hits = self._cache.hits - self._cache_start[0]
+            self.eval_cache_misses = self._cache.misses - self._cache_start[1]
+
+    def as_dict(self):
+        rate = self.first_move_cutoff_rate()
+        ebf = self.effective_branching_factor()
+        return {
+            'engine': self.engine,
+            'source': self.source,
+            'move': list(self.move) if self.move is not None else None,
+            'pv': [list(move) for move in self.pv],
+            'depth': self.depth,
+            'nodes': self.nodes,
+            'leaves': self.leaves,
+            'endgame_nodes': self.endgame_nodes,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': None if rate is None else round(rate, 4),
+            'researches': self.researches,
+            'probcuts': self.probcuts,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'eval_cache_hits': self.eval_cache_hits,
+            'eval_cache_misses': self.eval_cache_misses,
+            'effective_branching_factor': None if ebf is None else round(ebf, 3),
+            'iteration_nodes': self.iteration_nodes,
+            'movegen_seconds': round(self.movegen_seconds, 6),
+            'eval_seconds': round(self.eval_seconds, 6),
+            'elapsed': round(self.elapsed, 6),
+            'nodes_per_second': round(self.nodes / self.elapsed) if self.elapsed else None,
+        }
+
+
+def log_stats(stats, path=None):
+    """Agrega una línea JSON con stats al archivo de estadísticas"""
+    path = path or STATS_LOG_PATH
+    if not path:
+        return
+    record = stats.as_dict()
+    record['time'] = time.time()
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def finish_search(move, stats, return_stats, source=None):
+    """Cierra stats, lo registra y arma el valor de retorno de decide_*"""
+    stats.finish(move, source)
+    log_stats(stats)
+    return (move, stats) if return_stats else move
@@ -0,0 +1,38 @@
+"""
+Tablas que un motor conserva entre jugadas.
+
+SearchTables junta la tabla de transposición, el orden de jugadas (killers
+e historia) y, si el motor la usa, la caché de evaluaciones. Cada módulo de
+motor tiene unas por defecto (TABLES) y una función new_tables() que crea
+otras vacías; sus funciones de decisión aceptan tables=... y las pasan a la
+búsqueda como parámetros. Así dos motores del mismo módulo en un proceso
+(selfplay.py, engines.Engine.isolate) no comparten estado.
+
+lock serializa las búsquedas que usan las mismas tablas (el hilo de
+pondering y la búsqueda del turno): ni la caché LRU ni killers/historia se
+pueden modificar desde dos hilos a la vez.
+"""
+
+import threading
+
+
+class SearchTables:
+
+    def __init__(self, tt=None, ordering=None, eval_cache=None, pattern_tt=None):
+        self.tt = tt
+        self.ordering = ordering
+        self.eval_cache = eval_cache
+        # Tabla de la búsqueda con evaluación por patrones (otra escala de valores)
+        self.pattern_tt = pattern_tt
+        self.lock = threading.Lock()
+
+    def shared_with(self, other):
+        """Nombres de las tablas que estas y other tienen en común (el mismo objeto)"""
+        return [name for name in ('tt', 'ordering', 'eval_cache', 'pattern_tt')
+                if getattr(self, name) is not None and getattr(self, name) is getattr(other, name)]
+
+    def clear(self):
+        """Vacía todas las tablas (al empezar otra partida)"""
+        for table in (self.tt, self.ordering, self.eval_cache, self.pattern_tt):
+            if table is not None:
+                table.clear()
@@ -0,0 +1,250 @@
+"""
+Torneo fuera de línea entre motores (self-play) en varios procesos.
+
+Cada apertura (jugadas al azar o tomadas del libro) se juega dos veces,
+una con cada motor en cada color, para que la apertura no favorezca a
+nadie. Las partidas se reparten en el pool de procesos compartido.
+
+Reporta victorias/empates/derrotas del primer motor, margen de fichas y,
+por motor, tiempo por jugada y nodos buscados (SearchStats de cada jugada).
+
+Uso:
+    python selfplay.py fabi majos --games 200 --time 0.5 --opening book --workers 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import time
+
+from bitboard import valid_moves
+from board_ops import do_move
+from engines import ENGINES, load_engine, warm_up
+from opening_book import BOOK
+from parallel_search import PARALLEL_WORKERS, get_pool
+
+# Tiempo por jugada por defecto (segundos) para los motores con límite
+SELFPLAY_TIME_LIMIT = 0.5
+
+# Motores ya cargados en cada proceso del pool, uno por (motor, color) con
+# tablas propias
+_worker_engines = {}
+
+
+def initial_board():
+    board = [[0] * 8 for _ in range(8)]
+    board[3][3] = 1
+    board[3][4] = -1
+    board[4][3] = -1
+    board[4][4] = 1
+    return board
+
+
+def make_openings(count, plies, mode='random', seed=0):
+    """
+    count aperturas distintas de plies jugadas (negras empiezan).
+    mode='book' elige al azar entre las jugadas del libro mientras la
+    posición esté en el libro y sigue al azar después.
+    """
+    rng = random.Random(seed)
+    openings = []
+    seen = set()
+    attempts = 0
+    while len(openings) < count and attempts < count * 100:
+        attempts += 1
+        board = initial_board()
+        symbol = -1
+        moves = []
+        for _ in range(plies):
+            legal = valid_moves(board, symbol)
+            if not legal:
+                break
+            book_moves = [move for move, _ in BOOK.moves(board, symbol)] if mode == 'book' else []
+            move = rng.choice(book_moves or legal)
+            do_move(board, move, symbol, [])
+            moves.append(move)
+            symbol = -symbol
+        if tuple(moves) not in seen:
+            seen.add(tuple(moves))
+            openings.append(moves)
+    return openings
+
+
+def _engine_function(engine, symbol):
+    """
+    Engine del color symbol. Cada color tiene sus tablas (Engine.isolate):
+    en fabi contra fabi, o fabi contra fabi_pvs, los dos lados son del mismo
+    módulo y sin eso compartirían transposiciones, killers e historia.
+    """
+    key = (engine, symbol)
+    if key not in _worker_engines:
+        function = load_engine(engine)
+        function.isolate()
+        # Calentado fuera del tiempo medido de la primera jugada
+        warm_up(function)
+        _worker_engines[key] = function
+    return _worker_engines[key]
+
+
+def check_isolated(first, second):
+    """Falla si los dos lados de una partida comparten alguna tabla de búsqueda"""
+    first_tables, second_tables = first.active_tables(), second.active_tables()
+    if first_tables is None or second_tables is None:
+        return
+    shared = first_tables.shared_with(second_tables)
+    if shared:
+        raise RuntimeError(f'{first.name} y {second.name} comparten tablas: {", ".join(shared)}')
+
+
+def play_game(black, white, opening, time_limit, seed=0):
+    """
+    Juega una partida desde la apertura dada. Retorna un diccionario con las
+    fichas finales y, por color, jugadas, tiempos y nodos.
+    """
+    random.seed(seed)
+    board = initial_board()
+    symbol = -1
+    for move in opening:
+        do_move(board, move, symbol, [])
+        symbol = -symbol
+
+    engines = {-1: _engine_function(black, -1), 1: _engine_function(white, 1)}
+    check_isolated(engines[-1], engines[1])
+    # Cada partida empieza con las tablas vacías: el proceso ya jugó otras
+    for engine in engines.values():
+        engine.reset()
+    stats = {color: {'moves': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'nodes': 0} for color in (-1, 1)}
+    forfeit = None
+    passes = 0
+    while passes < 2:
+        legal = valid_moves(board, symbol)
+        if not legal:
+            passes += 1
+            symbol = -symbol
+            continue
+        passes = 0
+        function = engines[symbol]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            move, search_stats = function(board, symbol, time_limit=time_limit, return_stats=True)
+        elapsed = time.perf_counter() - start
+
+        color_stats = stats[symbol]
+        color_stats['moves'] += 1
+        color_stats['seconds'] += elapsed
+        color_stats['max_seconds'] = max(color_stats['max_seconds'], elapsed)
+        color_stats['nodes'] += search_stats.nodes + search_stats.endgame_nodes
+
+        if move is None or tuple(move) not in legal:
+            forfeit = symbol
+            break
+        do_move(board, tuple(move), symbol, [])
+        symbol = -symbol
+
+    black_discs = sum(row.count(-1) for row in board)
+    white_discs = sum(row.count(1) for row in board)
+    if forfeit is not None:
+        # Una jugada ilegal pierde la partida con el margen máximo
+        black_discs, white_discs = (0, 64) if forfeit == -1 else (64, 0)
+    return {'black': black, 'white': white, 'opening': opening, 'black_discs': black_discs,
+            'white_discs': white_discs, 'forfeit': forfeit, 'stats': {'black': stats[-1], 'white': stats[1]}}
+
+
+def run_match(engine_a, engine_b, games, time_limit=SELFPLAY_TIME_LIMIT, opening='random', plies=8,
+              workers=PARALLEL_WORKERS, seed=0):
+    """Juega games partidas (la mitad con cada color) y retorna el resumen"""
+    openings = make_openings((games + 1) // 2, plies, opening, seed)
+    pairings = []
+    for index, moves in enumerate(openings):
+        pairings.append((engine_a, engine_b, moves, time_limit, seed + 2 * index))
+        pairings.append((engine_b, engine_a, moves, time_limit, seed + 2 * index + 1))
+    start = time.time()
+    pool = get_pool(workers)
+    futures = [pool.submit(play_game, *pairing) for pairing in pairings[:games]]
+    results = [future.result() for future in futures]
+    return summarize(engine_a, engine_b, results, time.time() - start)
+
+
+def summarize(engine_a, engine_b, results, wall_seconds):
+    wins = draws = losses = 0
+    margins = []
+    per_engine = {engine: {'moves': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'nodes': 0}
+                  for engine in (engine_a, engine_b)}
+    for index, game in enumerate(results):
+        # Las partidas alternan colores: en las pares engine_a juega con negras
+        a_color = 'black' if index % 2 == 0 else 'white'
+        b_color = 'white' if a_color == 'black' else 'black'
+        margin = game[f'{a_color}_discs'] - game[f'{b_color}_discs']
+        margins.append(margin)
+        if margin > 0:
+            wins += 1
+        elif margin == 0:
+            draws += 1
+        else:
+            losses += 1
+        for engine, color in ((engine_a, a_color), (engine_b, b_color)):
+            stats = game['stats'][color]
+            total = per_engine[engine]
+            total['moves'] += stats['moves']
+            total['seconds'] += stats['seconds']
+            total['max_seconds'] = max(total['max_seconds'], stats['max_seconds'])
+            total['nodes'] += stats['nodes']
+
+    games = len(results)
+    engines = {}
+    for engine, total in per_engine.items():
+        moves = total['moves'] or 1
+        seconds = total['seconds'] or 1e-9
+        engines[engine] = {
+            'moves': total['moves'],
+            'cpu_seconds': round(total['seconds'], 3),
+            'seconds_per_move': round(total['seconds'] / moves, 4),
+            'max_seconds_per_move': round(total['max_seconds'], 4),
+            'nodes_per_move': round(total['nodes'] / moves),
+            'nodes_per_second': round(total['nodes'] / seconds),
+        }
+    return {
+        'engines': [engine_a, engine_b],
+        'games': games,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': round((wins + draws / 2) / games, 4) if games else None,
+        'mean_margin': round(statistics.mean(margins), 2) if margins else None,
+        'margin_stdev': round(statistics.stdev(margins), 2) if len(margins) > 1 else None,
+        'forfeits': sum(game['forfeit'] is not None for game in results),
+        'wall_seconds': round(wall_seconds, 2),
+        'per_engine': engines,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Torneo entre motores en varios procesos')
+    parser.add_argument('engine_a', choices=sorted(ENGINES))
+    parser.add_argument('engine_b', choices=sorted(ENGINES))
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--time', type=float, default=SELFPLAY_TIME_LIMIT, help='segundos por jugada')
+    parser.add_argument('--opening', choices=('random', 'book'), default='random')
+    parser.add_argument('--plies', type=int, default=8, help='jugadas de cada apertura')
+    parser.add_argument('--workers', type=int, default=PARALLEL_WORKERS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='archivo JSON con el resumen')
+    args = parser.parse_args()
+
+    summary = run_match(args.engine_a, args.engine_b, args.games, args.time, args.opening, args.plies,
+                        args.workers, args.seed)
+    print(f"{args.engine_a} vs {args.engine_b}: +{summary['wins']} ={summary['draws']} -{summary['losses']} "
+          f"(score {summary['score']}, margen medio {summary['mean_margin']:+})")
+    for engine, stats in summary['per_engine'].items():
+        print(f"  {engine}: {stats['seconds_per_move']}s/jugada, nodos/jugada {stats['nodes_per_move']}, "
+              f"nodos/s {stats['nodes_per_second']}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Estabilidad de fichas sobre bitboards.
+
+Una ficha es estable si en cada uno de los 4 ejes (horizontal, vertical y
+las dos diagonales) se cumple al menos una de estas condiciones:
+  - la línea completa de ese eje está llena (nadie puede jugar en ella),
+  - la ficha está en el borde del tablero en ese eje,
+  - una de sus vecinas en ese eje es una ficha estable del mismo color.
+El conjunto se calcula desde las esquinas y bordes hacia adentro, repitiendo
+hasta que no cambia (normalmente 2 o 3 pasadas).
+"""
+
+from bitboard import NOT_COL_0, NOT_COL_7, get_flips, get_moves, iter_squares, popcount, shift
+
+ROW_0 = 0x00000000000000FF
+ROW_7 = 0xFF00000000000000
+COL_0 = 0x0101010101010101
+COL_7 = 0x8080808080808080
+BORDER = ROW_0 | ROW_7 | COL_0 | COL_7
+
+
+def _line_masks():
+    rows = [0xFF << (8 * r) for r in range(8)]
+    cols = [COL_0 << c for c in range(8)]
+    diagonals = []       # dirección (+1, +1)
+    anti_diagonals = []  # dirección (+1, -1)
+    for k in range(-7, 8):
+        diagonal = 0
+        anti_diagonal = 0
+        for r in range(8):
+            c = r - k
+            if 0 <= c < 8:
+                diagonal |= 1 << (r * 8 + c)
+            c = k + 7 - r
+            if 0 <= c < 8:
+                anti_diagonal |= 1 << (r * 8 + c)
+        diagonals.append(diagonal)
+        anti_diagonals.append(anti_diagonal)
+    return rows, cols, diagonals, anti_diagonals
+
+
+ROW_LINES, COL_LINES, DIAGONAL_LINES, ANTI_DIAGONAL_LINES = _line_masks()
+
+
+def _full_lines(occupied, lines):
+    full = 0
+    for line in lines:
+        if occupied & line == line:
+            full |= line
+    return full
+
+
+def stable_discs(p, o):
+    """Bitboard con las fichas estables de P"""
+    occupied = p | o
+    full_h = _full_lines(occupied, ROW_LINES) | COL_0 | COL_7
+    full_v = _full_lines(occupied, COL_LINES) | ROW_0 | ROW_7
+    full_d = _full_lines(occupied, DIAGONAL_LINES) | BORDER
+    full_a = _full_lines(occupied, ANTI_DIAGONAL_LINES) | BORDER
+
+    stable = 0
+    while True:
+        horizontal = full_h | (shift(stable, 1) & NOT_COL_0) | (shift(stable, -1) & NOT_COL_7)
+        vertical = full_v | shift(stable, 8) | shift(stable, -8)
+        diagonal = full_d | (shift(stable, 9) & NOT_COL_0) | (shift(stable, -9) & NOT_COL_7)
+        anti_diagonal = full_a | (shift(stable, 7) & NOT_COL_7) | (shift(stable, -7) & NOT_COL_0)
+        new_stable = p & horizontal & vertical & diagonal & anti_diagonal
+        if new_stable == stable:
+            return stable
+        stable = new_stable
+
+
+def flippable_discs(p, o):
+    """Fichas de O que P puede voltear con su próxima jugada"""
+    flippable = 0
+    for sq in iter_squares(get_moves(p, o)):
+        flippable |= get_flips(p, o, sq)
+    return flippable
+
+
+def stability_score(p, o):
+    """
+    Puntaje de estabilidad de P menos el de O:
+      - estable: +3 (no puede ser volteada nunca)
+      - semiestable: +1 (podría ser volteada más adelante)
+      - inestable: -1 (el oponente puede voltearla en su próxima jugada)
+    """
+    return _side_score(p, o) - _side_score(o, p)
+
+
+def _side_score(p, o):
+    stable = stable_discs(p, o)
+    unstable = flippable_discs(o, p) & ~stable
+    semi_stable = p & ~stable & ~unstable
+    return 3 * popcount(stable) + popcount(semi_stable) - popcount(unstable)
+
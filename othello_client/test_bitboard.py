@@ -0,0 +1,22 @@
+import pytest
+
+from benchmark import PERFT_START, initial_board, perft_board, perft_bitboard
+from bitboard import board_to_bitboards, valid_moves
+from board_ops import do_move
+
+
+def apply_move(board, move, symbol):
+    new_board = [row[:] for row in board]
+    do_move(new_board, move, symbol, [])
+    return new_board
+
+
+@pytest.mark.parametrize('depth', range(1, 6))
+def test_perft_from_start(depth):
+    p, o = board_to_bitboards(initial_board(), -1)
+    assert perft_bitboard(p, o, depth) == PERFT_START[depth - 1]
+
+
+def test_perft_depth_5_with_board_moves():
+    # valid_moves y do_move sobre la lista de listas que usan los motores
+    assert perft_board(valid_moves, apply_move, initial_board(), -1, 5) == 1396
@@ -0,0 +1,30 @@
+import pytest
+
+from benchmark import random_position
+from bitboard import board_to_bitboards, get_moves, iter_squares, make_move
+from endgame import final_score, solve_board
+
+EMPTIES = 7
+POSITIONS = 40
+
+
+def brute_force(p, o, passed=False):
+    """Negamax sin poda ni orden: diferencia final exacta para el que mueve"""
+    moves = get_moves(p, o)
+    if not moves:
+        if passed:
+            return final_score(p, o)
+        return -brute_force(o, p, True)
+    return max(-brute_force(*make_move(p, o, sq)) for sq in iter_squares(moves))
+
+
+@pytest.mark.parametrize('seed', range(POSITIONS))
+def test_solver_matches_brute_force(seed):
+    board, symbol = random_position(64 - EMPTIES, seed)
+    assert sum(row.count(0) for row in board) == EMPTIES
+    p, o = board_to_bitboards(board, symbol)
+
+    score, move = solve_board(board, symbol)
+    assert score == brute_force(p, o)
+    # La jugada elegida consigue ese valor
+    assert -brute_force(*make_move(p, o, move[0] * 8 + move[1])) == score
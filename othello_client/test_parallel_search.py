@@ -0,0 +1,54 @@
+import importlib
+
+import pytest
+
+from engines import warm_up_position
+from parallel_search import ENGINES, new_search_id, parallel_root_search, shutdown_pool
+
+DEPTH = 4
+SEEDS = (1, 2, 3)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pool():
+    yield
+    shutdown_pool()
+
+
+def serial_search(engine, board, symbol):
+    """(valor, jugada) por profundidad, como la profundización de decide_move2 con workers=0"""
+    module = importlib.import_module(ENGINES[engine][0])
+    search = getattr(module, ENGINES[engine][1])
+    tables = module.new_tables(4)
+    kwargs = {'tt': tables.tt, 'ordering': tables.ordering}
+    if tables.eval_cache is not None:
+        kwargs['eval_cache'] = tables.eval_cache
+    results = []
+    for depth in range(1, DEPTH + 1):
+        tables.ordering.start_iteration(depth)
+        moves = module.root_moves(board, symbol, depth, tables.tt, tables.ordering)
+        results.append(search([row[:] for row in board], depth, True, symbol, float('-inf'), float('inf'),
+                              moves=moves, **kwargs))
+    return results
+
+
+def parallel_search(engine, board, symbol):
+    module = importlib.import_module(ENGINES[engine][0])
+    tables = module.new_tables(4)
+    search_id = new_search_id()
+    results = []
+    for depth in range(1, DEPTH + 1):
+        moves = module.root_moves(board, symbol, depth, tables.tt, tables.ordering)
+        results.append(parallel_root_search(engine, board, symbol, depth, 2, None, search_id, moves, tables.tt))
+    return results
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('seed', SEEDS)
+def test_parallel_matches_serial_with_tables(engine, seed):
+    board, symbol = warm_up_position(seed)
+    serial = serial_search(engine, board, symbol)
+    parallel = parallel_search(engine, board, symbol)
+    for (serial_value, serial_move), (parallel_value, parallel_move) in zip(serial, parallel):
+        assert parallel_move == serial_move
+        assert parallel_value == pytest.approx(serial_value)
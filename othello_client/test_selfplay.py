@@ -0,0 +1,28 @@
+import pytest
+
+from engines import load_engine
+from selfplay import _engine_function, check_isolated, play_game
+
+
+@pytest.mark.parametrize('black, white', [('fabi', 'fabi'), ('fabi', 'fabi_pvs'), ('majos', 'majos_pvs'),
+                                          ('majos_pattern', 'majos_pattern'), ('diego', 'diego_pvs')])
+def test_sides_never_share_tables(black, white):
+    first, second = _engine_function(black, -1), _engine_function(white, 1)
+    assert first.tables is not None and second.tables is not None
+    if first.tables.tt is not None:
+        assert first.tables.tt is not second.tables.tt
+    assert first.tables.ordering is not second.tables.ordering
+    assert first.tables.shared_with(second.tables) == []
+    check_isolated(first, second)
+
+
+def test_module_tables_are_shared_without_isolate():
+    first, second = load_engine('fabi'), load_engine('fabi_pvs')
+    with pytest.raises(RuntimeError):
+        check_isolated(first, second)
+
+
+def test_game_keeps_tables_apart():
+    result = play_game('fabi', 'fabi_pvs', [], time_limit=0.01)
+    assert _engine_function('fabi', -1).tables.tt is not _engine_function('fabi_pvs', 1).tables.tt
+    assert result
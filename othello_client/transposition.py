@@ -0,0 +1,129 @@
+"""
+Tabla de transposición con hash Zobrist.
+
+El hash se actualiza de forma incremental en cada movimiento: se agrega la
+ficha colocada y se cambia el color de cada ficha volteada, usando la pila
+de deshacer que llena board_ops.do_move.
+"""
+
+import random
+
+# Tipos de cota guardados en cada entrada
+EXACT = 0
+LOWER = 1   # el valor real es >= score
+UPPER = 2   # el valor real es <= score
+
+# Semilla fija: todos los procesos (y el libro de aperturas) usan las mismas claves
+_rng = random.Random(0x0DE110)
+
+# ZOBRIST[sq][0] para fichas blancas (1), ZOBRIST[sq][1] para negras (-1)
+ZOBRIST = [(_rng.getrandbits(64), _rng.getrandbits(64)) for _ in range(64)]
+# Cambiar una ficha de color equivale a quitar una clave y poner la otra
+FLIP_KEYS = [white ^ black for white, black in ZOBRIST]
+# Turno de las negras
+SIDE_KEY = _rng.getrandbits(64)
+# La búsqueda evalúa desde el punto de vista de las negras
+PERSPECTIVE_KEY = _rng.getrandbits(64)
+
+# Tamaño aproximado de una entrada en memoria (lista de slots + tupla + enteros)
+ENTRY_BYTES = 160
+
+
+def piece_key(sq, symbol):
+    return ZOBRIST[sq][0] if symbol == 1 else ZOBRIST[sq][1]
+
+
+def hash_board(board):
+    """Hash Zobrist de las fichas del tablero 8x8 (sin turno)"""
+    key = 0
+    sq = 0
+    for row in board:
+        for cell in row:
+            if cell:
+                key ^= piece_key(sq, cell)
+            sq += 1
+    return key
+
+
+def search_key(board, side_to_move, my_symbol):
+    """Clave de un nodo de búsqueda: fichas, turno y perspectiva de la evaluación"""
+    key = hash_board(board)
+    if side_to_move == -1:
+        key ^= SIDE_KEY
+    if my_symbol == -1:
+        key ^= PERSPECTIVE_KEY
+    return key
+
+
+def child_key(key, move, symbol, flips, undo):
+    """
+    Clave del hijo tras do_move(board, move, symbol, undo), que volteó
+    las últimas flips casillas de undo. También cambia el turno.
+    """
+    key ^= piece_key(move[0] * 8 + move[1], symbol) ^ SIDE_KEY
+    for i in range(len(undo) - flips, len(undo)):
+        key ^= FLIP_KEYS[undo[i]]
+    return key
+
+
+def bound_flag(score, alpha, beta):
+    """Tipo de cota de un resultado obtenido con la ventana original (alpha, beta)"""
+    if score <= alpha:
+        return UPPER
+    if score >= beta:
+        return LOWER
+    return EXACT
+
+
+class TranspositionTable:
+    """
+    Tabla de tamaño fijo indexada por los bits bajos de la clave.
+    Reemplazo por profundidad: una entrada de la búsqueda actual solo se
+    reemplaza por otra de igual o mayor profundidad; las de búsquedas
+    anteriores siempre se pueden reemplazar.
+    """
+
+    def __init__(self, memory_mb=64):
+        slots = max(1, int(memory_mb * 1024 * 1024) // ENTRY_BYTES)
+        # Potencia de dos para indexar con una máscara
+        size = 1 << (slots.bit_length() - 1)
+        self.mask = size - 1
+        self.slots = [None] * size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def new_search(self):
+        """Marca el inicio de una nueva búsqueda (envejece las entradas actuales)"""
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """Retorna (depth, flag, score, move) o None"""
+        self.probes += 1
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1], entry[2], entry[3], entry[4]
+        return None
+
+    def peek(self, key):
+        """Como probe pero sin contar en probes/hits (para leer la PV fuera de la búsqueda)"""
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry[1], entry[2], entry[3], entry[4]
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is None or entry[5] != self.generation or depth >= entry[1]:
+            self.slots[index] = (key, depth, flag, score, move, self.generation)